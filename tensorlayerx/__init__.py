@@ -27,6 +27,7 @@ if 'TENSORLAYER_PACKAGE_BUILDING' not in os.environ:
     from tensorlayerx import dataflow
     from tensorlayerx import metrics
     from tensorlayerx import vision
+    from tensorlayerx import text
 
     from tensorlayerx.utils.lazy_imports import LazyImport
 
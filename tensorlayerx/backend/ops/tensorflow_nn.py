@@ -6,6 +6,8 @@ from tensorflow.python.framework import ops
 from tensorflow.python.ops import math_ops, array_ops
 from tensorflow.python.training import moving_averages
 from math import floor, ceil
+import contextlib
+import threading
 import warnings
 import math
 import numpy as np
@@ -423,6 +425,31 @@ def gelu(x, approximate=False):
     return tf.nn.gelu(x, approximate=approximate)
 
 
+_stateless_random = threading.local()
+
+
+@contextlib.contextmanager
+def stateless_random_scope(seed):
+    """Inside the scope the dropout masks are drawn with stateless random ops seeded from the ``[2]`` int64 tensor
+    ``seed``, so that running the same ops again in a scope with the same seed draws the same masks."""
+    previous = getattr(_stateless_random, 'state', None)
+    _stateless_random.state = [seed, 0]
+    try:
+        yield
+    finally:
+        _stateless_random.state = previous
+
+
+def _dropout(inputs, rate, seed=None):
+    state = getattr(_stateless_random, 'state', None)
+    if state is None:
+        return tf.nn.dropout(inputs, rate=rate, seed=seed)
+    # every dropout of the scope gets its own seed, in the order of the calls
+    state[1] += 1
+    seed = state[0] + tf.constant([0, state[1]], dtype=state[0].dtype)
+    return tf.nn.experimental.stateless_dropout(inputs, rate=rate, seed=seed)
+
+
 class Dropout(object):
 
     def __init__(self, p, seed=0):
@@ -430,7 +457,7 @@ class Dropout(object):
         self.seed = seed
 
     def __call__(self, inputs, *args, **kwargs):
-        outputs = tf.nn.dropout(inputs, rate=self.p, seed=self.seed)
+        outputs = _dropout(inputs, rate=self.p, seed=self.seed)
         return outputs
 
 
@@ -2215,7 +2242,7 @@ class rnnbase(object):
             h_i_fw = h[i, :, :]
             h_i_bw = h[i + 1, :, :]
             if i != 0 and self.train:
-                pre_layer = tf.nn.dropout(pre_layer, rate=self.dropout)
+                pre_layer = _dropout(pre_layer, rate=self.dropout)
             if c is not None:
                 c_i_fw = c[i, :, :]
                 c_i_bw = c[i + 1, :, :]
@@ -2272,7 +2299,7 @@ class rnnbase(object):
                 bias_hh = None
             h_i = h[i, :, :]
             if i != 0 and self.train:
-                pre_layer = tf.nn.dropout(pre_layer, rate=self.dropout)
+                pre_layer = _dropout(pre_layer, rate=self.dropout)
             if c is not None:
                 c_i = c[i, :, :]
                 for j in range(time_step):
@@ -2536,7 +2563,7 @@ class multiheadattention(object):
             attn += attn_mask
         attn = tf.nn.softmax(attn)
         if self.train:
-            attn = tf.nn.dropout(attn, self.dropout)
+            attn = _dropout(attn, self.dropout)
         output = tf.matmul(attn, v)
 
         output = tf.reshape(tf.transpose(output, perm=(1, 0, 2)), shape=(tgt_len, batch_size, embed_dim))
@@ -407,6 +407,9 @@ class BiasAdd(object):
             raise ("Unsupported data format: " + str(data_format))
 
     def __call__(self, x, bias):
+        if x.dtype in (torch.float16, torch.bfloat16) and bias.dtype != x.dtype:
+            # in an autocast region the float32 bias would promote the half precision outputs of the matmul
+            bias = bias.to(x.dtype)
         if len(x.shape) > 2 and self.data_format == 'channels_first':
             x = nchw_to_nhwc(x)
         outputs = torch.add(x, bias)
@@ -3,4 +3,7 @@
 from __future__ import absolute_import, division, print_function
 from .dataloader import *
 from .sampler import *
-from .dataset import *
\ No newline at end of file
+from .dataset import *
+from .memmap import *
+from .record import *
+from .cache import *
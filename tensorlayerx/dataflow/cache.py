@@ -0,0 +1,201 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import collections
+import hashlib
+import multiprocessing
+import os
+import pickle
+import struct
+import sys
+import numpy as np
+from .dataset import Dataset
+from .utils import _layout_shared_arrays, _read_shared_arrays
+
+__all__ = [
+    'CachedDataset',
+]
+
+_HEADER = struct.Struct('<Q')
+_DATA_ALIGNMENT = 64
+_STATS = ('hits', 'disk_hits', 'misses', 'evictions', 'disk_writes')
+
+
+def _sample_nbytes(sample):
+    if isinstance(sample, np.ndarray):
+        return sample.nbytes
+    elif isinstance(sample, (bytes, bytearray, str)):
+        return len(sample)
+    elif isinstance(sample, collections.abc.Mapping):
+        return sum(_sample_nbytes(v) for v in sample.values())
+    elif isinstance(sample, (list, tuple)):
+        return sum(_sample_nbytes(v) for v in sample)
+    nbytes = getattr(sample, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(sample)
+
+
+def _read_only(sample):
+    # the in-process cache hands out views of its arrays which cannot be written and copies of the containers, so
+    # modifying a sample in place fails instead of silently changing the cached one
+    if isinstance(sample, np.ndarray):
+        view = sample.view()
+        view.setflags(write=False)
+        return view
+    elif isinstance(sample, collections.abc.Mapping):
+        return {key: _read_only(sample[key]) for key in sample}
+    elif isinstance(sample, tuple) and hasattr(sample, '_fields'):
+        return type(sample)(*(_read_only(d) for d in sample))
+    elif isinstance(sample, (list, tuple)):
+        return type(sample)(_read_only(d) for d in sample)
+    return sample
+
+
+def _data_offset(header_size):
+    # a spill file is the header size, the pickled layout of the sample and then its arrays at an aligned offset
+    return -(-(_HEADER.size + header_size) // _DATA_ALIGNMENT) * _DATA_ALIGNMENT
+
+
+def _default_fingerprint(dataset):
+    # the repr of a transform without a custom __repr__ contains its address, so without an explicit fingerprint
+    # the disk tier is only reused by processes forked from the one which created the dataset
+    parts = [type(dataset).__module__, type(dataset).__qualname__, str(len(dataset))]
+    for name in ('transform', 'transforms', 'target_transform'):
+        if hasattr(dataset, name):
+            parts.append('{}={!r}'.format(name, getattr(dataset, name)))
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+class CachedDataset(Dataset):
+    """Memoizes the samples of an expensive, deterministic ``__getitem__``.
+
+    Samples are kept in an in-process LRU cache bounded by a byte budget. If ``cache_dir`` is given they are also
+    spilled to an on-disk tier: one file per sample, keyed by the index and a fingerprint of the dataset and its
+    transform, holding the arrays as raw data which is read back through ``np.memmap``. Files are written to a
+    temporary name and renamed atomically, so DataLoader workers can share the disk tier safely and it survives
+    across epochs. Every worker has its own in-process cache, the statistics are shared. The arrays of the samples
+    held in memory are returned as read-only views, copy them before modifying them in place.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        The dataset to cache. Its ``__getitem__`` must return the same sample for an index every time.
+    memory_budget : int
+        The maximum size in bytes of the samples kept in memory by every process, ``0`` disables the in-process
+        cache. default is 256 MB.
+    cache_dir : str
+        The directory of the on-disk tier. default is ``None``, which disables it.
+    fingerprint : str
+        Identifies the dataset and its preprocessing in ``cache_dir``. Change it whenever the transform changes.
+        default is ``None``, which derives it from the dataset class, its length and the repr of its transform.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> import tensorlayerx as tlx
+    >>> dataset = tlx.dataflow.CachedDataset(my_decode_dataset, memory_budget=1 << 30, cache_dir='data/cache')
+    >>> loader = tlx.dataflow.DataLoader(dataset, batch_size=64, shuffle=True, num_workers=4)
+    >>> print(dataset.cache_stats())
+
+    """
+
+    def __init__(self, dataset, memory_budget=256 << 20, cache_dir=None, fingerprint=None):
+        super(CachedDataset, self).__init__()
+        if not isinstance(memory_budget, int) or memory_budget < 0:
+            raise ValueError("memory_budget should be a non-negative integer, but got {}.".format(memory_budget))
+        self.dataset = dataset
+        self.memory_budget = memory_budget
+        self.fingerprint = _default_fingerprint(dataset) if fingerprint is None else fingerprint
+        self.cache_dir = None if cache_dir is None else os.path.join(cache_dir, self.fingerprint)
+        if self.cache_dir is not None and not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self._memory = collections.OrderedDict()
+        self._memory_bytes = 0
+        self._stats = multiprocessing.Array('q', len(_STATS))
+
+    def _count(self, name):
+        with self._stats.get_lock():
+            self._stats[_STATS.index(name)] += 1
+
+    def cache_stats(self):
+        """Returns the hits of the in-process and disk tiers, misses, evictions, disk writes and the hit rate
+        summed over all processes, and the bytes held in memory by the calling process."""
+        with self._stats.get_lock():
+            stats = dict(zip(_STATS, self._stats[:]))
+        requests = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['disk_hits']) / max(requests, 1)
+        stats['memory_bytes'] = self._memory_bytes
+        return stats
+
+    def _file(self, index):
+        return os.path.join(self.cache_dir, '{:06d}'.format(index // 10000), '{}.bin'.format(index))
+
+    def _read_disk(self, index):
+        filename = self._file(index)
+        if not os.path.exists(filename):
+            return None
+        with open(filename, 'rb') as f:
+            header_size = _HEADER.unpack(f.read(_HEADER.size))[0]
+            layout = pickle.loads(f.read(header_size))
+        data_offset = _data_offset(header_size)
+        if os.path.getsize(filename) <= data_offset:
+            return _read_shared_arrays(layout, b'')
+        data = np.memmap(filename, dtype=np.uint8, mode='r', offset=data_offset)
+        return _read_shared_arrays(layout, data)
+
+    def _write_disk(self, index, sample):
+        arrays = []
+        layout, nbytes = _layout_shared_arrays(sample, arrays)
+        header = pickle.dumps(layout, protocol=pickle.HIGHEST_PROTOCOL)
+        data_offset = _data_offset(len(header))
+        filename = self._file(index)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        with open(tmp_filename, 'wb') as f:
+            f.write(_HEADER.pack(len(header)))
+            f.write(header)
+            for offset, array in arrays:
+                f.seek(data_offset + offset)
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(data_offset + nbytes if arrays else data_offset)
+        os.replace(tmp_filename, filename)
+        self._count('disk_writes')
+
+    def _put_memory(self, index, sample):
+        nbytes = _sample_nbytes(sample)
+        if nbytes > self.memory_budget:
+            return sample
+        self._memory[index] = (_read_only(sample), nbytes)
+        self._memory_bytes += nbytes
+        while self._memory_bytes > self.memory_budget:
+            _, (_, evicted_bytes) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_bytes
+            self._count('evictions')
+        return _read_only(self._memory[index][0]) if index in self._memory else sample
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        entry = self._memory.get(index)
+        if entry is not None:
+            self._memory.move_to_end(index)
+            self._count('hits')
+            return _read_only(entry[0])
+        sample = None
+        if self.cache_dir is not None:
+            sample = self._read_disk(index)
+        if sample is not None:
+            self._count('disk_hits')
+        else:
+            self._count('misses')
+            sample = self.dataset[index]
+            if self.cache_dir is not None:
+                self._write_disk(index, sample)
+        if self.memory_budget > 0:
+            sample = self._put_memory(index, sample)
+        return sample
+
+    def __len__(self):
+        return len(self.dataset)
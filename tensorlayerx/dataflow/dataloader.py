@@ -2,11 +2,13 @@
 # -*- coding: utf-8 -*-
 from .dataset import Dataset, IterableDataset
 from .sampler import Sampler, SequentialSampler, RandomSampler, BatchSampler, SubsetRandomSampler, WeightedRandomSampler
-from .utils import _DatasetKind, _InfiniteIterableSampler
+from .utils import _DatasetKind, _InfiniteIterableSampler, get_worker_info
 from . import utils
 import math
+import weakref
 __all__ = [
     'DataLoader',
+    'get_worker_info',
 ]
 
 
@@ -49,6 +51,30 @@ class DataLoader(object):
     persistent_workers : bool
         If ``True``, the data loader will not shutdown the worker processes after a dataset has been consumed once.
         This allows to maintain the workers `Dataset` instances alive. default is ``False``.
+    use_shared_memory : bool
+        If ``True``, workers write the NumPy arrays of every batch into a ring of reused shared memory slabs and only
+        send a small descriptor through the result queue, instead of pickling the whole batch through a pipe.
+        The default collate functions then collate into NumPy arrays in the workers and convert them to tensors in
+        the main process. Arrays returned by a custom ``collate_fn`` are transported the same way, other objects
+        are still pickled. Bytes moved per batch are reported by :attr:`transport_stats`. default is ``False``.
+    prefetch_batches : int
+        If positive, a background thread keeps up to this many batches ready. The thread converts the batches to
+        tensors and copies them to ``device`` while the current training step runs. ``0`` disables the prefetch
+        thread. default is ``0``.
+    pin_memory : bool
+        If ``True``, the prefetch thread stages batches in pinned host memory and uploads them with asynchronous
+        copies, when the backend and ``device`` support it. Needs ``prefetch_batches > 0``. default is ``False``.
+    device : str
+        The device the prefetch thread places the batches on, 'CPU', 'GPU' or 'GPU:<id>'. ``None`` keeps the
+        default placement of the backend. Needs ``prefetch_batches > 0``. default is ``None``.
+    worker_dispatch : str
+        How index batches are assigned to the worker processes. ``'round_robin'`` sends them to the workers in turn,
+        ``'least_loaded'`` sends them to the worker with the fewest outstanding batches, so that a slow sample does
+        not queue further work behind it. Per worker counters are reported by :attr:`worker_stats`.
+        default is ``'round_robin'``.
+    in_order : bool
+        If ``False``, batches are returned in the order the workers finish them instead of the sampler order.
+        Only useful when the order of the batches does not matter, e.g. for training. default is ``True``.
     """
 
     def __init__(
@@ -65,6 +91,12 @@ class DataLoader(object):
         worker_init_fn=None,
         prefetch_factor=2,
         persistent_workers=False,
+        use_shared_memory=False,
+        prefetch_batches=0,
+        pin_memory=False,
+        device=None,
+        worker_dispatch='round_robin',
+        in_order=True,
     ):
         self.dataset = dataset
         assert num_workers >= 0, "num_workers should be a non_negative integer"
@@ -72,6 +104,16 @@ class DataLoader(object):
             raise ValueError("prefetch_factor option should not be specified, when num_workers is 0.")
         if persistent_workers and num_workers == 0:
             raise ValueError('persistent_workers option needs num_workers > 0')
+        if use_shared_memory and num_workers == 0:
+            raise ValueError('use_shared_memory option needs num_workers > 0')
+        if not isinstance(prefetch_batches, int) or prefetch_batches < 0:
+            raise ValueError("prefetch_batches should be a non-negative integer, but got {}.".format(prefetch_batches))
+        if (pin_memory or device is not None) and prefetch_batches == 0:
+            raise ValueError('pin_memory and device options need prefetch_batches > 0')
+        if worker_dispatch not in ('round_robin', 'least_loaded'):
+            raise ValueError(
+                "worker_dispatch should be 'round_robin' or 'least_loaded', but got {}.".format(worker_dispatch)
+            )
         self.num_workers = num_workers
         self.prefetch_factor = prefetch_factor
         self.time_out = time_out
@@ -129,6 +171,17 @@ class DataLoader(object):
 
         self.collate_fn = collate_fn
         self.persistent_workers = persistent_workers
+        self.use_shared_memory = use_shared_memory
+        self.prefetch_batches = prefetch_batches
+        self.pin_memory = pin_memory
+        self.device = device
+        self._device_converter = None
+        self._prefetch_iterator = None
+        self._last_iterator = None
+        self._transport_stats = utils._TransportStats()
+        self.worker_dispatch = worker_dispatch
+        self.in_order = in_order
+        self._worker_stats = utils._WorkerStats(num_workers)
 
     @property
     def _is_batch(self):
@@ -141,6 +194,26 @@ class DataLoader(object):
         else:
             return self.sampler
 
+    @property
+    def transport_stats(self):
+        """Statistics of the batches received from the worker processes since the loader was created.
+
+        Returns a dict with the number of ``batches``, how many of them were sent through shared memory
+        (``shared_memory_batches``) or pickled (``pickled_batches``), the total ``shared_memory_bytes`` and the
+        average ``bytes_per_batch`` moved through shared memory.
+        """
+        return self._transport_stats.as_dict()
+
+    @property
+    def worker_stats(self):
+        """Counters of every worker process since the loader was created.
+
+        Returns a list with a dict per worker holding the current number of ``outstanding`` batches (its queue
+        depth), the largest queue depth seen (``max_outstanding``), the number of ``batches`` it delivered and the
+        ``mean_latency`` and ``max_latency`` in seconds from dispatching a batch to receiving it.
+        """
+        return self._worker_stats.as_list()
+
     def _get_iterator(self):
         if self.num_workers == 0:
             return utils._SingleProcessDataLoaderIter(self)
@@ -149,15 +222,65 @@ class DataLoader(object):
 
     def __iter__(self):
 
+        # the prefetch thread of the previous epoch still reads from its iterator if the epoch was left early
+        previous = self._prefetch_iterator() if self._prefetch_iterator is not None else None
+        if previous is not None:
+            previous.close()
+        self._prefetch_iterator = None
         if self.persistent_workers and self.num_workers > 0:
             if self._iterator is None:
 
                 self._iterator = self._get_iterator()
             else:
                 self._iterator._reset(self)
-            return self._iterator
+            iterator = self._iterator
         else:
-            return self._get_iterator()
+            iterator = self._get_iterator()
+        if self.prefetch_batches > 0:
+            if self._device_converter is None:
+                self._device_converter = utils._DeviceConverter(self.device, self.pin_memory)
+            iterator = utils._PrefetchDataLoaderIter(iterator, self._device_converter, self.prefetch_batches)
+            self._prefetch_iterator = weakref.ref(iterator)
+        self._last_iterator = weakref.ref(iterator)
+        return iterator
+
+    def state_dict(self):
+        """Returns the state of the sampler, with the position of the current epoch set to the number of batches
+        returned so far. Workers and the prefetch thread draw indices ahead of the batches returned, so this is the
+        state to save in a checkpoint rather than the one of the sampler.
+
+        Resuming is exact for samplers which replay their order from a seed and the epoch, which includes all
+        samplers of TensorLayerX, and for ``in_order=True``.
+
+        Examples
+        --------
+        With TensorLayerx
+
+        >>> loader = tlx.dataflow.DataLoader(dataset, batch_size=32, shuffle=True, num_workers=4)
+        >>> for step, batch in enumerate(loader):
+        >>>     if step % 1000 == 0:
+        >>>         save_checkpoint({'model': ..., 'loader': loader.state_dict()})
+        >>> # after a restart
+        >>> loader.load_state_dict(checkpoint['loader'])
+
+        """
+        sampler = self._index_sampler
+        state = sampler.state_dict() if hasattr(sampler, 'state_dict') else {'epoch': 0, 'position': 0}
+        iterator = self._last_iterator() if self._last_iterator is not None else None
+        progress = getattr(sampler, '_progress', None)
+        if iterator is not None and progress is not None:
+            position = getattr(sampler, '_epoch_start', 0) + iterator._num_yielded
+            state = dict(state, **sampler._make_state(progress[0], position))
+        return state
+
+    def load_state_dict(self, state_dict):
+        """Restores a state returned by :meth:`state_dict`. The next iteration resumes the saved epoch after the
+        batches returned before the state was saved, without loading them."""
+        sampler = self._index_sampler
+        if not hasattr(sampler, 'load_state_dict'):
+            raise TypeError("the sampler of the DataLoader does not support load_state_dict.")
+        sampler.load_state_dict(state_dict)
+        self._last_iterator = None
 
     def __len__(self):
         if self._dataset_kind == _DatasetKind.Iter:
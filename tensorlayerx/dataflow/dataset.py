@@ -2,7 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import bisect
+import collections
 import numpy as np
+from tensorlayerx.backend import gather, concat
 
 __all__ = [
     'Dataset',
@@ -23,6 +25,11 @@ class Dataset(object):
     :code:`__len__`: return dataset sample number.
     :code:`__add__`: concat two datasets
 
+    Subclasses may also implement :code:`__getitems__`: get a whole batch with a given list of indices, returned
+    already batched, e.g. a tuple of arrays whose first dimension is the batch. When the default ``collate_fn`` is
+    used, :class:`DataLoader` fetches every batch with a single call of :code:`__getitems__` instead of indexing and
+    stacking the samples one by one.
+
     Examples
     --------
     With TensorLayerx
@@ -138,6 +145,12 @@ class TensorDataset(Dataset):
 
         return tuple(tensor[item] for tensor in self.tensors)
 
+    def __getitems__(self, items):
+        items = np.asarray(items, dtype=np.int64)
+        return tuple(
+            tensor[items] if isinstance(tensor, np.ndarray) else gather(tensor, items) for tensor in self.tensors
+        )
+
     def __len__(self):
 
         return self.tensors[0].shape[0]
@@ -204,6 +217,22 @@ class ConcatDataset(Dataset):
             sample_id = item - self.cumulative_sizes[dataset_id - 1]
         return self.datasets[dataset_id][sample_id]
 
+    def __getitems__(self, items):
+        items = np.asarray(items, dtype=np.int64)
+        dataset_ids = np.searchsorted(self.cumulative_sizes, items, side='right')
+        offsets = np.concatenate([[0], self.cumulative_sizes[:-1]])
+        if np.all(dataset_ids == dataset_ids[0]):
+            dataset_id = dataset_ids[0]
+            return self.datasets[dataset_id].__getitems__(items - offsets[dataset_id])
+
+        order = np.argsort(dataset_ids, kind='stable')
+        parts = []
+        for dataset_id in np.unique(dataset_ids):
+            mask = dataset_ids == dataset_id
+            parts.append(self.datasets[dataset_id].__getitems__(items[mask] - offsets[dataset_id]))
+        # the parts are grouped by dataset, move every sample back to its position in ``items``
+        return _concat_batches(parts, np.argsort(order))
+
 
 class ChainDataset(IterableDataset):
     """A Dataset which chains multiple iterable-tyle datasets.
@@ -289,10 +318,35 @@ class Subset(Dataset):
     def __getitem__(self, item):
         return self.dataset[self.indices[item]]
 
+    def __getitems__(self, items):
+        return self.dataset.__getitems__(np.asarray(self.indices)[np.asarray(items, dtype=np.int64)])
+
     def __len__(self):
         return len(self.indices)
 
 
+def _has_getitems(dataset):
+    """Whether ``dataset`` can fetch a whole batch with ``__getitems__``."""
+    if isinstance(dataset, Subset):
+        return _has_getitems(dataset.dataset)
+    if isinstance(dataset, ConcatDataset):
+        return all(_has_getitems(d) for d in dataset.datasets)
+    return hasattr(dataset, '__getitems__')
+
+
+def _concat_batches(batches, permutation):
+    batch = batches[0]
+    if isinstance(batch, np.ndarray):
+        return np.concatenate(batches, axis=0)[permutation]
+    elif isinstance(batch, collections.abc.Mapping):
+        return {key: _concat_batches([b[key] for b in batches], permutation) for key in batch}
+    elif isinstance(batch, tuple) and hasattr(batch, '_fields'):
+        return type(batch)(*(_concat_batches(parts, permutation) for parts in zip(*batches)))
+    elif isinstance(batch, (list, tuple)):
+        return type(batch)(_concat_batches(parts, permutation) for parts in zip(*batches))
+    return gather(concat(batches, 0), permutation)
+
+
 # Taken from python 3.5 docs
 def _accumulate(iterable, fn=lambda x, y: x + y):
     'Return running totals'
@@ -0,0 +1,192 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import bisect
+import json
+import os
+import numpy as np
+from .dataset import Dataset
+
+__all__ = [
+    'MemmapDataset',
+    'write_memmap_dataset',
+]
+
+_INDEX_FILE = 'index.json'
+_FORMAT = 'tensorlayerx-memmap'
+_VERSION = 1
+
+
+def write_memmap_dataset(path, data, records_per_shard=None):
+    """Write arrays into the packed on-disk format read by :class:`MemmapDataset`.
+
+    Every field is stored as fixed-shape records in raw binary shards, described by a JSON index
+    ``index.json`` holding the dtype and record shape of every field and the size of every shard.
+    The outputs of the dataset loaders in ``tensorlayerx.files`` can be converted directly.
+
+    Parameters
+    ----------
+    path : str
+        The directory the dataset is written to, created if it does not exist.
+    data : dict, list or tuple
+        Arrays with the same size of the first dimension, one per field. Fields are named by the keys of a dict,
+        or ``field_0``, ``field_1`` ... otherwise.
+    records_per_shard : int
+        The maximum number of records in a shard file. default is ``None``, which writes one shard per field.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> import tensorlayerx as tlx
+    >>> X_train, y_train, X_test, y_test = tlx.files.load_cifar10_dataset(shape=(-1, 32, 32, 3))
+    >>> tlx.dataflow.write_memmap_dataset('data/cifar10_train', {'image': X_train, 'label': y_train})
+    >>> dataset = tlx.dataflow.MemmapDataset('data/cifar10_train')
+
+    """
+    if isinstance(data, dict):
+        names, arrays = list(data.keys()), list(data.values())
+    elif isinstance(data, (list, tuple)):
+        names, arrays = ['field_{}'.format(i) for i in range(len(data))], list(data)
+    else:
+        raise TypeError("data should be a dict, list or tuple of arrays, but got {}.".format(type(data)))
+    arrays = [np.asarray(array) for array in arrays]
+    if len(arrays) == 0:
+        raise ValueError("data should contain at least one array.")
+    num_records = arrays[0].shape[0]
+    if not all(array.shape[0] == num_records for array in arrays):
+        raise ValueError("all arrays should have the same size of the first dimension.")
+    if records_per_shard is None:
+        records_per_shard = max(num_records, 1)
+    if not isinstance(records_per_shard, int) or records_per_shard <= 0:
+        raise ValueError("records_per_shard should be a positive integer, but got {}.".format(records_per_shard))
+
+    if not os.path.exists(path):
+        os.makedirs(path)
+    fields = []
+    for name, array in zip(names, arrays):
+        if array.dtype.hasobject:
+            raise TypeError("field '{}' has dtype object, which can not be memory-mapped.".format(name))
+        shards = []
+        for shard_id, start in enumerate(range(0, max(num_records, 1), records_per_shard)):
+            shard = array[start:start + records_per_shard]
+            filename = '{}-{:05d}.bin'.format(name, shard_id)
+            np.ascontiguousarray(shard).tofile(os.path.join(path, filename))
+            shards.append({'file': filename, 'num_records': int(shard.shape[0])})
+        fields.append({'name': name, 'dtype': array.dtype.str, 'shape': list(array.shape[1:]), 'shards': shards})
+
+    index = {'format': _FORMAT, 'version': _VERSION, 'num_records': int(num_records), 'fields': fields}
+    # write the index last, a dataset without one is incomplete
+    with open(os.path.join(path, _INDEX_FILE), 'w') as f:
+        json.dump(index, f, indent=2)
+
+
+class MemmapDataset(Dataset):
+    """A dataset of fixed-shape records memory-mapped from the files written by :func:`write_memmap_dataset`.
+
+    Records are read through ``np.memmap``, so the data is paged in on demand and all DataLoader workers share the
+    same page cache pages instead of holding their own copy. The files are opened lazily in every process.
+    Batches are gathered with one fancy-indexing call per field and shard, see ``Dataset.__getitems__``.
+
+    Parameters
+    ----------
+    path : str
+        The directory written by :func:`write_memmap_dataset`.
+    fields : list or tuple
+        Names of the fields to load, in the order they are returned. default is ``None``, which loads all fields.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> import tensorlayerx as tlx
+    >>> dataset = tlx.dataflow.MemmapDataset('data/cifar10_train', fields=['image', 'label'])
+    >>> image, label = dataset[0]
+    >>> loader = tlx.dataflow.DataLoader(dataset, batch_size=128, shuffle=True, num_workers=4)
+
+    """
+
+    def __init__(self, path, fields=None):
+        super(MemmapDataset, self).__init__()
+        self.path = path
+        with open(os.path.join(path, _INDEX_FILE), 'r') as f:
+            index = json.load(f)
+        if index.get('format') != _FORMAT:
+            raise ValueError("{} is not a memmap dataset index.".format(os.path.join(path, _INDEX_FILE)))
+        all_fields = {field['name']: field for field in index['fields']}
+        if fields is None:
+            fields = [field['name'] for field in index['fields']]
+        for name in fields:
+            if name not in all_fields:
+                raise ValueError("field '{}' not found, the dataset has fields {}.".format(name, list(all_fields)))
+        self.fields = [all_fields[name] for name in fields]
+        self.num_records = index['num_records']
+        self._arrays = None
+
+    def _open(self):
+        arrays = []
+        for field in self.fields:
+            dtype = np.dtype(field['dtype'])
+            shards, ends = [], []
+            for shard in field['shards']:
+                shape = (shard['num_records'], ) + tuple(field['shape'])
+                filename = os.path.join(self.path, shard['file'])
+                expected = int(np.prod(shape)) * dtype.itemsize
+                if os.path.getsize(filename) != expected:
+                    raise ValueError("{} should have {} bytes, the dataset is corrupted.".format(filename, expected))
+                if expected == 0:
+                    shards.append(np.empty(shape, dtype))
+                else:
+                    shards.append(np.memmap(filename, dtype=dtype, mode='r', shape=shape))
+                ends.append((ends[-1] if ends else 0) + shard['num_records'])
+            arrays.append((shards, ends))
+        self._arrays = arrays
+
+    def __getstate__(self):
+        # pickling a np.memmap copies its data, let every process map the files itself
+        state = self.__dict__.copy()
+        state['_arrays'] = None
+        return state
+
+    def __getitem__(self, item):
+        if self._arrays is None:
+            self._open()
+        if item < 0:
+            item += self.num_records
+        if not 0 <= item < self.num_records:
+            raise IndexError("index {} is out of range for a dataset of {} records.".format(item, self.num_records))
+        sample = []
+        for shards, ends in self._arrays:
+            shard_id = bisect.bisect_right(ends, item)
+            start = ends[shard_id - 1] if shard_id > 0 else 0
+            sample.append(np.asarray(shards[shard_id][item - start]))
+        return tuple(sample)
+
+    def __getitems__(self, items):
+        if self._arrays is None:
+            self._open()
+        requested = np.asarray(items, dtype=np.int64)
+        items = np.where(requested < 0, requested + self.num_records, requested)
+        invalid = (items < 0) | (items >= self.num_records)
+        if invalid.any():
+            raise IndexError(
+                "index {} is out of range for a dataset of {} records.".format(
+                    requested[invalid][0], self.num_records
+                )
+            )
+        batch = []
+        for shards, ends in self._arrays:
+            if len(shards) == 1:
+                batch.append(np.asarray(shards[0][items]))
+                continue
+            shard_ids = np.searchsorted(ends, items, side='right')
+            starts = np.concatenate([[0], ends[:-1]])
+            out = np.empty((len(items), ) + shards[0].shape[1:], shards[0].dtype)
+            for shard_id in np.unique(shard_ids):
+                mask = shard_ids == shard_id
+                out[mask] = shards[shard_id][items[mask] - starts[shard_id]]
+            batch.append(out)
+        return tuple(batch)
+
+    def __len__(self):
+        return self.num_records
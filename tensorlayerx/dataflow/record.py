@@ -0,0 +1,254 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import multiprocessing
+import os
+import pickle
+import struct
+import zlib
+import numpy as np
+from .dataset import IterableDataset
+from .utils import get_worker_info
+
+__all__ = [
+    'ShardedRecordDataset',
+    'write_record_shards',
+]
+
+_INDEX_FILE = 'index.json'
+_FORMAT = 'tensorlayerx-records'
+_VERSION = 1
+_LENGTH = struct.Struct('<Q')
+
+
+def _encode_record(sample):
+    return pickle.dumps(sample, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _decode_record(record):
+    return pickle.loads(record)
+
+
+_writer_state = {}
+
+
+def _init_shard_writer(dataset, encode_fn):
+    _writer_state['dataset'] = dataset
+    _writer_state['encode_fn'] = encode_fn
+
+
+def _write_shard(args):
+    filename, start, end = args
+    dataset, encode_fn = _writer_state['dataset'], _writer_state['encode_fn']
+    crc, nbytes = 0, 0
+    with open(filename, 'wb') as f:
+        for i in range(start, end):
+            record = encode_fn(dataset[i])
+            length = _LENGTH.pack(len(record))
+            f.write(length)
+            f.write(record)
+            crc = zlib.crc32(record, zlib.crc32(length, crc))
+            nbytes += len(length) + len(record)
+    return {'file': os.path.basename(filename), 'num_records': end - start, 'bytes': nbytes, 'crc32': crc}
+
+
+def write_record_shards(dataset, path, records_per_shard=1024, num_processes=None, encode_fn=None):
+    """Convert a map-style dataset into the sharded record format read by :class:`ShardedRecordDataset`.
+
+    Every shard is a file of length-prefixed records: an unsigned 64-bit little-endian length followed by the
+    encoded sample. A JSON index ``index.json`` lists the shards with their number of records, size and CRC32.
+    Shards are written in parallel by a process pool.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        The map-style dataset to convert.
+    path : str
+        The directory the shards are written to, created if it does not exist.
+    records_per_shard : int
+        The number of records in a shard. default is ``1024``.
+    num_processes : int
+        The number of writer processes, ``0`` writes in the calling process. default is ``None``, which uses
+        ``os.cpu_count()``.
+    encode_fn : callable
+        Encodes a sample into ``bytes``, e.g. a compressed image. It should be a module-level function, so that it
+        can be sent to the writer processes. default is ``None``, which pickles the sample.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> import tensorlayerx as tlx
+    >>> X_train, y_train, X_test, y_test = tlx.files.load_cifar10_dataset(shape=(-1, 32, 32, 3))
+    >>> dataset = tlx.dataflow.TensorDataset(X_train, y_train)
+    >>> tlx.dataflow.write_record_shards(dataset, 'data/cifar10_records', records_per_shard=5000)
+
+    """
+    if isinstance(dataset, IterableDataset):
+        raise TypeError("write_record_shards only supports map-style datasets.")
+    if not isinstance(records_per_shard, int) or records_per_shard <= 0:
+        raise ValueError("records_per_shard should be a positive integer, but got {}.".format(records_per_shard))
+    if encode_fn is None:
+        encode_fn = _encode_record
+    if num_processes is None:
+        num_processes = os.cpu_count() or 1
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    num_records = len(dataset)
+    tasks = [
+        (os.path.join(path, 'shard-{:05d}.rec'.format(shard_id)), start, min(start + records_per_shard, num_records))
+        for shard_id, start in enumerate(range(0, num_records, records_per_shard))
+    ]
+    if num_processes == 0 or len(tasks) <= 1:
+        _init_shard_writer(dataset, encode_fn)
+        try:
+            shards = [_write_shard(task) for task in tasks]
+        finally:
+            _writer_state.clear()
+    else:
+        with multiprocessing.Pool(min(num_processes, len(tasks)), _init_shard_writer, (dataset, encode_fn)) as pool:
+            shards = pool.map(_write_shard, tasks)
+
+    index = {'format': _FORMAT, 'version': _VERSION, 'num_records': num_records, 'shards': shards}
+    with open(os.path.join(path, _INDEX_FILE), 'w') as f:
+        json.dump(index, f, indent=2)
+
+
+class ShardedRecordDataset(IterableDataset):
+    """Streams the records of the shards written by :func:`write_record_shards`.
+
+    Shards are read front to back with large buffered reads, which suits datasets much larger than memory.
+    With a multi-process :class:`DataLoader` the shards are split between the workers by worker id, so every
+    record is read exactly once per epoch.
+
+    Parameters
+    ----------
+    path : str
+        The directory written by :func:`write_record_shards`.
+    shuffle_buffer : int
+        The size of the shuffle buffer. Records are yielded in a random order from a buffer of this many records,
+        ``0`` yields them in file order. default is ``0``.
+    shuffle_shards : bool
+        If ``True``, the order of the shards is shuffled every epoch. default is ``False``.
+    verify_crc : bool
+        If ``True``, the CRC32 of every shard is checked against the index once the shard has been read completely,
+        and an ``IOError`` is raised on mismatch. default is ``False``.
+    decode_fn : callable
+        Decodes the bytes of a record into a sample. default is ``None``, which unpickles the record.
+    transform : callable
+        A function applied to every decoded sample. default is ``None``.
+    read_size : int
+        The size of the read buffer in bytes. default is 16 MB.
+    seed : int
+        The seed of the shuffling. default is ``None``, which draws a random seed when the dataset is created.
+        The shard order depends on the seed and the epoch, the workers of a non-persistent DataLoader should be told
+        the epoch with :meth:`set_epoch` to get a new order every epoch.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> import tensorlayerx as tlx
+    >>> dataset = tlx.dataflow.ShardedRecordDataset('data/cifar10_records', shuffle_buffer=10000, shuffle_shards=True)
+    >>> loader = tlx.dataflow.DataLoader(dataset, batch_size=128, num_workers=4)
+
+    """
+
+    def __init__(
+        self, path, shuffle_buffer=0, shuffle_shards=False, verify_crc=False, decode_fn=None, transform=None,
+        read_size=16 << 20, seed=None
+    ):
+        super(ShardedRecordDataset, self).__init__()
+        with open(os.path.join(path, _INDEX_FILE), 'r') as f:
+            index = json.load(f)
+        if index.get('format') != _FORMAT:
+            raise ValueError("{} is not a record shard index.".format(os.path.join(path, _INDEX_FILE)))
+        if not isinstance(shuffle_buffer, int) or shuffle_buffer < 0:
+            raise ValueError("shuffle_buffer should be a non-negative integer, but got {}.".format(shuffle_buffer))
+        self.path = path
+        self.shards = index['shards']
+        self.num_records = index['num_records']
+        self.shuffle_buffer = shuffle_buffer
+        self.shuffle_shards = shuffle_shards
+        self.verify_crc = verify_crc
+        self.decode_fn = _decode_record if decode_fn is None else decode_fn
+        self.transform = transform
+        self.read_size = read_size
+        self.seed = int(np.random.SeedSequence().entropy % (1 << 63)) if seed is None else seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        """Sets the epoch which seeds the shard order and the shuffle buffer."""
+        self.epoch = epoch
+
+    def _read_shard(self, shard):
+        filename = os.path.join(self.path, shard['file'])
+        crc = 0
+        with open(filename, 'rb', buffering=self.read_size) as f:
+            while True:
+                length = f.read(_LENGTH.size)
+                if not length:
+                    break
+                if len(length) < _LENGTH.size:
+                    raise IOError("{} is truncated.".format(filename))
+                record = f.read(_LENGTH.unpack(length)[0])
+                if len(record) < _LENGTH.unpack(length)[0]:
+                    raise IOError("{} is truncated.".format(filename))
+                if self.verify_crc:
+                    crc = zlib.crc32(record, zlib.crc32(length, crc))
+                yield record
+        if self.verify_crc and crc != shard['crc32']:
+            raise IOError("CRC32 mismatch in {}, the shard is corrupted.".format(filename))
+
+    def _records(self, shards):
+        for shard in shards:
+            for record in self._read_shard(shard):
+                yield shard, record
+
+    def _check_crc(self, shard):
+        # raises the IOError of a corrupted shard
+        for _ in self._read_shard(shard):
+            pass
+
+    def __iter__(self):
+        worker_info = get_worker_info()
+        worker_id, num_workers = (0, 1) if worker_info is None else (worker_info.id, worker_info.num_workers)
+        shards = self.shards
+        if self.shuffle_shards:
+            # every worker draws the same shard order, so the split between the workers stays disjoint
+            rng = np.random.default_rng((self.seed, self.epoch))
+            shards = [shards[i] for i in rng.permutation(len(shards))]
+        records = self._records(shards[worker_id::num_workers])
+        if self.shuffle_buffer > 0:
+            rng = np.random.default_rng((self.seed, self.epoch, worker_id))
+            records = _shuffle(records, self.shuffle_buffer, rng)
+        self.epoch += 1
+        for shard, record in records:
+            try:
+                sample = self.decode_fn(record)
+            except Exception:
+                # the CRC is only known once the whole shard has been read, check it before blaming the decoder
+                if self.verify_crc:
+                    self._check_crc(shard)
+                raise
+            if self.transform is not None:
+                sample = self.transform(sample)
+            yield sample
+
+    def __len__(self):
+        return self.num_records
+
+
+def _shuffle(iterator, buffer_size, rng):
+    buffer = []
+    for item in iterator:
+        if len(buffer) < buffer_size:
+            buffer.append(item)
+            continue
+        i = rng.integers(buffer_size)
+        yield buffer[i]
+        buffer[i] = item
+    for i in rng.permutation(len(buffer)):
+        yield buffer[i]
@@ -1,6 +1,8 @@
 #! /usr/bin/python
 # -*- coding: utf-8 -*-
 
+import itertools
+import os
 import numpy as np
 
 __all__ = [
@@ -10,15 +12,26 @@ __all__ = [
     'SequentialSampler',
     'WeightedRandomSampler',
     'SubsetRandomSampler',
+    'BucketBatchSampler',
+    'DistributedSampler',
 ]
 
 
+def _random_seed():
+    return int(np.random.SeedSequence().entropy % (1 << 63))
+
+
 class Sampler(object):
     """Base class for all Samplers.
     All subclasses should implement following methods:
     :code:`__iter__`: providing a way to iterate over indices of dataset element
     :code:`__len__`: the length of the returned iterators.
 
+    The samplers of TensorLayerX derive their order from a ``seed`` and the epoch, which advances every time the
+    sampler is iterated, and record how many indices of the current epoch have been drawn. :meth:`state_dict` and
+    :meth:`load_state_dict` save and restore this position, so a restarted job resumes in the middle of an epoch
+    without replaying it.
+
     Examples
     --------
     With TensorLayerx
@@ -40,6 +53,50 @@ class Sampler(object):
     def __iter__(self):
         raise NotImplementedError
 
+    def set_epoch(self, epoch):
+        """Sets the epoch of the next iteration, which seeds the order of random samplers."""
+        self.epoch = epoch
+
+    def state_dict(self):
+        """Returns the ``epoch``, the number of indices of it already drawn ``position`` and the ``seed`` of the
+        sampler."""
+        progress = getattr(self, '_progress', None)
+        if progress is None:
+            return self._make_state(getattr(self, 'epoch', 0), 0)
+        return self._make_state(*progress)
+
+    def load_state_dict(self, state_dict):
+        """Restores a state returned by :meth:`state_dict`. The next iteration replays the order of the saved epoch
+        and skips the indices drawn before the state was saved."""
+        self.epoch = state_dict['epoch']
+        if 'seed' in state_dict:
+            self.seed = state_dict['seed']
+        self._resume_position = state_dict['position']
+        self._progress = None
+
+    def _make_state(self, epoch, position):
+        if position > 0 and position >= len(self):
+            epoch, position = epoch + 1, 0
+        state = {'epoch': epoch, 'position': position}
+        if getattr(self, 'seed', None) is not None:
+            state['seed'] = self.seed
+        return state
+
+    def _begin_epoch(self):
+        epoch = getattr(self, 'epoch', 0)
+        start = getattr(self, '_resume_position', 0)
+        self.epoch = epoch + 1
+        self._resume_position = 0
+        self._progress = [epoch, start]
+        self._epoch_start = start
+        return epoch, start
+
+    def _iterate(self, indices, start):
+        progress = self._progress
+        for index in indices[start:]:
+            progress[1] += 1
+            yield index
+
 
 class BatchSampler(Sampler):
     """Wraps another sampler to yield a mini-batch of indices.
@@ -75,14 +132,54 @@ class BatchSampler(Sampler):
         self.batch_size = batch_size
         self.drop_last = drop_last
 
+    def set_epoch(self, epoch):
+        if hasattr(self.sampler, 'set_epoch'):
+            self.sampler.set_epoch(epoch)
+
+    def state_dict(self):
+        if getattr(self, '_progress', None) is not None:
+            state = self._make_state(*self._progress)
+        elif hasattr(self.sampler, 'state_dict'):
+            state = dict(self.sampler.state_dict(), position=0)
+        else:
+            state = {'epoch': 0, 'position': 0}
+        if getattr(self.sampler, 'seed', None) is not None:
+            state['seed'] = self.sampler.seed
+        return state
+
+    def load_state_dict(self, state_dict):
+        # the position counts batches, the wrapped sampler skips the indices of these batches
+        skipped = state_dict['position'] * self.batch_size
+        if hasattr(self.sampler, 'load_state_dict'):
+            self.sampler.load_state_dict(dict(state_dict, position=skipped))
+            skipped = 0
+        self._skipped_indices = skipped
+        self._resume_position = state_dict['position']
+        self._progress = None
+
     def __iter__(self):
+        sampler_iter = iter(self.sampler)
+        progress = getattr(self.sampler, '_progress', None)
+        epoch = progress[0] if progress is not None else getattr(self.sampler, 'epoch', 0)
+        start = getattr(self, '_resume_position', 0)
+        if getattr(self, '_skipped_indices', 0):
+            # the wrapped sampler can not resume by itself, draw and drop the indices of the skipped batches
+            next(itertools.islice(sampler_iter, self._skipped_indices, self._skipped_indices), None)
+        self._resume_position, self._skipped_indices = 0, 0
+        self._progress = [epoch, start]
+        self._epoch_start = start
+        return self._batches(sampler_iter, self._progress)
+
+    def _batches(self, sampler_iter, progress):
         batch_idxs = []
-        for index in self.sampler:
+        for index in sampler_iter:
             batch_idxs.append(index)
             if len(batch_idxs) == self.batch_size:
+                progress[1] += 1
                 yield batch_idxs
                 batch_idxs = []
         if len(batch_idxs) > 0 and not self.drop_last:
+            progress[1] += 1
             yield batch_idxs
 
     def __len__(self):
@@ -106,7 +203,11 @@ class RandomSampler(Sampler):
     num_samples : int
         number of samples to draw, default=`len(dataset)`. This argument is supposed to be specified only when `replacement` is ``True``.
     generator : Generator
-        Generator used in sampling. Default is None.
+        Generator used in sampling. Default is None. The indices drawn from a generator can not be replayed, so a
+        sampler with a generator does not resume in the middle of an epoch.
+    seed : int
+        The seed of the shuffling, the order of every epoch is drawn from the seed and the epoch. default is ``None``,
+        which draws a random seed when the sampler is created.
 
     Examples
     --------
@@ -128,12 +229,14 @@ class RandomSampler(Sampler):
 
     """
 
-    def __init__(self, data, replacement=False, num_samples=None, generator=None):
+    def __init__(self, data, replacement=False, num_samples=None, generator=None, seed=None):
         super(RandomSampler, self).__init__()
         self.data = data
         self.replacement = replacement
         self._num_samples = num_samples
         self.generator = generator
+        self.seed = _random_seed() if seed is None else seed
+        self.epoch = 0
 
         if not isinstance(self.replacement, bool):
             raise TypeError("replacement should be a boolean value, but got " "replacement={}".format(self.replacement))
@@ -155,21 +258,24 @@ class RandomSampler(Sampler):
 
     def __iter__(self):
         n = len(self.data)
-        if self.generator is None:
-            generator = np.random.default_rng()
-            if self.replacement:
-                for index in generator.choice(np.arange(n), self.num_samples, replace=True).tolist():
-                    yield index
-            else:
-                for index in generator.choice(np.arange(n), n, replace=False).tolist():
-                    yield index
+        epoch, start = self._begin_epoch()
+        if self.generator is not None:
+            return self._draw_from_generator(self._progress)
+        generator = np.random.default_rng((self.seed, epoch))
+        if self.replacement:
+            indices = generator.integers(0, n, self.num_samples)
         else:
-            for i in range(self.num_samples):
-                try:
-                    index = next(self.generator)
-                except StopIteration:
-                    return
-                yield index
+            indices = generator.permutation(n)
+        return self._iterate(indices.tolist(), start)
+
+    def _draw_from_generator(self, progress):
+        for i in range(self.num_samples):
+            try:
+                index = next(self.generator)
+            except StopIteration:
+                return
+            progress[1] += 1
+            yield index
 
     def __len__(self):
         return self.num_samples
@@ -208,7 +314,8 @@ class SequentialSampler(Sampler):
         self.data = data
 
     def __iter__(self):
-        return iter(range(len(self.data)))
+        _, start = self._begin_epoch()
+        return self._iterate(range(len(self.data)), start)
 
     def __len__(self):
         return len(self.data)
@@ -226,6 +333,8 @@ class WeightedRandomSampler(Sampler):
     replacement : bool
         if ``True``, samples are drawn with replacement.
         If not, they are drawn without replacement, which means that when a sample index is drawn for a row, it cannot be drawn again for that row.
+    seed : int
+        The seed of the sampling. default is ``None``, which draws a random seed when the sampler is created.
 
     Examples
     --------
@@ -240,11 +349,11 @@ class WeightedRandomSampler(Sampler):
 
     """
 
-    def __init__(self, weights, num_samples, replacement=True):
+    def __init__(self, weights, num_samples, replacement=True, seed=None):
         super(WeightedRandomSampler, self).__init__()
         if not isinstance(weights, (list, tuple, np.ndarray)):
             raise ValueError("weights should be a list, tuple or numpy.ndarray, but got {}.".format(type(weights)))
-        weights = np.asarray(weights, np.float)
+        weights = np.asarray(weights, np.float64)
         assert len(weights.shape) == 1, "weights should be a 1-D array"
         if np.any(weights < 0.0):
             raise ValueError("weights should be positive value.")
@@ -258,10 +367,14 @@ class WeightedRandomSampler(Sampler):
         self.weights = weights / weights.sum()
         self.num_samples = num_samples
         self.replacement = replacement
+        self.seed = _random_seed() if seed is None else seed
+        self.epoch = 0
 
     def __iter__(self):
-        index = np.random.choice(len(self.weights), self.num_samples, self.replacement, self.weights)
-        return iter(index.tolist())
+        epoch, start = self._begin_epoch()
+        generator = np.random.default_rng((self.seed, epoch))
+        index = generator.choice(len(self.weights), self.num_samples, self.replacement, self.weights)
+        return self._iterate(index.tolist(), start)
 
     def __len__(self):
         return self.num_samples
@@ -274,15 +387,240 @@ class SubsetRandomSampler(Sampler):
     ----------
     indices : list or tuple
         sequence of indices
+    seed : int
+        The seed of the shuffling. default is ``None``, which draws a random seed when the sampler is created.
 
     """
 
-    def __init__(self, indices):
+    def __init__(self, indices, seed=None):
         super(SubsetRandomSampler, self).__init__()
         self.indices = indices
+        self.seed = _random_seed() if seed is None else seed
+        self.epoch = 0
 
     def __iter__(self):
-        return (self.indices[i] for i in np.random.permutation(len(self.indices)))
+        epoch, start = self._begin_epoch()
+        order = np.random.default_rng((self.seed, epoch)).permutation(len(self.indices))
+        return self._iterate([self.indices[i] for i in order], start)
 
     def __len__(self):
         return len(self.indices)
+
+
+class BucketBatchSampler(Sampler):
+    """Yields mini-batches of indices of samples with similar lengths, to reduce the padding of variable-length
+    sequences.
+
+    Samples are grouped into buckets by their length. Every epoch the indices are shuffled within their bucket,
+    cut into batches, and the batches of all buckets are shuffled together. Batches hold either a fixed number of
+    samples, or as many samples as fit into ``max_tokens`` once padded to the longest sample of the batch.
+    :attr:`padding_ratio` reports the fraction of padding in the batches of the current epoch.
+
+    Parameters
+    ----------
+    lengths : list, tuple or numpy.ndarray
+        The length of every sample of the dataset.
+    batch_size : int
+        The maximum number of samples in a batch. default is ``None``, only allowed together with ``max_tokens``.
+    max_tokens : int
+        The maximum number of tokens in a batch after padding, i.e. batch size times the longest length.
+        A sample longer than ``max_tokens`` forms a batch on its own. default is ``None``.
+    bucket_boundaries : list or tuple
+        Increasing lengths which separate the buckets. default is ``None``, which splits the lengths into
+        ``num_buckets`` quantiles.
+    num_buckets : int
+        The number of buckets if ``bucket_boundaries`` is not given. default is ``10``.
+    shuffle : bool
+        If ``False``, indices are kept in length order and batches in bucket order. default is ``True``.
+    drop_last : bool
+        If ``True``, the last incomplete batch of every bucket is dropped. Only used with ``batch_size`` and without
+        ``max_tokens``. default is ``False``.
+    seed : int
+        The seed of the shuffling. default is ``None``, which draws a random seed when the sampler is created.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> import numpy as np
+    >>> from tensorlayerx.dataflow import BucketBatchSampler, DataLoader
+    >>> lengths = np.array([len(s) for s in sequences])
+    >>> sampler = BucketBatchSampler(lengths, max_tokens=4096, num_buckets=16)
+    >>> loader = DataLoader(dataset, batch_sampler=sampler, collate_fn=pad_collate)
+    >>> for batch in loader:
+    >>>     pass
+    >>> print(sampler.padding_ratio)
+
+    """
+
+    def __init__(
+        self, lengths, batch_size=None, max_tokens=None, bucket_boundaries=None, num_buckets=10, shuffle=True,
+        drop_last=False, seed=None
+    ):
+        super(BucketBatchSampler, self).__init__()
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        if self.lengths.ndim != 1:
+            raise ValueError("lengths should be a 1-D array.")
+        if batch_size is None and max_tokens is None:
+            raise ValueError("at least one of batch_size and max_tokens should be specified.")
+        if batch_size is not None and (not isinstance(batch_size, int) or batch_size <= 0):
+            raise ValueError("batch_size should be a positive integer value, but got {}.".format(batch_size))
+        if max_tokens is not None and (not isinstance(max_tokens, int) or max_tokens <= 0):
+            raise ValueError("max_tokens should be a positive integer value, but got {}.".format(max_tokens))
+        if bucket_boundaries is None:
+            if not isinstance(num_buckets, int) or num_buckets <= 0:
+                raise ValueError("num_buckets should be a positive integer value, but got {}.".format(num_buckets))
+            quantiles = np.linspace(0, 1, num_buckets + 1)[1:-1]
+            bucket_boundaries = np.unique(np.quantile(self.lengths, quantiles)) if len(self.lengths) else []
+        self.bucket_boundaries = np.asarray(bucket_boundaries)
+        if np.any(np.diff(self.bucket_boundaries) <= 0):
+            raise ValueError("bucket_boundaries should be increasing.")
+        self.buckets = np.digitize(self.lengths, self.bucket_boundaries, right=True)
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = _random_seed() if seed is None else seed
+        self.epoch = 0
+        self.padding_ratio = None
+        self._planned = None
+
+    def _token_batches(self, indices):
+        batches = []
+        start, longest = 0, 0
+        for i, length in enumerate(self.lengths[indices].tolist()):
+            longest_with_sample = max(longest, length)
+            size = i - start + 1
+            if i > start and (
+                longest_with_sample * size > self.max_tokens or (self.batch_size is not None and size > self.batch_size)
+            ):
+                batches.append(indices[start:i])
+                start, longest_with_sample = i, length
+            longest = longest_with_sample
+        if start < len(indices):
+            batches.append(indices[start:])
+        return batches
+
+    def _make_batches(self, epoch):
+        generator = np.random.default_rng((self.seed, epoch))
+        if self.shuffle:
+            indices = generator.permutation(len(self.lengths))
+            indices = indices[np.argsort(self.buckets[indices], kind='stable')]
+        else:
+            indices = np.lexsort((self.lengths, self.buckets))
+        bucket_ends = np.cumsum(np.bincount(self.buckets[indices], minlength=len(self.bucket_boundaries) + 1))
+        batches = []
+        for bucket in np.split(indices, bucket_ends[:-1]):
+            if len(bucket) == 0:
+                continue
+            if self.max_tokens is not None:
+                batches.extend(self._token_batches(bucket))
+                continue
+            num_full = len(bucket) // self.batch_size
+            batches.extend(np.split(bucket[:num_full * self.batch_size], num_full) if num_full else [])
+            if len(bucket) > num_full * self.batch_size and not self.drop_last:
+                batches.append(bucket[num_full * self.batch_size:])
+        if self.shuffle:
+            batches = [batches[i] for i in generator.permutation(len(batches))]
+
+        if len(batches):
+            sizes = np.array([len(batch) for batch in batches])
+            longest = np.maximum.reduceat(self.lengths[np.concatenate(batches)], np.cumsum(sizes) - sizes)
+            padded = np.sum(longest * sizes)
+            self.padding_ratio = float(1 - self.lengths[np.concatenate(batches)].sum() / max(padded, 1))
+        return batches
+
+    def _epoch_batches(self, epoch):
+        # __len__ may already have drawn the batches of this epoch
+        if self._planned is None or self._planned[0] != epoch:
+            self._planned = (epoch, self._make_batches(epoch))
+        return self._planned[1]
+
+    def __iter__(self):
+        epoch, start = self._begin_epoch()
+        return (batch.tolist() for batch in self._iterate(self._epoch_batches(epoch), start))
+
+    def __len__(self):
+        progress = getattr(self, '_progress', None)
+        return len(self._epoch_batches(self.epoch if progress is None else progress[0]))
+
+
+class DistributedSampler(Sampler):
+    """Restricts the samples to the part of the dataset of one process of a distributed job.
+
+    Every epoch the indices are shuffled with the same seed in all processes and split by rank, so the processes
+    draw disjoint parts of the dataset. The dataset is padded by repeating indices from its start, or truncated if
+    ``drop_last`` is ``True``, so that every process draws the same number of samples. All processes should call
+    :meth:`set_epoch` with the same epoch, or iterate the sampler the same number of times.
+
+    Parameters
+    ----------
+    data : Dataset
+        dataset to sample
+    num_replicas : int
+        The number of processes of the job. default is ``None``, which reads the environment variable
+        ``WORLD_SIZE``, or ``1`` if it is not set.
+    rank : int
+        The rank of the current process in ``[0, num_replicas)``. default is ``None``, which reads the environment
+        variable ``RANK``, or ``0`` if it is not set.
+    shuffle : bool
+        If ``True``, the indices are shuffled every epoch. default is ``True``.
+    seed : int
+        The seed of the shuffling, it must be the same in all processes. default is ``0``.
+    drop_last : bool
+        If ``True``, the tail of the dataset is dropped instead of padded to a multiple of ``num_replicas``.
+        default is ``False``.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> from tensorlayerx.dataflow import DataLoader, DistributedSampler
+    >>> sampler = DistributedSampler(dataset, num_replicas=4, rank=rank)
+    >>> loader = DataLoader(dataset, batch_size=32, sampler=sampler)
+    >>> for epoch in range(n_epoch):
+    >>>     sampler.set_epoch(epoch)
+    >>>     for X_batch, y_batch in loader:
+    >>>         pass
+
+    """
+
+    def __init__(self, data, num_replicas=None, rank=None, shuffle=True, seed=0, drop_last=False):
+        super(DistributedSampler, self).__init__()
+        if num_replicas is None:
+            num_replicas = int(os.environ.get('WORLD_SIZE', 1))
+        if rank is None:
+            rank = int(os.environ.get('RANK', 0))
+        if not isinstance(num_replicas, int) or num_replicas <= 0:
+            raise ValueError("num_replicas should be a positive integer value, but got {}.".format(num_replicas))
+        if not isinstance(rank, int) or not 0 <= rank < num_replicas:
+            raise ValueError("rank should be in the interval [0, {}), but got {}.".format(num_replicas, rank))
+        self.data = data
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+
+    @property
+    def num_samples(self):
+        if self.drop_last:
+            return len(self.data) // self.num_replicas
+        return -(-len(self.data) // self.num_replicas)
+
+    def __iter__(self):
+        epoch, start = self._begin_epoch()
+        n = len(self.data)
+        if self.shuffle:
+            indices = np.random.default_rng((self.seed, epoch)).permutation(n)
+        else:
+            indices = np.arange(n)
+        total_size = self.num_samples * self.num_replicas
+        if total_size > n:
+            indices = np.resize(indices, total_size)
+        indices = indices[self.rank:total_size:self.num_replicas]
+        return self._iterate(indices.tolist(), start)
+
+    def __len__(self):
+        return self.num_samples
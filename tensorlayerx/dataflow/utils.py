@@ -3,6 +3,7 @@
 import os
 from tensorlayerx.backend import BACKEND
 from .sampler import Sampler
+from .dataset import _has_getitems
 import collections
 import numpy as np
 import numbers
@@ -12,6 +13,8 @@ import queue
 from collections import namedtuple
 from dataclasses import dataclass
 import sys
+import threading
+import time
 import traceback
 
 def default_convert(data):
@@ -22,9 +25,7 @@ def default_convert(data):
             data = tf.convert_to_tensor(data)
         elif BACKEND == 'torch':
             import torch
-            device = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
             data = torch.as_tensor(data)
-            data = data.to(device)
         elif BACKEND == 'paddle':
             import paddle
             data = paddle.to_tensor(data)
@@ -186,6 +187,249 @@ def default_collate(batch):
         return default_collate_ms(batch)
 
 
+def default_collate_numpy(batch):
+    data = batch[0]
+    data_type = type(data)
+    if isinstance(data, np.ndarray):
+        return np.stack(batch, axis=0)
+    elif isinstance(data, (numbers.Number, np.generic)):
+        return np.asarray(batch)
+    elif isinstance(data, (str, bytes)):
+        return batch
+    elif isinstance(data, collections.abc.Mapping):
+        return {key: default_collate_numpy([d[key] for d in batch]) for key in data}
+    elif isinstance(data, tuple) and hasattr(data, '_fields'):
+        return data_type(*(default_collate_numpy(samples) for samples in zip(*batch)))
+    elif isinstance(data, collections.abc.Sequence):
+        data_size = len(data)
+        if not all(len(data) == data_size for data in iter(batch)):
+            raise RuntimeError("each data in list of batch should be of equal size.")
+        return [default_collate_numpy(datas) for datas in zip(*batch)]
+
+    raise TypeError(
+        "batch data con only contains:numpy.ndarray, "
+        "dict, list, number, tuple, but got {}".format(type(data))
+    )
+
+
+def _identity(data):
+    return data
+
+
+def _split_collate_fn(collate_fn):
+    """Split ``collate_fn`` into the part run by workers and the part run by the main process.
+
+    The default collate functions create backend tensors, which can not be placed into shared memory,
+    so workers collate into NumPy arrays and the main process converts them afterwards.
+    User defined collate functions are run entirely by the workers.
+    """
+    if collate_fn is default_collate:
+        return default_collate_numpy, default_convert
+    elif collate_fn is default_convert:
+        return _identity, default_convert
+    return collate_fn, _identity
+
+
+def _map_structure(fn, data):
+    if isinstance(data, collections.abc.Mapping):
+        return {key: _map_structure(fn, data[key]) for key in data}
+    elif isinstance(data, tuple) and hasattr(data, "_fields"):
+        return type(data)(*(_map_structure(fn, d) for d in data))
+    elif isinstance(data, collections.abc.Sequence) and not isinstance(data, (str, bytes)):
+        return [_map_structure(fn, d) for d in data]
+    return fn(data)
+
+
+def _parse_device(device):
+    if device is None:
+        return None, 0
+    device = device.upper().split(':')
+    if device[0] not in ('CPU', 'GPU'):
+        raise ValueError("device should be 'CPU', 'GPU' or 'GPU:<id>', but got {}.".format(':'.join(device)))
+    return device[0], int(device[1]) if len(device) > 1 else 0
+
+
+class _DeviceConverter(object):
+    """Converts the NumPy arrays of a batch into backend tensors placed on ``device``.
+
+    With the torch backend and a CUDA device, arrays are staged in pinned host memory when ``pin_memory`` is set
+    and uploaded with non-blocking copies on a side stream, :meth:`wait` makes the current stream wait for them.
+    Without an accelerator it only converts the arrays, so the prefetch thread degrades to a CPU prefetcher.
+    """
+
+    def __init__(self, device=None, pin_memory=False):
+        self.device_type, self.device_id = _parse_device(device)
+        self.pin_memory = False
+        self.stream = None
+        if BACKEND == 'torch':
+            import torch
+            self.device = None
+            if self.device_type == 'GPU' and torch.cuda.is_available():
+                self.device = torch.device('cuda', self.device_id)
+                self.pin_memory = pin_memory
+                self.stream = torch.cuda.Stream(device=self.device)
+            elif self.device_type is not None:
+                self.device = torch.device('cpu')
+        elif BACKEND == 'paddle':
+            import paddle
+            self.device = None
+            if self.device_type == 'GPU' and paddle.is_compiled_with_cuda():
+                self.device = paddle.CUDAPlace(self.device_id)
+                self.pin_memory = pin_memory
+            elif self.device_type is not None:
+                self.device = paddle.CPUPlace()
+        elif BACKEND == 'tensorflow':
+            self.device = None if self.device_type is None else '/{}:{}'.format(self.device_type, self.device_id)
+        else:
+            self.device = None
+
+    def _convert_torch(self, data):
+        import torch
+        if isinstance(data, np.ndarray) and not data.dtype.hasobject:
+            data = torch.as_tensor(data)
+        if isinstance(data, torch.Tensor) and self.device is not None and data.device != self.device:
+            if self.pin_memory:
+                data = data.pin_memory()
+            data = data.to(self.device, non_blocking=self.pin_memory)
+        return data
+
+    def _convert_tf(self, data):
+        import tensorflow as tf
+        if (isinstance(data, np.ndarray) and not data.dtype.hasobject) or isinstance(data, tf.Tensor):
+            if self.device is None:
+                return tf.convert_to_tensor(data)
+            with tf.device(self.device):
+                return tf.identity(data)
+        return data
+
+    def _convert_paddle(self, data):
+        import paddle
+        if isinstance(data, np.ndarray) and not data.dtype.hasobject:
+            if self.pin_memory:
+                return paddle.to_tensor(data, place=paddle.CUDAPinnedPlace()).cuda(self.device_id, blocking=False)
+            return paddle.to_tensor(data, place=self.device)
+        if isinstance(data, paddle.Tensor) and self.device is not None:
+            return paddle.to_tensor(data, place=self.device)
+        return data
+
+    def _convert_ms(self, data):
+        import mindspore as ms
+        if isinstance(data, np.ndarray) and not data.dtype.hasobject:
+            return ms.Tensor(data)
+        return data
+
+    def __call__(self, data):
+        """Convert ``data``, returns the converted batch and an event to wait for, or ``None``."""
+        if BACKEND == 'torch':
+            if self.stream is None:
+                return _map_structure(self._convert_torch, data), None
+            import torch
+            with torch.cuda.stream(self.stream):
+                data = _map_structure(self._convert_torch, data)
+                event = torch.cuda.Event()
+                event.record(self.stream)
+            return data, event
+        elif BACKEND == 'tensorflow':
+            return _map_structure(self._convert_tf, data), None
+        elif BACKEND == 'paddle':
+            return _map_structure(self._convert_paddle, data), None
+        elif BACKEND == 'mindspore':
+            return _map_structure(self._convert_ms, data), None
+
+    def wait(self, data, event):
+        if event is None:
+            return data
+        import torch
+        current_stream = torch.cuda.current_stream(self.device)
+        current_stream.wait_event(event)
+
+        def record_stream(tensor):
+            # the memory was allocated on the side stream, keep it alive until the consumer is done with it
+            if isinstance(tensor, torch.Tensor) and tensor.is_cuda:
+                tensor.record_stream(current_stream)
+            return tensor
+
+        return _map_structure(record_stream, data)
+
+
+_PrefetchEnd = namedtuple('_PrefetchEnd', [])
+
+
+def _prefetch_put(data_queue, stop_event, item):
+    while not stop_event.is_set():
+        try:
+            data_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _prefetch_loop(iterator, converter, data_queue, stop_event):
+    # the thread must not hold the ``_PrefetchDataLoaderIter``, otherwise it is never collected when the consumer
+    # stops early and its ``__del__`` can not stop the thread and the workers
+    try:
+        for data in iterator:
+            if not _prefetch_put(data_queue, stop_event, converter(data)):
+                return
+    except Exception:
+        _prefetch_put(data_queue, stop_event, ExceptionWrapper(where="in DataLoader prefetch thread"))
+        return
+    _prefetch_put(data_queue, stop_event, _PrefetchEnd())
+
+
+class _PrefetchDataLoaderIter(object):
+    """Runs a DataLoader iterator on a background thread.
+
+    The thread converts every batch with a :class:`_DeviceConverter` and keeps up to ``buffer_size`` of them ready,
+    so that loading, conversion and host to device copies of the next batches overlap with the current step.
+    """
+
+    def __init__(self, iterator, converter, buffer_size):
+        self._iterator = iterator
+        self._converter = converter
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._stop_event = threading.Event()
+        self._finished = False
+        self._num_yielded = 0
+        self._thread = threading.Thread(
+            target=_prefetch_loop, args=(iterator, converter, self._queue, self._stop_event), daemon=True
+        )
+        self._thread.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        item = self._queue.get()
+        if isinstance(item, _PrefetchEnd):
+            self._finished = True
+            self._thread.join()
+            raise StopIteration
+        if isinstance(item, ExceptionWrapper):
+            self._finished = True
+            item.reraise()
+        self._num_yielded += 1
+        return self._converter.wait(*item)
+
+    def __len__(self):
+        return len(self._iterator)
+
+    def close(self):
+        self._stop_event.set()
+        self._finished = True
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def __del__(self):
+        self.close()
+
+
 class _DatasetKind(object):
 
     Map = 0
@@ -215,8 +459,18 @@ class _MapDatasetFetcher(_BaseDatasetFetcher):
 
     def __init__(self, dataset, is_batch, collate_fn, drop_last):
         super(_MapDatasetFetcher, self).__init__(dataset, is_batch, collate_fn, drop_last)
+        # ``__getitems__`` returns a batch which is already stacked, so it can only replace the default collate
+        # functions, whose remaining work is converting the arrays.
+        self.batch_convert_fn = None
+        if is_batch and _has_getitems(dataset):
+            if collate_fn is default_collate:
+                self.batch_convert_fn = default_convert
+            elif collate_fn is default_collate_numpy:
+                self.batch_convert_fn = _identity
 
     def fetch(self, batch_indices):
+        if self.batch_convert_fn is not None:
+            return self.batch_convert_fn(self.dataset.__getitems__(batch_indices))
         if self.is_batch:
             data = [self.dataset[id] for id in batch_indices]
         else:
@@ -266,6 +520,12 @@ class _BaseDataLoaderIter(object):
         self._num_workers = loader.num_workers
         self._prefetch_factor = loader.prefetch_factor
         self._collate_fn = loader.collate_fn
+        self._convert_fn = None
+        if loader.use_shared_memory or loader.prefetch_batches > 0:
+            self._collate_fn, self._convert_fn = _split_collate_fn(loader.collate_fn)
+        if self._convert_fn is _identity or loader.prefetch_batches > 0:
+            # the prefetch thread converts the NumPy batches itself
+            self._convert_fn = None
         self._persistent_workers = loader.persistent_workers
         self._time_out = loader.time_out
         self._sampler_iter = iter(self._index_sampler)
@@ -275,7 +535,9 @@ class _BaseDataLoaderIter(object):
         return self
 
     def _reset(self, loader, first_iter=False):
-        self._sampler_iter = iter(self._index_sampler)
+        # iterating a sampler starts its next epoch, the first one was started by __init__
+        if not first_iter:
+            self._sampler_iter = iter(self._index_sampler)
         self._num_yielded = 0
 
     def _next_index(self):
@@ -321,6 +583,19 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
         assert self._prefetch_factor > 0
         self._shutdown = False
         self._worker_init_fn = loader.worker_init_fn
+        self._use_shared_memory = loader.use_shared_memory
+        self._transport_stats = loader._transport_stats
+        self._worker_dispatch = loader.worker_dispatch
+        self._in_order = loader.in_order
+        self._worker_stats = loader._worker_stats
+        if self._use_shared_memory:
+            self._shared_memory_flags = [
+                multiprocessing.RawArray('b', self._prefetch_factor + 1) for _ in range(self._num_workers)
+            ]
+            self._shared_memory_reader = _SharedMemoryReader(self._shared_memory_flags)
+        else:
+            self._shared_memory_flags = [None] * self._num_workers
+            self._shared_memory_reader = None
         self._worker_queue_idx_cycle = itertools.cycle(range(self._num_workers))
         self._worker_result_queue = multiprocessing.Queue()
         self._worker_done_event = multiprocessing.Event()
@@ -335,7 +610,8 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
             w = multiprocessing.Process(
                 target=_worker_loop, args=(
                     self._dataset_kind, self._dataset, index_queue, self._worker_result_queue, self._worker_done_event,
-                    self._is_batch, self._collate_fn, self._worker_init_fn, i, self._drop_last
+                    self._is_batch, self._collate_fn, self._worker_init_fn, i, self._drop_last, self._num_workers,
+                    self._shared_memory_flags[i]
                 )
             )
             w.daemon = True
@@ -351,7 +627,9 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
         self._send_idx = 0
         self._rcvd_idx = 0
         self._task_info = {}
+        self._task_send_time = {}
         self._tasks_outstanding = 0
+        self._worker_stats.reset_outstanding()
         self._workers_status = [True for i in range(self._num_workers)]
         if not first_iter:
             for idx in range(self._num_workers):
@@ -362,6 +640,8 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                 if isinstance(return_idx, _ResumeIteration):
                     assert return_data is None
                     resume_iteration_cnt -= 1
+                elif isinstance(return_data, _SharedMemoryBatch):
+                    self._shared_memory_reader.release(return_data)
         for _ in range(self._prefetch_factor * self._num_workers):
 
             self._try_put_index()
@@ -413,19 +693,53 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
         except StopIteration:
             return
 
-        for _ in range(self._num_workers):
-            worker_queue_idx = next(self._worker_queue_idx_cycle)
-            if self._workers_status[worker_queue_idx]:
-                break
-        else:
+        worker_queue_idx = self._next_worker()
+        if worker_queue_idx is None:
             return
 
         self._index_queues[worker_queue_idx].put((self._send_idx, index))
         self._task_info[self._send_idx] = (worker_queue_idx, )
+        self._task_send_time[self._send_idx] = time.perf_counter()
+        self._worker_stats.dispatch(worker_queue_idx)
         self._tasks_outstanding += 1
         self._send_idx += 1
 
+    def _next_worker(self):
+        if self._worker_dispatch == 'least_loaded':
+            # start the search at the next worker in turn, so that ties are still broken round-robin
+            start = next(self._worker_queue_idx_cycle)
+            outstanding = self._worker_stats.outstanding
+            worker_queue_idx = None
+            for i in range(self._num_workers):
+                worker_id = (start + i) % self._num_workers
+                if self._workers_status[worker_id] and (
+                    worker_queue_idx is None or outstanding[worker_id] < outstanding[worker_queue_idx]
+                ):
+                    worker_queue_idx = worker_id
+            return worker_queue_idx
+
+        for _ in range(self._num_workers):
+            worker_queue_idx = next(self._worker_queue_idx_cycle)
+            if self._workers_status[worker_queue_idx]:
+                return worker_queue_idx
+        return None
+
+    def _record_received(self, idx):
+        worker_id = self._task_info[idx][0]
+        self._worker_stats.receive(worker_id, time.perf_counter() - self._task_send_time.pop(idx))
+
+    def _drop_worker_tasks(self, worker_id):
+        # a worker which reached the end of its IterableDataset ignores the tasks still queued for it
+        dropped = [idx for idx, info in self._task_info.items() if info[0] == worker_id and len(info) == 1]
+        for idx in dropped:
+            del self._task_info[idx]
+            del self._task_send_time[idx]
+        self._tasks_outstanding -= len(dropped)
+        self._worker_stats.drop(worker_id, len(dropped))
+
     def _next_data(self):
+        if not self._in_order:
+            return self._next_data_unordered()
         while True:
             while self._rcvd_idx < self._send_idx:
                 info = self._task_info[self._rcvd_idx]
@@ -446,6 +760,8 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
             assert not self._shutdown and self._tasks_outstanding > 0
             idx, data = self._get_data()
             self._tasks_outstanding -= 1
+            self._record_received(idx)
+            data = self._receive_data(data)
             if self._dataset_kind == _DatasetKind.Iter:
                 # Check for _IterableDatasetStopIteration
                 if isinstance(data, _IterableDatasetStopIteration):
@@ -462,6 +778,42 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                 del self._task_info[idx]
                 return self._process_data(data)
 
+    def _next_data_unordered(self):
+        # return the batches in the order the workers finish them, a slow batch does not hold back the others
+        while True:
+            if self._tasks_outstanding == 0:
+                if not self._persistent_workers:
+                    self._shutdown_workers()
+                raise StopIteration
+
+            assert not self._shutdown
+            idx, data = self._get_data()
+            self._tasks_outstanding -= 1
+            self._record_received(idx)
+            del self._task_info[idx]
+            data = self._receive_data(data)
+            if isinstance(data, _IterableDatasetStopIteration):
+                if self._persistent_workers:
+                    self._workers_status[data.worker_id] = False
+                else:
+                    self._mark_worker_as_unavailable(data.worker_id)
+                self._drop_worker_tasks(data.worker_id)
+                self._try_put_index()
+                continue
+            return self._process_data(data)
+
+    def _receive_data(self, data):
+        if isinstance(data, (ExceptionWrapper, _IterableDatasetStopIteration)):
+            return data
+        if isinstance(data, _SharedMemoryBatch):
+            self._transport_stats.update(data.nbytes)
+            data = self._shared_memory_reader.read(data)
+        else:
+            self._transport_stats.update()
+        if self._convert_fn is not None:
+            data = self._convert_fn(data)
+        return data
+
     def _process_data(self, data):
         self._rcvd_idx += 1
         self._try_put_index()
@@ -486,6 +838,8 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                 for w in self._workers:
                     if w.is_alive():
                         w.terminate()
+                if self._shared_memory_reader is not None:
+                    self._shared_memory_reader.close()
 
     def __del__(self):
         self._shutdown_workers()
@@ -523,9 +877,272 @@ class _IterableDatasetStopIteration(object):
     worker_id: int
 
 
+@dataclass(frozen=True)
+class WorkerInfo(object):
+    id: int
+    num_workers: int
+    dataset: object
+
+
+_worker_info = None
+
+
+def get_worker_info():
+    """Returns the information of the current DataLoader worker process.
+
+    In a worker process of :class:`DataLoader` it returns a ``WorkerInfo`` holding the worker ``id``, the total
+    ``num_workers`` and the copy of the ``dataset`` owned by this worker, in the main process it returns ``None``.
+    Iterable-style datasets use it to split their data between the workers.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> from tensorlayerx.dataflow import IterableDataset, get_worker_info
+    >>> class MyDataset(IterableDataset):
+    >>>     def __iter__(self):
+    >>>         info = get_worker_info()
+    >>>         worker_id, num_workers = (0, 1) if info is None else (info.id, info.num_workers)
+    >>>         for i in range(worker_id, 100, num_workers):
+    >>>             yield i
+
+    """
+    return _worker_info
+
+
+_SHARED_MEMORY_ALIGNMENT = 64
+
+
+@dataclass(frozen=True)
+class _SharedArray(object):
+    offset: int
+    shape: tuple
+    dtype: str
+
+
+@dataclass(frozen=True)
+class _SharedMemoryBatch(object):
+    worker_id: int
+    slot: int
+    name: str
+    nbytes: int
+    layout: object
+
+
+def _layout_shared_arrays(data, arrays, offset=0):
+    """Replace every NumPy array in ``data`` by a :class:`_SharedArray` placed at an aligned offset of a slab."""
+    if isinstance(data, np.ndarray) and not data.dtype.hasobject:
+        arrays.append((offset, data))
+        end = -(-(offset + data.nbytes) // _SHARED_MEMORY_ALIGNMENT) * _SHARED_MEMORY_ALIGNMENT
+        return _SharedArray(offset, data.shape, data.dtype.str), end
+    elif isinstance(data, collections.abc.Mapping):
+        layout = {}
+        for key in data:
+            layout[key], offset = _layout_shared_arrays(data[key], arrays, offset)
+        return layout, offset
+    elif isinstance(data, (list, tuple)):
+        layout = []
+        for d in data:
+            item, offset = _layout_shared_arrays(d, arrays, offset)
+            layout.append(item)
+        if isinstance(data, tuple) and hasattr(data, '_fields'):
+            return type(data)(*layout), offset
+        return type(data)(layout), offset
+    return data, offset
+
+
+def _read_shared_arrays(layout, buf):
+    """Copy every :class:`_SharedArray` of ``layout`` out of ``buf`` into a private NumPy array."""
+    if isinstance(layout, _SharedArray):
+        return np.array(np.ndarray(layout.shape, np.dtype(layout.dtype), buffer=buf, offset=layout.offset))
+    elif isinstance(layout, collections.abc.Mapping):
+        return {key: _read_shared_arrays(layout[key], buf) for key in layout}
+    elif isinstance(layout, tuple) and hasattr(layout, '_fields'):
+        return type(layout)(*(_read_shared_arrays(d, buf) for d in layout))
+    elif isinstance(layout, (list, tuple)):
+        return type(layout)(_read_shared_arrays(d, buf) for d in layout)
+    return layout
+
+
+def _create_shared_memory(size=0, name=None):
+    """Create or attach a shared memory segment which is not tracked by the resource tracker.
+
+    Before python 3.13 both creating and attaching register the segment with the resource tracker of the calling
+    process. Forked workers may share the tracker of the main process, so the registrations of both sides would
+    collide. The DataLoader unlinks the segments itself, see :func:`_unlink_shared_memory`.
+    """
+    from multiprocessing import shared_memory, resource_tracker
+    create = name is None
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:
+        slab = shared_memory.SharedMemory(name=name, create=create, size=size)
+        resource_tracker.unregister(slab._name, 'shared_memory')
+        return slab
+
+
+def _unlink_shared_memory(slab):
+    try:
+        import _posixshmem
+    except ImportError:
+        # on Windows the segment is freed together with its last handle
+        return
+    try:
+        _posixshmem.shm_unlink(slab._name)
+    except FileNotFoundError:
+        pass
+
+
+class _SharedMemoryWriter(object):
+    """Worker side of the shared memory transport.
+
+    Every worker owns a ring of shared memory slabs which are reused round-robin. ``slot_flags`` is shared with
+    the main process, a slot is set to 1 while its slab holds a batch the main process has not copied out yet.
+    When the next slab is still in use the batch falls back to the pickled transport, so a slow consumer never
+    blocks the worker.
+    """
+
+    def __init__(self, worker_id, slot_flags):
+        self.worker_id = worker_id
+        self.slot_flags = slot_flags
+        self.slabs = [None] * len(slot_flags)
+        self.next_slot = 0
+
+    def write(self, data):
+        arrays = []
+        layout, nbytes = _layout_shared_arrays(data, arrays)
+        slot = self.next_slot
+        if len(arrays) == 0 or self.slot_flags[slot]:
+            return data
+        slab = self.slabs[slot]
+        if slab is None or slab.size < nbytes:
+            if slab is not None:
+                slab.close()
+                _unlink_shared_memory(slab)
+                self.slabs[slot] = None
+            slab = _create_shared_memory(size=max(nbytes, 1))
+            self.slabs[slot] = slab
+        for offset, array in arrays:
+            np.ndarray(array.shape, array.dtype, buffer=slab.buf, offset=offset)[...] = array
+        self.slot_flags[slot] = 1
+        self.next_slot = (slot + 1) % len(self.slabs)
+        return _SharedMemoryBatch(self.worker_id, slot, slab.name, nbytes, layout)
+
+    def close(self):
+        for slab in self.slabs:
+            if slab is not None:
+                slab.close()
+                _unlink_shared_memory(slab)
+        self.slabs = [None] * len(self.slabs)
+
+
+class _SharedMemoryReader(object):
+    """Main process side of the shared memory transport."""
+
+    def __init__(self, slot_flags):
+        self.slot_flags = slot_flags
+        self.slabs = {}
+
+    def read(self, batch):
+        key = (batch.worker_id, batch.slot)
+        slab = self.slabs.get(key)
+        if slab is None or slab.name != batch.name:
+            if slab is not None:
+                slab.close()
+            slab = _create_shared_memory(name=batch.name)
+            self.slabs[key] = slab
+        data = _read_shared_arrays(batch.layout, slab.buf)
+        self.release(batch)
+        return data
+
+    def release(self, batch):
+        self.slot_flags[batch.worker_id][batch.slot] = 0
+
+    def close(self):
+        # unlinking is a no-op for the segments the workers already removed on exit,
+        # but frees the ones of workers which had to be terminated
+        for slab in self.slabs.values():
+            slab.close()
+            _unlink_shared_memory(slab)
+        self.slabs = {}
+
+
+class _WorkerStats(object):
+    """Per worker counters of a multi-process DataLoader.
+
+    ``outstanding`` is the number of index batches sent to a worker whose result has not been received yet,
+    the latency of a task is measured from dispatching its indices to receiving its result in the main process.
+    """
+
+    def __init__(self, num_workers):
+        self.outstanding = [0] * num_workers
+        self.max_outstanding = [0] * num_workers
+        self.batches = [0] * num_workers
+        self.total_latency = [0.0] * num_workers
+        self.max_latency = [0.0] * num_workers
+
+    def dispatch(self, worker_id):
+        self.outstanding[worker_id] += 1
+        self.max_outstanding[worker_id] = max(self.max_outstanding[worker_id], self.outstanding[worker_id])
+
+    def receive(self, worker_id, latency):
+        self.outstanding[worker_id] -= 1
+        self.batches[worker_id] += 1
+        self.total_latency[worker_id] += latency
+        self.max_latency[worker_id] = max(self.max_latency[worker_id], latency)
+
+    def drop(self, worker_id, num_tasks):
+        self.outstanding[worker_id] -= num_tasks
+
+    def reset_outstanding(self):
+        self.outstanding = [0] * len(self.outstanding)
+
+    def as_list(self):
+        return [
+            {
+                'worker_id': i,
+                'outstanding': self.outstanding[i],
+                'max_outstanding': self.max_outstanding[i],
+                'batches': self.batches[i],
+                'mean_latency': self.total_latency[i] / max(self.batches[i], 1),
+                'max_latency': self.max_latency[i],
+            } for i in range(len(self.outstanding))
+        ]
+
+
+class _TransportStats(object):
+    """Counts the batches received from the DataLoader workers and the bytes moved through shared memory."""
+
+    def __init__(self):
+        self.batches = 0
+        self.shared_memory_batches = 0
+        self.shared_memory_bytes = 0
+
+    def update(self, nbytes=None):
+        self.batches += 1
+        if nbytes is not None:
+            self.shared_memory_batches += 1
+            self.shared_memory_bytes += nbytes
+
+    def as_dict(self):
+        return {
+            'batches': self.batches,
+            'shared_memory_batches': self.shared_memory_batches,
+            'pickled_batches': self.batches - self.shared_memory_batches,
+            'shared_memory_bytes': self.shared_memory_bytes,
+            'bytes_per_batch': self.shared_memory_bytes / max(self.shared_memory_batches, 1),
+        }
+
+
 def _worker_loop(
-    dataset_kind, dataset, index_queue, data_queue, done_event, is_batch, collate_fn, init_fn, worker_id, drop_last
+    dataset_kind, dataset, index_queue, data_queue, done_event, is_batch, collate_fn, init_fn, worker_id, drop_last,
+    num_workers, shared_memory_flags=None
 ):
+    global _worker_info
+    _worker_info = WorkerInfo(id=worker_id, num_workers=num_workers, dataset=dataset)
+    shared_memory_writer = None
+    if shared_memory_flags is not None:
+        shared_memory_writer = _SharedMemoryWriter(worker_id, shared_memory_flags)
     try:
         init_exception = None
         try:
@@ -545,7 +1162,7 @@ def _worker_loop(
             except queue.Empty:
                 continue
             if isinstance(r, _ResumeIteration):
-                data_queue.put(r)
+                data_queue.put((r, None))
                 iteration_end = False
                 fetcher = _DatasetKind.create_fetcher(dataset_kind, dataset, is_batch, collate_fn, drop_last)
                 continue
@@ -571,10 +1188,20 @@ def _worker_loop(
                         # See NOTE [ Python Traceback Reference Cycle Problem ]
                         data = ExceptionWrapper(
                             where="in DataLoader worker process {}".format(worker_id))
+                else:
+                    if shared_memory_writer is not None:
+                        try:
+                            data = shared_memory_writer.write(data)
+                        except OSError:
+                            # e.g. /dev/shm is full, send this batch through the queue instead
+                            pass
             data_queue.put((idx, data))
             del data, idx, index, r
     except KeyboardInterrupt:
         pass
+    finally:
+        if shared_memory_writer is not None:
+            shared_memory_writer.close()
     if done_event.is_set():
         data_queue.cancel_join_thread()
         data_queue.close()
@@ -24,6 +24,7 @@ from .dataset_loaders.nietzsche_dataset import *
 # from .dataset_loaders.voc_dataset import *
 # from .dataset_loaders.wmt_en_fr_dataset import *
 from .utils import *
+from .checkpoint import *
 
 __all__ = [
     # Dataset Loaders
@@ -52,12 +53,14 @@ __all__ = [
     'folder_exists',
     'load_and_assign_npz',
     'load_and_assign_npz_dict',
+    'load_and_assign_safetensors',
     'load_ckpt',
     'load_cropped_svhn',
     'load_file_list',
     'load_folder_list',
     'load_npy_to_any',
     'load_npz',
+    'load_safetensors',
     'maybe_download_and_extract',
     'natural_keys',
     'npz_to_W_pdf',
@@ -66,8 +69,13 @@ __all__ = [
     'save_ckpt',
     'save_npz',
     'save_npz_dict',
+    'save_safetensors',
     'load_and_assign_ckpt',
-    'ckpt_to_npz_dict'
+    'ckpt_to_npz_dict',
+
+    # Checkpointing
+    'CheckpointManager',
+    'wait_for_saves',
     #'save_graph',
     #'load_graph',
     #'save_graph_and_params',
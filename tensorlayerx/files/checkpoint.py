@@ -0,0 +1,302 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import numpy as np
+import tensorlayerx as tlx
+from tensorlayerx import logging
+from tensorlayerx.files import utils
+
+__all__ = [
+    'CheckpointManager',
+    'wait_for_saves',
+]
+
+_MANIFEST = re.compile(r'^ckpt-(\d+)\.json$')
+
+
+def _named_weights(network):
+    if tlx.BACKEND == 'torch':
+        return list(network.named_parameters())
+    return [(w.name, w) for w in network.all_weights]
+
+
+def _snapshot(tensors):
+    # np.array copies, the training thread may update the weights while the copy is written
+    return [np.array(tlx.convert_to_numpy(tensor), copy=True) for tensor in tensors]
+
+
+def _atomic_write(file_path, write_fn):
+    # write to a temporary file in the same directory and rename it, a crash never leaves a truncated file
+    directory = os.path.dirname(os.path.abspath(file_path))
+    if not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, '.{}.{}.tmp'.format(os.path.basename(file_path), os.getpid()))
+    try:
+        with open(tmp_path, 'wb') as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_npz(file_path, arrays):
+    # the object array keeps weights of different shapes, which np.asarray can not stack
+    params = np.empty(len(arrays), dtype=object)
+    for i, array in enumerate(arrays):
+        params[i] = array
+    _atomic_write(file_path, lambda f: np.savez(f, params=params))
+    logging.info("[*] Model saved in npz %s" % file_path)
+
+
+def _write_npz_dict(file_path, names, arrays):
+    _atomic_write(file_path, lambda f: np.savez(f, **dict(zip(names, arrays))))
+    logging.info("[*] Model saved in npz_dict %s" % file_path)
+
+
+def _write_safetensors(file_path, names, arrays):
+    _atomic_write(file_path, lambda f: utils._write_safetensors(f, names, arrays))
+    logging.info("[*] Model saved in safetensors %s" % file_path)
+
+
+class _BackgroundWriter(object):
+    """Runs write jobs in order on a daemon thread.
+
+    At most ``max_pending`` jobs wait in the queue, further ``submit`` calls block, which bounds the host memory held
+    by snapshots. The first error of a job is raised by the next ``submit`` or ``wait``.
+    """
+
+    def __init__(self, max_pending=1):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if self._error is None:
+                    job()
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("a background checkpoint write failed.") from error
+
+    def submit(self, job):
+        self._raise_error()
+        self._queue.put(job)
+
+    def wait(self):
+        self._queue.join()
+        self._raise_error()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _background_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _BackgroundWriter()
+            atexit.register(wait_for_saves)
+        return _writer
+
+
+def wait_for_saves():
+    """Blocks until all weights saved with ``async_save=True`` are written, and raises the error of a failed write.
+
+    Pending writes are also completed when the interpreter exits.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> model.save_weights('./model.npz', async_save=True)
+    >>> tlx.files.wait_for_saves()
+
+    """
+    if _writer is not None:
+        _writer.wait()
+
+
+def _hash_array(array):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('{}{}'.format(array.dtype.str, array.shape).encode('utf-8'))
+    digest.update(np.ascontiguousarray(array).view(np.uint8).data)
+    return digest.hexdigest()
+
+
+class CheckpointManager(object):
+    """Saves numbered checkpoints of the weights of a network into a directory, in the background and incrementally.
+
+    Every checkpoint is a manifest ``ckpt-<step>.json`` mapping the names of the weights to the content hash of
+    their values, which are stored once as ``tensors/<hash>.npy``. A weight whose value did not change since an
+    earlier checkpoint, e.g. a frozen backbone or an embedding, is not written again. ``save`` only copies the
+    weights to host memory on the calling thread, hashing and writing happen on a background thread. All files are
+    written to a temporary name and renamed, so an interrupted save never corrupts a checkpoint.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the checkpoints, created if it does not exist.
+    max_to_keep : int
+        The number of most recent checkpoints to keep, older ones and the tensors only they use are deleted.
+        default is ``None``, which keeps all checkpoints.
+    incremental : bool
+        If ``True``, only tensors whose content hash is not in the directory yet are written. If ``False``, every
+        checkpoint rewrites all of its tensors. default is ``True``.
+    async_save : bool
+        If ``True``, checkpoints are written by a background thread, see :meth:`wait`. default is ``True``.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> import tensorlayerx as tlx
+    >>> manager = tlx.files.CheckpointManager('checkpoints', max_to_keep=3)
+    >>> for epoch in range(n_epoch):
+    >>>     train_one_epoch(net)
+    >>>     manager.save(net, step=epoch)
+    >>> manager.wait()
+    >>> manager.restore(net)
+
+    """
+
+    def __init__(self, directory, max_to_keep=None, incremental=True, async_save=True):
+        if max_to_keep is not None and (not isinstance(max_to_keep, int) or max_to_keep <= 0):
+            raise ValueError("max_to_keep should be a positive integer, but got {}.".format(max_to_keep))
+        self.directory = directory
+        self.max_to_keep = max_to_keep
+        self.incremental = incremental
+        self.async_save = async_save
+        self._tensor_dir = os.path.join(directory, 'tensors')
+        if not os.path.exists(self._tensor_dir):
+            os.makedirs(self._tensor_dir, exist_ok=True)
+        # the writer is shared with save_weights(async_save=True), so wait_for_saves also flushes checkpoints
+        self._writer = _background_writer() if async_save else None
+        # the steps are numbered here, so save() never waits for the pending writes to find the latest one
+        latest = self.latest_checkpoint
+        self._next_step = 0 if latest is None else latest + 1
+        self._bytes_written = 0
+        self._bytes_skipped = 0
+
+    @property
+    def checkpoints(self):
+        """The steps of the checkpoints in the directory, in increasing order."""
+        steps = []
+        for filename in os.listdir(self.directory):
+            match = _MANIFEST.match(filename)
+            if match:
+                steps.append(int(match.group(1)))
+        return sorted(steps)
+
+    @property
+    def latest_checkpoint(self):
+        """The step of the most recent checkpoint, or ``None`` if there is none."""
+        steps = self.checkpoints
+        return steps[-1] if steps else None
+
+    @property
+    def write_stats(self):
+        """The number of bytes written and of bytes skipped because the tensor was already stored."""
+        return {'bytes_written': self._bytes_written, 'bytes_skipped': self._bytes_skipped}
+
+    def _manifest_file(self, step):
+        return os.path.join(self.directory, 'ckpt-{}.json'.format(step))
+
+    def _tensor_file(self, digest):
+        return os.path.join(self._tensor_dir, '{}.npy'.format(digest))
+
+    def save(self, network, step=None):
+        """Saves the weights of ``network`` as checkpoint ``step``, by default the step of the previous save, or of
+        the latest checkpoint in the directory, plus one.
+        Returns the step."""
+        if step is None:
+            step = self._next_step
+        self._next_step = step + 1
+        named = _named_weights(network)
+        names = [name for name, _ in named]
+        arrays = _snapshot([tensor for _, tensor in named])
+        if self._writer is None:
+            self._write(step, names, arrays)
+        else:
+            self._writer.submit(lambda: self._write(step, names, arrays))
+        return step
+
+    def _write(self, step, names, arrays):
+        tensors = {}
+        for name, array in zip(names, arrays):
+            digest = _hash_array(array)
+            filename = self._tensor_file(digest)
+            if self.incremental and os.path.exists(filename):
+                self._bytes_skipped += array.nbytes
+            else:
+                _atomic_write(filename, lambda f, array=array: np.save(f, array))
+                self._bytes_written += array.nbytes
+            tensors[name] = digest
+        manifest = {'step': step, 'tensors': tensors}
+        _atomic_write(self._manifest_file(step), lambda f: f.write(json.dumps(manifest, indent=2).encode('utf-8')))
+        logging.info("[*] Checkpoint {} saved in {}".format(step, self.directory))
+        if self.max_to_keep is not None:
+            self._remove_old_checkpoints()
+
+    def _remove_old_checkpoints(self):
+        steps = self.checkpoints
+        for step in steps[:-self.max_to_keep]:
+            os.remove(self._manifest_file(step))
+        used = set()
+        for step in steps[-self.max_to_keep:]:
+            with open(self._manifest_file(step), 'r') as f:
+                used.update(json.load(f)['tensors'].values())
+        for filename in os.listdir(self._tensor_dir):
+            digest, ext = os.path.splitext(filename)
+            if ext == '.npy' and digest not in used:
+                os.remove(os.path.join(self._tensor_dir, filename))
+
+    def wait(self):
+        """Blocks until all checkpoints are written, and raises the error of a failed write."""
+        if self._writer is not None:
+            self._writer.wait()
+
+    def load(self, step=None):
+        """Returns a dict from the names of the weights to their values in checkpoint ``step``, by default the
+        latest one."""
+        self.wait()
+        if step is None:
+            step = self.latest_checkpoint
+            if step is None:
+                raise FileNotFoundError("no checkpoint found in {}.".format(self.directory))
+        with open(self._manifest_file(step), 'r') as f:
+            manifest = json.load(f)
+        return {name: np.load(self._tensor_file(digest)) for name, digest in manifest['tensors'].items()}
+
+    def restore(self, network, step=None, skip=False):
+        """Assigns the weights of checkpoint ``step``, by default the latest one, to ``network`` by name.
+
+        If ``skip`` is ``True``, weights of the checkpoint not found in ``network`` are skipped, otherwise a
+        ``RuntimeError`` is raised. Returns the restored step.
+        """
+        if step is None:
+            self.wait()
+            step = self.latest_checkpoint
+        utils._assign_by_name(network, self.load(step), skip)
+        logging.info("[*] Checkpoint {} restored from {}".format(step, self.directory))
+        return step
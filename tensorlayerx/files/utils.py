@@ -10,6 +10,7 @@ import os
 import pickle
 import re
 import shutil
+import struct
 # import ast
 import sys
 import tarfile
@@ -93,12 +94,14 @@ __all__ = [
     'folder_exists',
     'load_and_assign_npz',
     'load_and_assign_npz_dict',
+    'load_and_assign_safetensors',
     'load_ckpt',
     'load_cropped_svhn',
     'load_file_list',
     'load_folder_list',
     'load_npy_to_any',
     'load_npz',
+    'load_safetensors',
     'maybe_download_and_extract',
     'natural_keys',
     'npz_to_W_pdf',
@@ -107,6 +110,7 @@ __all__ = [
     'save_ckpt',
     'save_npz',
     'save_npz_dict',
+    'save_safetensors',
     'tf_variables_to_numpy',
     'ms_variables_to_numpy',
     'assign_tf_variable',
@@ -613,15 +617,13 @@ def load_cifar10_dataset(shape=(-1, 32, 32, 3), path='data', plotable=False):
     maybe_download_and_extract(filename, path, url, extract=True)
 
     # Unpickle file and fill in data
-    X_train = None
+    X_train = []
     y_train = []
     for i in range(1, 6):
         data_dic = unpickle(os.path.join(path, 'cifar-10-batches-py/', "data_batch_{}".format(i)))
-        if i == 1:
-            X_train = data_dic['data']
-        else:
-            X_train = np.vstack((X_train, data_dic['data']))
+        X_train.append(data_dic['data'])
         y_train += data_dic['labels']
+    X_train = np.concatenate(X_train, axis=0)
 
     test_data_dic = unpickle(os.path.join(path, 'cifar-10-batches-py/', "test_batch"))
     X_test = test_data_dic['data']
@@ -2185,39 +2187,184 @@ def load_and_assign_npz_dict(name='model.npz', network=None, skip=False):
         logging.error("file {} doesn't exist.".format(name))
         return False
 
-    weights = np.load(name, allow_pickle=True)
-    if len(weights.keys()) != len(set(weights.keys())):
-        raise Exception("Duplication in model npz_dict %s" % name)
+    # arrays are read from the npz file one at a time while they are assigned
+    with np.load(name, allow_pickle=True) as weights:
+        if len(weights.keys()) != len(set(weights.keys())):
+            raise Exception("Duplication in model npz_dict %s" % name)
+        _assign_by_name(network, weights, skip)
+
+    logging.info("[*] Model restored from npz_dict %s" % name)
+
 
+def _assign_by_name(network, weights, skip=False):
+    """Assign a dict of arrays to the weights of network with the same name, looking every name up once."""
     if tlx.BACKEND == 'torch':
-        net_weights_name = [n for n, v in network.named_parameters()]
-        torch_weights_dict = {n: v for n, v in network.named_parameters()}
+        net_weights = dict(network.named_parameters())
     else:
-        net_weights_name = [w.name for w in network.all_weights]
+        net_weights = {w.name: w for w in network.all_weights}
 
-    for key in weights.keys():
-        if key not in net_weights_name:
+    for key, value in weights.items():
+        if key not in net_weights:
             if skip:
                 logging.warning("Weights named '%s' not found in network. Skip it." % key)
-            else:
-                raise RuntimeError(
-                    "Weights named '%s' not found in network. Hint: set argument skip=Ture "
-                    "if you want to skip redundant or mismatch weights." % key
-                )
+                continue
+            raise RuntimeError(
+                "Weights named '%s' not found in network. Hint: set argument skip=Ture "
+                "if you want to skip redundant or mismatch weights." % key
+            )
+        if tlx.BACKEND == 'tensorflow':
+            assign_tf_variable(net_weights[key], value)
+        elif tlx.BACKEND == 'mindspore':
+            assign_ms_variable(net_weights[key], Tensor(value, dtype=ms.float32))
+        elif tlx.BACKEND == 'paddle':
+            assign_pd_variable(net_weights[key], value)
+        elif tlx.BACKEND == 'torch':
+            assign_th_variable(net_weights[key], value)
         else:
-            if tlx.BACKEND == 'tensorflow':
-                assign_tf_variable(network.all_weights[net_weights_name.index(key)], weights[key])
-            elif tlx.BACKEND == 'mindspore':
-                assign_param = Tensor(weights[key], dtype=ms.float32)
-                assign_ms_variable(network.all_weights[net_weights_name.index(key)], assign_param)
-            elif tlx.BACKEND == 'paddle':
-                assign_pd_variable(network.all_weights[net_weights_name.index(key)], weights[key])
-            elif tlx.BACKEND == 'torch':
-                assign_th_variable(torch_weights_dict[key], weights[key])
-            else:
-                raise NotImplementedError('Not implemented')
+            raise NotImplementedError('Not implemented')
+
+
+_SAFETENSORS_DTYPES = {
+    'F64': np.float64,
+    'F32': np.float32,
+    'F16': np.float16,
+    'I64': np.int64,
+    'I32': np.int32,
+    'I16': np.int16,
+    'I8': np.int8,
+    'U8': np.uint8,
+    'BOOL': np.bool_,
+}
+_SAFETENSORS_CODES = {np.dtype(dtype): code for code, dtype in _SAFETENSORS_DTYPES.items()}
+
+
+def _write_safetensors(f, names, arrays):
+    """Write arrays into an open file in the safetensors layout: the size of a JSON header as an unsigned 64-bit
+    little-endian integer, the header mapping every name to its dtype, shape and byte range, then the raw data."""
+    arrays = [np.asarray(array) for array in arrays]
+    for name, array in zip(names, arrays):
+        if array.dtype not in _SAFETENSORS_CODES:
+            raise TypeError("weights '{}' has dtype {}, which can not be saved as safetensors.".format(name, array.dtype))
+    # larger items first, so that every tensor is aligned to its item size
+    order = sorted(range(len(arrays)), key=lambda i: (-arrays[i].dtype.itemsize, names[i]))
+    header, offset = {}, 0
+    for i in order:
+        header[names[i]] = {
+            'dtype': _SAFETENSORS_CODES[arrays[i].dtype],
+            'shape': list(arrays[i].shape),
+            'data_offsets': [offset, offset + arrays[i].nbytes]
+        }
+        offset += arrays[i].nbytes
+    header = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-len(header) % 8)
+    f.write(struct.pack('<Q', len(header)))
+    f.write(header)
+    for i in order:
+        array = np.ascontiguousarray(arrays[i], dtype=arrays[i].dtype.newbyteorder('<'))
+        f.write(array.reshape(-1).view(np.uint8).data)
+
+
+def load_safetensors(name='model.safetensors'):
+    """Memory-map the weights of a safetensors file saved by ``tlx.files.save_safetensors()``.
+
+    The header is parsed and the data is mapped, but nothing is read until an array is used. The arrays are
+    copy-on-write views of the file, writing to them does not modify the file.
 
-    logging.info("[*] Model restored from npz_dict %s" % name)
+    Parameters
+    ----------
+    name : str
+        The name of the `.safetensors` file.
+
+    Returns
+    --------
+    dict
+        A dict from the names of the weights to arrays, in the order of the file.
+
+    """
+    with open(name, 'rb') as f:
+        header_size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_size).decode('utf-8'))
+    header.pop('__metadata__', None)
+    data_offset = 8 + header_size
+    data_size = os.path.getsize(name) - data_offset
+    data = np.memmap(name, dtype=np.uint8, mode='c', offset=data_offset) if data_size > 0 else np.empty(0, np.uint8)
+    weights = {}
+    for key, info in sorted(header.items(), key=lambda item: item[1]['data_offsets'][0]):
+        if info['dtype'] not in _SAFETENSORS_DTYPES:
+            raise TypeError("weights '{}' has dtype {}, which is not supported.".format(key, info['dtype']))
+        begin, end = info['data_offsets']
+        dtype = np.dtype(_SAFETENSORS_DTYPES[info['dtype']]).newbyteorder('<')
+        weights[key] = data[begin:end].view(dtype).reshape(info['shape'])
+    return weights
+
+
+def save_safetensors(save_list=None, name='model.safetensors'):
+    """Input parameters and the file name, save parameters by name into an uncompressed safetensors file.
+
+    The file starts with a table of the byte offsets of every weight followed by the raw data, so it can be
+    memory-mapped and loaded one weight at a time. Use ``tlx.files.load_and_assign_safetensors()`` to restore.
+
+    Parameters
+    ----------
+    save_list : list of parameters
+        A list of parameters (tensor) to be saved.
+    name : str
+        The name of the `.safetensors` file.
+
+    Examples
+    --------
+    >>> tlx.files.save_safetensors(network.all_weights, name='model.safetensors')
+    >>> tlx.files.load_and_assign_safetensors(name='model.safetensors', network=network)
+
+    """
+    if save_list is None:
+        save_list = []
+    if tlx.BACKEND == 'torch':
+        save_list = list(save_list)
+        if len(save_list) and isinstance(save_list[0], tuple):
+            save_list_names = [named for named, _ in save_list]
+            save_list = [values for _, values in save_list]
+        else:
+            save_list_names = [str(i) for i in range(len(save_list))]
+        save_list_var = th_variables_to_numpy(save_list)
+    else:
+        save_list_names = [tensor.name for tensor in save_list]
+        if tlx.BACKEND == 'tensorflow':
+            save_list_var = tf_variables_to_numpy(save_list)
+        elif tlx.BACKEND == 'mindspore':
+            save_list_var = ms_variables_to_numpy(save_list)
+        elif tlx.BACKEND == 'paddle':
+            save_list_var = pd_variables_to_numpy(save_list)
+        else:
+            raise NotImplementedError('Not implemented')
+    with open(name, 'wb') as f:
+        _write_safetensors(f, save_list_names, save_list_var)
+    logging.info("[*] Model saved in safetensors %s" % name)
+
+
+def load_and_assign_safetensors(name='model.safetensors', network=None, skip=False):
+    """Restore the parameters saved by ``tlx.files.save_safetensors()`` by name.
+
+    The file is memory-mapped and every weight is copied straight into the parameter of the same name, so the peak
+    memory stays near the size of one weight instead of the whole file.
+
+    Parameters
+    -------------
+    name : str
+        The name of the `.safetensors` file.
+    network : :class:`Model`
+        The network to be assigned.
+    skip : boolean
+        If 'skip' == True, loaded weights whose name is not found in network's weights will be skipped.
+        If 'skip' is False, error will be raised when mismatch is found. Default False.
+
+    """
+    if not os.path.exists(name):
+        logging.error("file {} doesn't exist.".format(name))
+        return False
+
+    _assign_by_name(network, load_safetensors(name), skip)
+    logging.info("[*] Model restored from safetensors %s" % name)
 
 
 def save_ckpt(mode_name='model.ckpt', save_dir='checkpoint', var_list=None, global_step=None, printable=False):
@@ -2708,7 +2855,13 @@ def assign_pd_variable(variable, value):
 
 
 def assign_th_variable(variable, value):
-    variable.data = torch.as_tensor(value)
+    value = torch.as_tensor(value)
+    if variable.shape == value.shape:
+        # copy in place, which keeps the device and dtype of the parameter
+        with torch.no_grad():
+            variable.copy_(value)
+    else:
+        variable.data = value
 
 
 def _save_weights_to_hdf5_group(f, layers):
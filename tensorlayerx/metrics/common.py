@@ -0,0 +1,328 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from tensorlayerx.backend import convert_to_numpy
+
+__all__ = [
+    'Auc',
+    'Precision',
+    'Recall',
+]
+
+
+def _to_numpy(value, name):
+    if isinstance(value, np.ndarray):
+        return value
+    try:
+        return np.asarray(convert_to_numpy(value))
+    except Exception:
+        raise TypeError("The {} must be a numpy array or Tensor, but got {}.".format(name, type(value)))
+
+
+def _as_columns(y_pred, y_true):
+    # returns the predictions as (N, K) and whether y_true holds one label per sample or a (N, K) indicator matrix
+    if y_pred.ndim == 1:
+        y_pred = y_pred.reshape(-1, 1)
+    elif y_pred.ndim != 2:
+        raise ValueError("y_pred should have shape (N,) or (N, K), but got {}.".format(y_pred.shape))
+    if y_true.shape == y_pred.shape and y_pred.shape[1] > 1:
+        return y_pred, y_true, False
+    if y_true.size != y_pred.shape[0]:
+        raise ValueError(
+            "y_true should have one label per sample or the shape of y_pred {}, but got {}.".format(
+                y_pred.shape, y_true.shape
+            )
+        )
+    return y_pred, y_true.reshape(-1), True
+
+
+def _merge_state(metric, other, names):
+    state = other.state_dict() if hasattr(other, 'state_dict') else other
+    # a metric which saw no data, e.g. the one of an empty shard, does not change the merged state
+    if state[names[0]] is None:
+        return metric
+    if getattr(metric, names[0]) is None:
+        for name in names:
+            setattr(metric, name, np.array(state[name], copy=True))
+        return metric
+    for name in names:
+        if getattr(metric, name).shape != np.shape(state[name]):
+            raise ValueError(
+                "can not merge the state of a metric with {} into one with {}.".format(
+                    np.shape(state[name]),
+                    getattr(metric, name).shape
+                )
+            )
+        setattr(metric, name, getattr(metric, name) + state[name])
+    return metric
+
+
+class Auc(object):
+    """
+    The area under the ROC curve, for binary, multi-class and multi-label classification.
+
+    Scores are counted into ``num_thresholds + 1`` buckets per class with ``np.bincount`` and the curve is integrated
+    with cumulative sums, so updating and computing the result cost no Python loop over the samples or thresholds.
+
+    Parameters
+    -----------
+    curve : str
+        Specifies the mode of the curve to be computed. Only support 'ROC' now.
+    num_thresholds : int
+        The number of thresholds to use when discretizing the roc curve.
+    average : str or None
+        How the areas of the classes of a multi-class or multi-label problem are combined. ``'macro'`` returns their
+        mean over the classes having both positive and negative samples, ``None`` returns the area of every class.
+        Default 'macro'.
+
+    Examples
+    -----------
+    With TensorLayerx
+
+    >>> import tensorlayerx as tlx
+    >>> metric = tlx.metrics.Auc()
+    >>> metric.update(tlx.convert_to_tensor(np.array([[0.9, 0.1], [0.2, 0.8]])), tlx.convert_to_tensor(np.array([0, 1])))
+    >>> res = metric.result()
+    >>> # combine the metrics of two evaluation processes
+    >>> metric.merge(other_metric.state_dict())
+
+    """
+
+    def __init__(self, curve='ROC', num_thresholds=4095, average='macro'):
+        if average not in ('macro', None):
+            raise ValueError("average should be 'macro' or None, but got {}.".format(average))
+        self.curve = curve
+        self.num_thresholds = num_thresholds
+        self.average = average
+        self.reset()
+
+    def update(self, y_pred, y_true):
+        """
+        Updates the auc curve with `y_pred` and `y_true`.
+
+        Parameters
+        ----------
+        y_pred : Tensor
+            The predicted probabilities, of shape (N,) or (N, 1) for binary classification, (N, 2) for binary
+            classification with the probability of the positive class in the second column, or (N, K).
+        y_true : Tensor
+            The ground truth, one label per sample, or an indicator matrix of shape (N, K) for multi-label
+            classification.
+        """
+        y_true = _to_numpy(y_true, 'y_true')
+        y_pred, y_true, sparse = _as_columns(_to_numpy(y_pred, 'y_pred'), y_true)
+        if sparse and y_pred.shape[1] <= 2:
+            # positive probability
+            scores, labels = y_pred[:, -1:], (y_true != 0).reshape(-1, 1)
+        elif sparse:
+            scores, labels = y_pred, y_true.reshape(-1, 1) == np.arange(y_pred.shape[1])
+        else:
+            scores, labels = y_pred, y_true != 0
+        if scores.size and (scores.min() < 0 or scores.max() > 1):
+            raise ValueError("y_pred should be probabilities in [0, 1].")
+
+        num_classes, num_buckets = scores.shape[1], self.num_thresholds + 1
+        if self._stat_pos is None:
+            self._stat_pos = np.zeros((num_classes, num_buckets))
+            self._stat_neg = np.zeros((num_classes, num_buckets))
+        elif self._stat_pos.shape[0] != num_classes:
+            raise ValueError(
+                "y_pred has {} classes, but the metric has seen {}.".format(num_classes, self._stat_pos.shape[0])
+            )
+        # the bucket of every score, offset by the class so one bincount counts all classes
+        buckets = (scores * self.num_thresholds).astype(np.int64) + np.arange(num_classes) * num_buckets
+        size = num_classes * num_buckets
+        self._stat_pos += np.bincount(buckets[labels], minlength=size).reshape(num_classes, num_buckets)
+        self._stat_neg += np.bincount(buckets[~labels], minlength=size).reshape(num_classes, num_buckets)
+
+    @staticmethod
+    def trapezoid_area(x1, x2, y1, y2):
+        return abs(x1 - x2) * (y1 + y2) / 2.0
+
+    def result(self):
+        """
+        Return the area (a float score) under auc curve
+
+        Returns
+        -------
+            computed result, an array with the area of every class if ``average`` is None.
+        """
+        if self._stat_pos is None:
+            return 0.0
+        # walk the thresholds from the highest to the lowest
+        tot_pos = np.cumsum(self._stat_pos[:, ::-1], axis=1)
+        tot_neg = np.cumsum(self._stat_neg[:, ::-1], axis=1)
+        tot_pos_prev = np.concatenate([np.zeros((tot_pos.shape[0], 1)), tot_pos[:, :-1]], axis=1)
+        auc = np.sum(self._stat_neg[:, ::-1] * (tot_pos + tot_pos_prev) / 2.0, axis=1)
+        defined = (tot_pos[:, -1] > 0) & (tot_neg[:, -1] > 0)
+        auc = np.where(defined, auc / np.maximum(tot_pos[:, -1] * tot_neg[:, -1], 1), 0.0)
+        if len(auc) == 1:
+            return float(auc[0])
+        if self.average is None:
+            return auc
+        return float(np.mean(auc[defined])) if defined.any() else 0.0
+
+    def reset(self):
+        """
+        Reset states and result
+        """
+        self._stat_pos = None
+        self._stat_neg = None
+
+    def state_dict(self):
+        """Returns the counts of positive and negative samples per class and bucket, see :meth:`merge`."""
+        return {'stat_pos': self._stat_pos, 'stat_neg': self._stat_neg}
+
+    def merge(self, other):
+        """Adds the counts of another Auc metric or of its :meth:`state_dict`, e.g. computed by another process on
+        another part of the data. Returns this metric."""
+        state = other.state_dict() if hasattr(other, 'state_dict') else other
+        state = {'_stat_pos': state['stat_pos'], '_stat_neg': state['stat_neg']}
+        return _merge_state(self, state, ('_stat_pos', '_stat_neg'))
+
+
+class _ConfusionCounts(object):
+    """Counts the true positives, false positives and false negatives of every class with ``np.bincount``."""
+
+    def __init__(self, average='macro'):
+        if average not in ('macro', 'micro', None):
+            raise ValueError("average should be 'macro', 'micro' or None, but got {}.".format(average))
+        self.average = average
+        self.reset()
+
+    def update(self, y_pred, y_true):
+        """
+        Update the states based on the current mini-batch prediction results.
+
+        Parameters
+        ----------
+        y_pred : Tensor
+            The predicted value, probabilities of shape (N,) or (N, 1) for binary classification, scores of shape
+            (N, K) for multi-class classification, or probabilities of shape (N, K) for multi-label classification.
+        y_true : Tensor
+            The ground truth, one label per sample, or an indicator matrix of shape (N, K) for multi-label
+            classification.
+        """
+        y_true = _to_numpy(y_true, 'y_true')
+        y_pred, y_true, sparse = _as_columns(_to_numpy(y_pred, 'y_pred'), y_true)
+        num_classes = y_pred.shape[1]
+        if sparse and num_classes > 1:
+            # multi-class, the predicted class is the one with the highest score
+            y_true = y_true.astype(np.int64)
+            pred = np.argmax(y_pred, axis=1)
+            tp = np.bincount(y_true[pred == y_true], minlength=num_classes)
+            predicted = np.bincount(pred, minlength=num_classes)
+            actual = np.bincount(y_true, minlength=num_classes)
+            if len(actual) > num_classes:
+                raise ValueError("y_true has labels out of the {} classes of y_pred.".format(num_classes))
+        else:
+            pred = np.rint(y_pred).astype('int32') == 1
+            labels = y_true.reshape(pred.shape[0], -1) == 1
+            tp = np.sum(pred & labels, axis=0)
+            predicted = np.sum(pred, axis=0)
+            actual = np.sum(labels, axis=0)
+        if self.tp is None:
+            self.tp, self.fp, self.fn = (np.zeros(num_classes, np.int64) for _ in range(3))
+        elif len(self.tp) != num_classes:
+            raise ValueError("y_pred has {} classes, but the metric has seen {}.".format(num_classes, len(self.tp)))
+        self.tp += tp
+        self.fp += predicted - tp
+        self.fn += actual - tp
+
+    def _score(self, denominator):
+        if self.tp is None:
+            return .0
+        if self.average == 'micro' or len(self.tp) == 1:
+            total = np.sum(denominator)
+            return float(np.sum(self.tp)) / total if total != 0 else .0
+        scores = np.where(denominator != 0, self.tp / np.maximum(denominator, 1), 0.)
+        return scores if self.average is None else float(np.mean(scores))
+
+    def reset(self):
+        """
+        Resets all of the metric state.
+        """
+        self.tp = None
+        self.fp = None
+        self.fn = None
+
+    def state_dict(self):
+        """Returns the numbers of true positives, false positives and false negatives of every class, see
+        :meth:`merge`."""
+        return {'tp': self.tp, 'fp': self.fp, 'fn': self.fn}
+
+    def merge(self, other):
+        """Adds the counts of another metric of the same kind or of its :meth:`state_dict`, e.g. computed by
+        another process on another part of the data. Returns this metric."""
+        return _merge_state(self, other, ('tp', 'fp', 'fn'))
+
+
+class Precision(_ConfusionCounts):
+    """
+    Precision score for binary, multi-class and multi-label classification.
+
+    Parameters
+    -----------
+    average : str or None
+        How the scores of the classes of a multi-class or multi-label problem are combined. ``'macro'`` returns
+        their mean, ``'micro'`` the score of the counts summed over the classes and ``None`` the score of every
+        class. Binary classification always returns the score of the positive class. Default 'macro'.
+
+    Examples
+    -----------
+    >>> import tensorlayerx as tlx
+    >>> y_pred = tlx.ops.convert_to_tensor(np.array([0.3, 0.2, 0.1, 0.7]))
+    >>> y_true = tlx.ops.convert_to_tensor(np.array([1, 0, 0, 1]))
+    >>> metric = tlx.metrics.Precision()
+    >>> metric.update(y_pred, y_true)
+    >>> res = metric.result()
+    >>> metric.reset()
+    """
+
+    def result(self):
+        """
+        Return the precision
+
+        Returns
+        -------
+            computed result, an array with the precision of every class if ``average`` is None.
+        """
+        if self.tp is None:
+            return .0
+        return self._score(self.tp + self.fp)
+
+
+class Recall(_ConfusionCounts):
+    """
+    Recall score for binary, multi-class and multi-label classification.
+
+    Parameters
+    -----------
+    average : str or None
+        How the scores of the classes of a multi-class or multi-label problem are combined. ``'macro'`` returns
+        their mean, ``'micro'`` the score of the counts summed over the classes and ``None`` the score of every
+        class. Binary classification always returns the score of the positive class. Default 'macro'.
+
+    Examples
+    -----------
+    >>> import tensorlayerx as tlx
+    >>> y_pred = tlx.ops.convert_to_tensor(np.array([0.3, 0.2, 0.1, 0.7]))
+    >>> y_true = tlx.ops.convert_to_tensor(np.array([1, 0, 0, 1]))
+    >>> metric = tlx.metrics.Recall()
+    >>> metric.update(y_pred, y_true)
+    >>> res = metric.result()
+    >>> metric.reset()
+    """
+
+    def result(self):
+        """
+        Return the recall
+
+        Returns
+        -------
+            computed result, an array with the recall of every class if ``average`` is None.
+        """
+        if self.tp is None:
+            return .0
+        return self._score(self.tp + self.fn)
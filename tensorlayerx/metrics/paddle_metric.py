@@ -5,6 +5,8 @@ import paddle
 from paddle.metric.metrics import Metric
 import six
 import abc
+from .common import Auc, Precision, Recall
+from .text import Bleu, RougeL, ChrF, sentence_bleu
 
 __all__ = [
     'Metric',
@@ -12,7 +14,11 @@ __all__ = [
     'Auc',
     'Precision',
     'Recall',
+    'Bleu',
+    'RougeL',
+    'ChrF',
     'acc',
+    'sentence_bleu',
 ]
 
 @six.add_metaclass(abc.ABCMeta)
@@ -57,60 +63,6 @@ class Accuracy(object):
         self.accuracy.reset()
 
 
-class Auc(object):
-
-    def __init__(self, curve='ROC', num_thresholds=4095):
-
-        self.auc = paddle.metric.Auc(curve=curve, num_thresholds=num_thresholds)
-
-    def update(self, y_pred, y_true):
-
-        self.auc.update(y_pred, y_true)
-
-    def result(self):
-
-        return self.auc.accumulate()
-
-    def reset(self):
-
-        self.auc.reset()
-
-
-class Precision(object):
-
-    def __init__(self):
-
-        self.precision = paddle.metric.Precision()
-
-    def update(self, y_pred, y_true):
-
-        self.precision.update(y_pred, y_true)
-
-    def result(self):
-
-        return self.precision.accumulate()
-
-    def reset(self):
-
-        self.precision.reset()
-
-
-class Recall(object):
-
-    def __init__(self):
-
-        self.recall = paddle.metric.Recall()
-
-    def update(self, y_pred, y_true):
-        self.recall.update(y_pred, y_true)
-
-    def result(self):
-        return self.recall.accumulate()
-
-    def reset(self):
-        self.recall.reset()
-
-
 def acc(predicts, labels, topk=1):
 
     res = paddle.metric.accuracy(predicts, labels, k=topk)
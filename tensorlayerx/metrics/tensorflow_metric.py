@@ -5,6 +5,8 @@ import tensorflow as tf
 import numpy as np
 import six
 import abc
+from .common import Auc, Precision, Recall
+from .text import Bleu, RougeL, ChrF, sentence_bleu
 
 __all__ = [
     'Metric',
@@ -12,7 +14,11 @@ __all__ = [
     'Auc',
     'Precision',
     'Recall',
+    'Bleu',
+    'RougeL',
+    'ChrF',
     'acc',
+    'sentence_bleu',
 ]
 
 @six.add_metaclass(abc.ABCMeta)
@@ -113,196 +119,6 @@ class Accuracy(object):
         self.accuary.reset_states()
 
 
-class Auc(object):
-    """
-    The auc metric is for binary classification.
-
-    Parameters
-    -----------
-    curve : str
-        Specifies the mode of the curve to be computed. Only support 'ROC' now.
-    num_thresholds : int
-        The number of thresholds to use when discretizing the roc curve.
-
-    """
-
-    def __init__(
-        self,
-        curve='ROC',
-        num_thresholds=4095,
-    ):
-        self.curve = curve
-        self.num_thresholds = num_thresholds
-        self.reset()
-
-    def update(self, y_pred, y_true):
-        """
-        Updates the auc curve with `y_pred` and `y_true`.
-
-        Parameters
-        ----------
-        y_pred : Tensor
-            The predicted value.
-        y_true : Tensor
-            The ground truth.
-        """
-        if isinstance(y_true, tf.Tensor):
-            y_true = y_true.numpy()
-        elif not isinstance(y_pred, np.ndarray):
-            raise TypeError("The y_true must be a numpy array or Tensor.")
-
-        if isinstance(y_pred, tf.Tensor):
-            y_pred = y_pred.numpy()
-        elif not isinstance(y_pred, np.ndarray):
-            raise TypeError("The y_pred must be a numpy array or Tensor.")
-
-        for i, label in enumerate(y_true):
-            value = y_pred[i, 1]  # positive probability
-            bin_idx = int(value * self.num_thresholds)
-            assert bin_idx <= self.num_thresholds
-            if label:
-                self._stat_pos[bin_idx] += 1.0
-            else:
-                self._stat_neg[bin_idx] += 1.0
-
-    @staticmethod
-    def trapezoid_area(x1, x2, y1, y2):
-        return abs(x1 - x2) * (y1 + y2) / 2.0
-
-    def result(self):
-        """
-        Return the area (a float score) under auc curve
-
-        Returns
-        -------
-            computed result.
-        """
-        tot_pos = 0.0
-        tot_neg = 0.0
-        auc = 0.0
-        idx = self.num_thresholds
-        while idx > 0:
-            tot_pos_prev = tot_pos
-            tot_neg_prev = tot_neg
-            tot_pos += self._stat_pos[idx]
-            tot_neg += self._stat_neg[idx]
-            auc += self.trapezoid_area(tot_neg, tot_neg_prev, tot_pos, tot_pos_prev)
-            idx -= 1
-
-        return auc / tot_pos / tot_neg if tot_pos > 0.0 and tot_neg > 0.0 else 0.0
-
-    def reset(self):
-        """
-        Reset states and result
-        """
-        _num_pred_buckets = self.num_thresholds + 1
-        self._stat_pos = np.zeros(_num_pred_buckets)
-        self._stat_neg = np.zeros(_num_pred_buckets)
-
-
-class Precision(object):
-    """
-    Precision score for binary classification task.
-
-
-    Examples
-    -----------
-    >>> import tensorlayerx as tlx
-    >>> y_pred = tlx.ops.convert_to_tensor(np.array([0.3, 0.2, 0.1, 0.7]))
-    >>> y_true = tlx.ops.convert_to_tensor(np.array([1, 0, 0, 1]))
-    >>> metric = tlx.metrics.Precision()
-    >>> metric.update(y_pred, y_true)
-    >>> res = metric.result()
-    >>> metric.reset()
-    """
-
-    def __init__(self):
-
-        self.precision = tf.keras.metrics.Precision()
-
-    def update(self, y_pred, y_true):
-        """
-        Update the states based on the current mini-batch prediction results.
-
-        Parameters
-        ----------
-        y_pred : Tensor
-            The predicted value.
-        y_true : Tensor
-            The ground truth.
-
-        """
-
-        self.precision.update_state(y_true, y_pred)
-
-    def result(self):
-        """
-        Return the precision
-
-        Returns
-        -------
-            computed result.
-        """
-
-        return self.precision.result().numpy()
-
-    def reset(self):
-        """
-        Resets all of the metric state.
-        """
-        self.precision.reset_states()
-
-
-class Recall(object):
-    """
-    Recall score for binary classification task.
-
-    Examples
-    -----------
-    >>> import tensorlayerx as tlx
-    >>> y_pred = tlx.ops.convert_to_tensor(np.array([0.3, 0.2, 0.1, 0.7]))
-    >>> y_true = tlx.ops.convert_to_tensor(np.array([1, 0, 0, 1]))
-    >>> metric = tlx.metrics.Recall()
-    >>> metric.update(y_pred, y_true)
-    >>> res = metric.result()
-    >>> metric.reset()
-    """
-
-    def __init__(self):
-
-        self.recall = tf.keras.metrics.Recall()
-
-    def update(self, y_pred, y_true):
-        """
-        Update the states based on the current mini-batch prediction results.
-
-        Parameters
-        ----------
-        y_pred : Tensor
-            The predicted value.
-        y_true : Tensor
-            The ground truth.
-
-        """
-        self.recall.update_state(y_true, y_pred)
-
-    def result(self):
-        """
-        Return the recall
-
-        Returns
-        -------
-            computed result.
-        """
-        return self.recall.result().numpy()
-
-    def reset(self):
-        """
-        Resets all of the metric state.
-        """
-        self.recall.reset_states()
-
-
 def acc(predicts, labels, topk=1):
     """Accuracy function.
 
@@ -0,0 +1,528 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import collections
+import itertools
+
+import numpy as np
+
+from .common import _merge_state, _to_numpy
+
+__all__ = [
+    'Bleu',
+    'RougeL',
+    'ChrF',
+    'sentence_bleu',
+]
+
+_GOLDEN = np.uint64(0x9e3779b97f4a7c15)
+
+
+def _mix(x):
+    # the finalizer of splitmix64, a bijection of uint64 which spreads every input bit over the output
+    with np.errstate(over='ignore'):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+        return x ^ (x >> np.uint64(31))
+
+
+def _keyed(hashes, index):
+    # the hashes of the n-grams made distinct for every sequence of index
+    with np.errstate(over='ignore'):
+        return _mix(hashes ^ ((index.astype(np.uint64) + np.uint64(1)) * _GOLDEN))
+
+
+def _ngrams(flat, lengths, n):
+    # the hash of every n-gram of the sequences stored one after another in flat and the index of its sequence
+    counts = np.maximum(lengths - n + 1, 0)
+    sequence = np.repeat(np.arange(len(lengths)), counts)
+    starts = np.cumsum(lengths) - lengths
+    position = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(int(counts.sum()))
+    hashes = np.zeros(len(position), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for k in range(n):
+            hashes = _mix(hashes + (flat[position + k] + np.uint64(1)) * _GOLDEN)
+    return hashes, sequence
+
+
+def _count(keys):
+    keys, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    return keys, first, counts
+
+
+def _run_starts(values):
+    # True at the first item of every run of equal values
+    starts = np.ones(len(values), dtype=bool)
+    starts[1:] = values[1:] != values[:-1]
+    return starts
+
+
+def _lookup(keys, table, values):
+    # the values of the keys in a sorted table, 0 for the missing keys
+    if len(table) == 0:
+        return np.zeros(len(keys), dtype=values.dtype)
+    position = np.minimum(np.searchsorted(table, keys), len(table) - 1)
+    return np.where(table[position] == keys, values[position], 0)
+
+
+class _Tokens(object):
+    """Converts batches of sentences, token lists or id matrices to the ids of all the tokens one after another and
+    the length of every sequence. The tokens which are strings get ids shared by the hypotheses and references of a
+    batch."""
+
+    def __init__(self, lowercase=False, pad_id=None):
+        self.lowercase = lowercase
+        self.pad_id = pad_id
+        self._ids = collections.defaultdict(itertools.count().__next__)
+
+    def tokens(self, sequence):
+        if isinstance(sequence, str):
+            return (sequence.lower() if self.lowercase else sequence).split()
+        return sequence
+
+    def __call__(self, sequences):
+        if not isinstance(sequences, (list, tuple)):
+            ids = _to_numpy(sequences, 'sequences')
+            if ids.ndim != 2:
+                raise ValueError("The id matrix should have 2 dimensions, but got shape {}.".format(ids.shape))
+            mask = ids != self.pad_id if self.pad_id is not None else np.ones(ids.shape, dtype=bool)
+            return ids[mask].astype(np.uint64), mask.sum(axis=1)
+        sequences = [self.tokens(sequence) for sequence in sequences]
+        lengths = np.fromiter(map(len, sequences), np.int64, len(sequences))
+        flat = list(itertools.chain.from_iterable(sequences))
+        if flat and isinstance(flat[0], str):
+            flat = list(map(self._ids.__getitem__, flat))
+        flat = np.asarray(flat, dtype=np.int64)
+        if self.pad_id is not None:
+            keep = flat != self.pad_id
+            lengths = np.bincount(np.repeat(np.arange(len(lengths)), lengths)[keep], minlength=len(lengths))
+            flat = flat[keep]
+        return flat.astype(np.uint64), lengths
+
+
+def _split_references(hypotheses, references):
+    # flattens the references of every hypothesis, which is one reference or a list of references, and returns the
+    # index of the hypothesis of every reference
+    if not isinstance(references, (list, tuple)):
+        # an id matrix with one reference per row
+        references = _to_numpy(references, 'references')
+        return references, np.arange(len(references))
+    if len(references) != len(hypotheses):
+        raise ValueError(
+            "Every hypothesis needs its references, but got {} hypotheses and {} references.".format(
+                len(hypotheses), len(references)
+            )
+        )
+    flat, owner = [], []
+    for i, item in enumerate(references):
+        if isinstance(hypotheses[i], str):
+            single = isinstance(item, str)
+        else:
+            single = not (len(item) and isinstance(item[0], (list, tuple, np.ndarray)))
+        if single:
+            item = [item]
+        if len(item) == 0:
+            raise ValueError("The hypothesis {} has no reference.".format(i))
+        flat.extend(item)
+        owner.extend([i] * len(item))
+    return flat, np.asarray(owner, dtype=np.int64)
+
+
+def _bleu_statistics(hypotheses, references, max_order, lowercase, pad_id):
+    # the clipped n-gram matches, the number of n-grams, the length and the closest reference length of every
+    # hypothesis, like multi-bleu.perl
+    references, owner = _split_references(hypotheses, references)
+    tokens = _Tokens(lowercase, pad_id)
+    hyp_flat, hyp_lengths = tokens(hypotheses)
+    ref_flat, ref_lengths = tokens(references)
+    num = len(hyp_lengths)
+    matches = np.zeros((num, max_order), dtype=np.int64)
+    totals = np.zeros((num, max_order), dtype=np.int64)
+    for n in range(1, max_order + 1):
+        hashes, sequence = _ngrams(hyp_flat, hyp_lengths, n)
+        hyp_keys, first, hyp_counts = _count(_keyed(hashes, sequence))
+        hyp_sequence = sequence[first]
+        # the counts of every reference, then the maximum count of every n-gram over the references of a hypothesis
+        hashes, sequence = _ngrams(ref_flat, ref_lengths, n)
+        _, first, ref_counts = _count(_keyed(hashes, sequence))
+        ref_keys = _keyed(hashes[first], owner[sequence[first]])
+        order = np.argsort(ref_keys, kind='stable')
+        ref_keys, ref_counts = ref_keys[order], ref_counts[order]
+        starts = np.flatnonzero(_run_starts(ref_keys))
+        max_counts = np.maximum.reduceat(ref_counts, starts) if len(starts) else ref_counts
+        clipped = np.minimum(hyp_counts, _lookup(hyp_keys, ref_keys[starts], max_counts))
+        matches[:, n - 1] = np.bincount(hyp_sequence, clipped, minlength=num)
+        totals[:, n - 1] = np.maximum(hyp_lengths - n + 1, 0)
+    # the closest reference length, the shorter one on a tie
+    difference = np.abs(ref_lengths - hyp_lengths[owner])
+    order = np.lexsort((ref_lengths, difference, owner))
+    first = _run_starts(owner[order])
+    closest = np.zeros(num, dtype=np.int64)
+    closest[owner[order][first]] = ref_lengths[order][first]
+    return matches, totals, hyp_lengths, closest
+
+
+def _bleu(matches, totals, hyp_lengths, ref_lengths, smooth):
+    # the BLEU of every row of the statistics in [0, 100]
+    matches, totals = matches.astype(np.float64), totals.astype(np.float64)
+    if smooth:
+        precisions = (matches + 1.) / (totals + 1.)
+    else:
+        precisions = np.where(totals > 0, matches / np.maximum(totals, 1.), 0.)
+    positive = np.all(precisions > 0, axis=-1)
+    geometric_mean = np.where(
+        positive, np.exp(np.mean(np.log(np.where(precisions > 0, precisions, 1.)), axis=-1)), 0.
+    )
+    hyp_lengths, ref_lengths = np.asarray(hyp_lengths, np.float64), np.asarray(ref_lengths, np.float64)
+    brevity_penalty = np.where(
+        hyp_lengths < ref_lengths, np.exp(1. - ref_lengths / np.maximum(hyp_lengths, 1.)), 1.
+    )
+    brevity_penalty = np.where(hyp_lengths > 0, brevity_penalty, 0.)
+    return 100. * brevity_penalty * geometric_mean
+
+
+def sentence_bleu(hypotheses, references, max_order=4, smooth=True, lowercase=False, pad_id=None):
+    """The BLEU score of every hypothesis of a batch, in [0, 100].
+
+    The n-grams of the whole batch are hashed and counted at once with NumPy. ``smooth=True`` adds one to the matches
+    and the number of n-grams of every order, so that a sentence without a matching 4-gram still gets a score.
+
+    Parameters
+    ----------
+    hypotheses : list of str, list of list or numpy.array
+        The hypotheses, as sentences which are split on whitespace, token lists or an id matrix.
+    references : list or numpy.array
+        For every hypothesis, one reference or a list of references in the format of the hypotheses.
+    max_order : int
+        The maximum n-gram order.
+    smooth : boolean
+        If True, the precisions are add-one smoothed.
+    lowercase : boolean
+        If True, the sentences are lower-cased.
+    pad_id : int or None
+        The id of the padding of an id matrix, which is ignored.
+
+    Returns
+    -------
+    numpy.array
+        The scores.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> tlx.metrics.sentence_bleu(["the cat is on the mat"], [["the cat sat on the mat", "a cat is on the mat"]])
+    array([88.01117368])
+
+    """
+    return _bleu(*_bleu_statistics(hypotheses, references, max_order, lowercase, pad_id), smooth=smooth)
+
+
+class Bleu(object):
+    """
+    The corpus BLEU score, in [0, 100].
+
+    The hypotheses are compared to their references like in the ``multi-bleu.perl`` script of Moses: the tokens are
+    separated by whitespace, the n-gram matches are clipped to the maximum count of the n-gram in a reference and the
+    brevity penalty uses the reference length closest to the hypothesis length. The n-grams of a batch are hashed and
+    counted at once with NumPy, and the counts of the batches are accumulated, so that :meth:`result` is the score of
+    the whole corpus.
+
+    Parameters
+    -----------
+    max_order : int
+        The maximum n-gram order. Default 4.
+    smooth : boolean
+        If True, the precisions are add-one smoothed. Default False, like ``multi-bleu.perl``.
+    lowercase : boolean
+        If True, the sentences are lower-cased, like the ``-lc`` option of ``multi-bleu.perl``.
+    pad_id : int or None
+        The id of the padding of id matrices, which is ignored.
+
+    Examples
+    -----------
+    With TensorLayerx
+
+    >>> metric = tlx.metrics.Bleu()
+    >>> metric.update(["the cat is on the mat"], [["the cat sat on the mat", "a cat is on the mat"]])
+    >>> metric.update(predicted_ids, target_ids)
+    >>> res = metric.result()
+
+    """
+
+    def __init__(self, max_order=4, smooth=False, lowercase=False, pad_id=None):
+        self.max_order = max_order
+        self.smooth = smooth
+        self.lowercase = lowercase
+        self.pad_id = pad_id
+        self.reset()
+
+    def update(self, hypotheses, references):
+        """
+        Counts the n-grams of a batch.
+
+        Parameters
+        ----------
+        hypotheses : list of str, list of list or Tensor
+            The hypotheses, as sentences which are split on whitespace, token lists or an id matrix.
+        references : list or Tensor
+            For every hypothesis, one reference or a list of references in the format of the hypotheses.
+        """
+        if len(hypotheses) == 0:
+            return
+        matches, totals, hyp_lengths, ref_lengths = _bleu_statistics(
+            hypotheses, references, self.max_order, self.lowercase, self.pad_id
+        )
+        self.matches += matches.sum(axis=0)
+        self.totals += totals.sum(axis=0)
+        self.lengths += np.array([hyp_lengths.sum(), ref_lengths.sum()])
+
+    def result(self):
+        """
+        Return the BLEU score of all the batches.
+        """
+        return float(_bleu(self.matches, self.totals, self.lengths[0], self.lengths[1], self.smooth))
+
+    def precisions(self):
+        """Returns the n-gram precisions of all the batches, in [0, 100]."""
+        return 100. * self.matches / np.maximum(self.totals, 1)
+
+    def reset(self):
+        """
+        Resets all of the metric state.
+        """
+        self.matches = np.zeros(self.max_order, dtype=np.int64)
+        self.totals = np.zeros(self.max_order, dtype=np.int64)
+        self.lengths = np.zeros(2, dtype=np.int64)
+
+    def state_dict(self):
+        """Returns the n-gram matches and totals and the hypothesis and reference lengths, see :meth:`merge`."""
+        return {'matches': self.matches, 'totals': self.totals, 'lengths': self.lengths}
+
+    def merge(self, other):
+        """Adds the counts of another Bleu metric or of its :meth:`state_dict`, e.g. computed by another process on
+        another part of the data. Returns this metric."""
+        return _merge_state(self, other, ('matches', 'totals', 'lengths'))
+
+
+def _lcs(a, b):
+    # the length of the longest common subsequence with the bit-parallel algorithm of Hyyrö, one big integer
+    # operation per token of b
+    if not a or not b:
+        return 0
+    masks = {}
+    for i, token in enumerate(a):
+        masks[token] = masks.get(token, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    v = full
+    for token in b:
+        u = v & masks.get(token, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(a) - bin(v).count('1')
+
+
+class RougeL(object):
+    """
+    The ROUGE-L F-measure, in [0, 100].
+
+    The precision and recall of a hypothesis are the length of its longest common subsequence with the reference
+    divided by the length of the hypothesis and of the reference. With several references the one with the highest
+    F-measure is used. :meth:`result` is the mean over the sentences. The longest common subsequence is computed with
+    a bit-parallel algorithm.
+
+    Parameters
+    -----------
+    beta : float
+        The weight of the recall in the F-measure. Default 1.
+    lowercase : boolean
+        If True, the sentences are lower-cased.
+    pad_id : int or None
+        The id of the padding of id matrices, which is ignored.
+
+    Examples
+    -----------
+    With TensorLayerx
+
+    >>> metric = tlx.metrics.RougeL()
+    >>> metric.update(["the cat is on the mat"], ["the cat sat on the mat"])
+    >>> res = metric.result()
+
+    """
+
+    def __init__(self, beta=1., lowercase=False, pad_id=None):
+        self.beta = beta
+        self.lowercase = lowercase
+        self.pad_id = pad_id
+        self.reset()
+
+    def update(self, hypotheses, references):
+        """
+        Computes the scores of a batch.
+
+        Parameters
+        ----------
+        hypotheses : list of str, list of list or Tensor
+            The hypotheses, as sentences which are split on whitespace, token lists or an id matrix.
+        references : list or Tensor
+            For every hypothesis, one reference or a list of references in the format of the hypotheses.
+        """
+        if len(hypotheses) == 0:
+            return
+        references, owner = _split_references(hypotheses, references)
+        tokens = _Tokens(self.lowercase, self.pad_id)
+        hyp_flat, hyp_lengths = tokens(hypotheses)
+        ref_flat, ref_lengths = tokens(references)
+        hyp_ends, ref_ends = np.cumsum(hyp_lengths).tolist(), np.cumsum(ref_lengths).tolist()
+        hyp_flat, ref_flat = hyp_flat.tolist(), ref_flat.tolist()
+        hyp_tokens = [hyp_flat[end - length:end] for end, length in zip(hyp_ends, hyp_lengths.tolist())]
+        lcs = np.array(
+            [
+                _lcs(ref_flat[end - length:end], hyp_tokens[i])
+                for end, length, i in zip(ref_ends, ref_lengths.tolist(), owner.tolist())
+            ], dtype=np.float64
+        )
+        precision = lcs / np.maximum(hyp_lengths[owner], 1)
+        recall = lcs / np.maximum(ref_lengths, 1)
+        factor = self.beta**2
+        denominator = recall + factor * precision
+        f = np.where(denominator > 0, (1 + factor) * precision * recall / np.where(denominator > 0, denominator, 1), 0.)
+        # the reference with the highest F-measure of every hypothesis, the first one on a tie
+        order = np.lexsort((-f, owner))
+        best = order[_run_starts(owner[order])]
+        self.stats += np.array([precision[best].sum(), recall[best].sum(), f[best].sum(), len(best)])
+
+    def result(self):
+        """
+        Return the mean ROUGE-L F-measure of the sentences.
+        """
+        return float(100. * self.stats[2] / self.stats[3]) if self.stats[3] else 0.
+
+    def reset(self):
+        """
+        Resets all of the metric state.
+        """
+        self.stats = np.zeros(4)
+
+    def state_dict(self):
+        """Returns the sums of the precisions, recalls and F-measures and the number of sentences, see
+        :meth:`merge`."""
+        return {'stats': self.stats}
+
+    def merge(self, other):
+        """Adds the sums of another RougeL metric or of its :meth:`state_dict`. Returns this metric."""
+        return _merge_state(self, other, ('stats', ))
+
+
+def _chrf(stats, beta):
+    # the chrF of the statistics of shape (..., order, 3) holding the hypothesis, reference and matching n-gram counts,
+    # the precisions and recalls of the orders with n-grams are averaged like sacreBLEU
+    stats = stats.astype(np.float64)
+    hyp, ref, match = stats[..., 0], stats[..., 1], stats[..., 2]
+    effective = (hyp > 0) & (ref > 0)
+    num_effective = effective.sum(axis=-1)
+    precision = np.where(effective, match / np.maximum(hyp, 1), 0.).sum(axis=-1) / np.maximum(num_effective, 1)
+    recall = np.where(effective, match / np.maximum(ref, 1), 0.).sum(axis=-1) / np.maximum(num_effective, 1)
+    factor = beta**2
+    denominator = factor * precision + recall
+    return np.where(
+        denominator > 0, 100. * (1 + factor) * precision * recall / np.where(denominator > 0, denominator, 1), 0.
+    )
+
+
+class ChrF(object):
+    """
+    The character n-gram F-score chrF, in [0, 100].
+
+    The whitespace of the sentences is removed and the character n-grams of every order up to ``order`` are counted.
+    The statistics of a hypothesis are taken from the reference with the highest sentence chrF and summed over the
+    corpus, then the precisions and recalls of the orders are averaged and combined into the F-score, like sacreBLEU.
+    The n-grams of a batch are hashed and counted at once with NumPy.
+
+    Parameters
+    -----------
+    order : int
+        The maximum character n-gram order. Default 6.
+    beta : float
+        The weight of the recall in the F-score. Default 2.
+    lowercase : boolean
+        If True, the sentences are lower-cased.
+
+    Examples
+    -----------
+    With TensorLayerx
+
+    >>> metric = tlx.metrics.ChrF()
+    >>> metric.update(["the cat is on the mat"], ["the cat sat on the mat"])
+    >>> res = metric.result()
+
+    """
+
+    def __init__(self, order=6, beta=2., lowercase=False):
+        self.order = order
+        self.beta = beta
+        self.lowercase = lowercase
+        self.reset()
+
+    def _characters(self, sentences):
+        sentences = [''.join((s.lower() if self.lowercase else s).split()) for s in sentences]
+        lengths = np.fromiter(map(len, sentences), np.int64, len(sentences))
+        flat = np.frombuffer(''.join(sentences).encode('utf-32-le'), dtype=np.uint32)
+        return flat.astype(np.uint64), lengths
+
+    def update(self, hypotheses, references):
+        """
+        Counts the character n-grams of a batch.
+
+        Parameters
+        ----------
+        hypotheses : list of str
+            The hypotheses.
+        references : list
+            For every hypothesis, one reference or a list of references.
+        """
+        if len(hypotheses) == 0:
+            return
+        if not all(isinstance(s, str) for s in hypotheses):
+            raise TypeError("The hypotheses of chrF should be strings.")
+        references, owner = _split_references(hypotheses, references)
+        hyp_flat, hyp_lengths = self._characters(hypotheses)
+        ref_flat, ref_lengths = self._characters(references)
+        num_refs = len(ref_lengths)
+        # the hypothesis, reference and matching n-gram counts of every reference and order
+        stats = np.zeros((num_refs, self.order, 3), dtype=np.int64)
+        for n in range(1, self.order + 1):
+            hashes, sequence = _ngrams(hyp_flat, hyp_lengths, n)
+            hyp_keys, _, hyp_counts = _count(_keyed(hashes, sequence))
+            hashes, sequence = _ngrams(ref_flat, ref_lengths, n)
+            keys, first, ref_counts = _count(_keyed(hashes, sequence))
+            ref = sequence[first]
+            hyp_counts_of_ref = _lookup(_keyed(hashes[first], owner[ref]), hyp_keys, hyp_counts)
+            ref_total = np.maximum(ref_lengths - n + 1, 0)
+            # the hypothesis n-grams only count for a reference which has n-grams of this order
+            stats[:, n - 1, 0] = np.where(ref_total > 0, np.maximum(hyp_lengths[owner] - n + 1, 0), 0)
+            stats[:, n - 1, 1] = ref_total
+            stats[:, n - 1, 2] = np.bincount(ref, np.minimum(ref_counts, hyp_counts_of_ref), minlength=num_refs)
+        scores = _chrf(stats, self.beta)
+        order = np.lexsort((-scores, owner))
+        best = order[_run_starts(owner[order])]
+        self.stats += stats[best].sum(axis=0)
+
+    def result(self):
+        """
+        Return the chrF of all the batches.
+        """
+        return float(_chrf(self.stats, self.beta))
+
+    def reset(self):
+        """
+        Resets all of the metric state.
+        """
+        self.stats = np.zeros((self.order, 3), dtype=np.int64)
+
+    def state_dict(self):
+        """Returns the hypothesis, reference and matching n-gram counts of every order, see :meth:`merge`."""
+        return {'stats': self.stats}
+
+    def merge(self, other):
+        """Adds the counts of another ChrF metric or of its :meth:`state_dict`. Returns this metric."""
+        return _merge_state(self, other, ('stats', ))
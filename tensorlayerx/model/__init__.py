@@ -6,3 +6,11 @@ from .core import WithLoss
 from .core import WithGrad
 from .core import TrainOneStep
 from .core import TrainOneStepWithGradientClipping
+from .profiler import Profiler
+from .mixed_precision import MixedPrecision
+from .mixed_precision import DynamicLossScaler
+from .callbacks import Callback
+from .callbacks import EarlyStopping
+from .callbacks import ModelCheckpoint
+from .callbacks import LearningRateScheduler
+from .callbacks import ThroughputLogger
@@ -0,0 +1,392 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import numpy as np
+import tensorlayerx as tlx
+from tensorlayerx import logging
+
+__all__ = ['Callback', 'EarlyStopping', 'ModelCheckpoint', 'LearningRateScheduler', 'ThroughputLogger']
+
+_HOOKS = ('on_train_begin', 'on_train_end', 'on_epoch_begin', 'on_epoch_end', 'on_batch_begin', 'on_batch_end')
+
+
+class Callback(object):
+    """Base class of the callbacks of :meth:`Model.train`.
+
+    Override the hooks to run code at the beginning and the end of the training, of every epoch and of every batch.
+    ``self.model`` is the :class:`Model` being trained, setting ``self.model.stop_training = True`` stops the
+    training after the current batch. Only the hooks a callback overrides are called, and the training loop skips the
+    per-batch work entirely when no callback overrides ``on_batch_begin`` or ``on_batch_end``.
+
+    The ``logs`` of ``on_batch_begin`` hold the ``size`` of the batch, those of ``on_batch_end`` also the ``loss``
+    tensor of the batch. The ``logs`` of ``on_epoch_end`` hold the mean training ``loss`` and ``acc`` of the epoch
+    and, in the epochs the model is validated, ``val_loss`` and ``val_<name>`` for every metric, see
+    :meth:`Model.eval`. Callbacks may add entries for the callbacks after them.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> class PrintLoss(tlx.model.Callback):
+    >>>     def on_epoch_end(self, epoch, logs):
+    >>>         print(epoch, logs['loss'])
+    >>> model.train(n_epoch=10, train_dataset=train_loader, callbacks=[PrintLoss()])
+
+    """
+
+    model = None
+
+    def set_model(self, model):
+        self.model = model
+
+    def on_train_begin(self, logs):
+        pass
+
+    def on_train_end(self, logs):
+        pass
+
+    def on_epoch_begin(self, epoch, logs):
+        pass
+
+    def on_epoch_end(self, epoch, logs):
+        pass
+
+    def on_batch_begin(self, batch, logs):
+        pass
+
+    def on_batch_end(self, batch, logs):
+        pass
+
+
+class _CallbackList(object):
+    # calls every hook of the callbacks which override it
+
+    def __init__(self, callbacks=None, model=None):
+        self.callbacks = list(callbacks or [])
+        for callback in self.callbacks:
+            if not isinstance(callback, Callback):
+                raise TypeError("callbacks should be instances of Callback, but got {}.".format(type(callback)))
+            callback.set_model(model)
+        for name in _HOOKS:
+            hooks = [
+                getattr(callback, name)
+                for callback in self.callbacks
+                if getattr(getattr(callback, name), '__func__', None) is not getattr(Callback, name)
+            ]
+            setattr(self, '_' + name, hooks)
+        self.batch_hooks = bool(self._on_batch_begin or self._on_batch_end)
+
+    def on_train_begin(self, logs):
+        for hook in self._on_train_begin:
+            hook(logs)
+
+    def on_train_end(self, logs):
+        for hook in self._on_train_end:
+            hook(logs)
+
+    def on_epoch_begin(self, epoch, logs):
+        for hook in self._on_epoch_begin:
+            hook(epoch, logs)
+
+    def on_epoch_end(self, epoch, logs):
+        for hook in self._on_epoch_end:
+            hook(epoch, logs)
+
+    def on_batch_begin(self, batch, logs):
+        for hook in self._on_batch_begin:
+            hook(batch, logs)
+
+    def on_batch_end(self, batch, logs):
+        for hook in self._on_batch_end:
+            hook(batch, logs)
+
+
+_NO_CALLBACKS = _CallbackList()
+
+
+def _check_mode(mode, monitor):
+    if mode not in ('auto', 'min', 'max'):
+        raise ValueError("mode should be 'auto', 'min' or 'max', but got {}.".format(mode))
+    if mode == 'auto':
+        # accuracies and areas grow, losses and errors shrink
+        return 'max' if any(name in monitor for name in ('acc', 'auc', 'precision', 'recall')) else 'min'
+    return mode
+
+
+class _Monitor(object):
+    # tracks the best value of a monitored entry of the epoch logs
+
+    def __init__(self, monitor, mode, min_delta=0.):
+        self.monitor = monitor
+        self.mode = _check_mode(mode, monitor)
+        self.min_delta = abs(min_delta)
+        self.best = None
+
+    def is_better(self, value, reference):
+        if reference is None:
+            return True
+        if self.mode == 'min':
+            return value < reference - self.min_delta
+        return value > reference + self.min_delta
+
+    def get(self, logs):
+        value = logs.get(self.monitor)
+        return None if value is None else float(value)
+
+
+class EarlyStopping(Callback):
+    """Stops the training when a monitored value has stopped improving.
+
+    The value is checked in the epochs where it is in the logs, so a validation value is only checked in the epochs
+    the model is validated, every ``print_freq`` epochs of :meth:`Model.train`.
+
+    Parameters
+    ----------
+    monitor : str
+        The entry of the epoch logs to monitor. Default 'val_loss'.
+    min_delta : float
+        The minimum change counted as an improvement. Default 0.
+    patience : int
+        The number of checks without improvement after which the training is stopped, 0 stops at the first one.
+        Default 0.
+    mode : str
+        'min' if the value should decrease, 'max' if it should increase, 'auto' infers it from the name of the
+        value. Default 'auto'.
+    restore_best_weights : bool
+        If True, the weights of the best check are restored when the training stops or ends. Default False.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> early_stopping = tlx.model.EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True)
+    >>> model.train(n_epoch=100, train_dataset=train_loader, test_dataset=val_loader, print_freq=1, callbacks=[early_stopping])
+    >>> print(early_stopping.stopped_epoch)
+
+    """
+
+    def __init__(self, monitor='val_loss', min_delta=0., patience=0, mode='auto', restore_best_weights=False):
+        if not isinstance(patience, int) or patience < 0:
+            raise ValueError("patience should be a non-negative integer, but got {}.".format(patience))
+        self._monitor = _Monitor(monitor, mode, min_delta)
+        self.monitor = monitor
+        self.patience = patience
+        self.restore_best_weights = restore_best_weights
+        self.wait = 0
+        self.stopped_epoch = None
+        self.best_epoch = None
+        self.best_weights = None
+
+    @property
+    def best(self):
+        """The best monitored value."""
+        return self._monitor.best
+
+    def on_train_begin(self, logs):
+        self._monitor.best = None
+        self.wait = 0
+        self.stopped_epoch = None
+        self.best_epoch = None
+        self.best_weights = None
+
+    def on_epoch_end(self, epoch, logs):
+        value = self._monitor.get(logs)
+        if value is None:
+            return
+        if self._monitor.is_better(value, self._monitor.best):
+            self._monitor.best = value
+            self.best_epoch = epoch
+            self.wait = 0
+            if self.restore_best_weights:
+                self.best_weights = [np.array(tlx.convert_to_numpy(w), copy=True) for w in self.model.all_weights]
+            return
+        self.wait += 1
+        if self.wait >= self.patience:
+            self.stopped_epoch = epoch
+            self.model.stop_training = True
+            logging.info(
+                "Early stopping at epoch {}, the best {} was {} at epoch {}.".format(
+                    epoch + 1, self.monitor, self._monitor.best, self.best_epoch + 1
+                )
+            )
+
+    def on_train_end(self, logs):
+        if self.restore_best_weights and self.best_weights is not None:
+            tlx.files.assign_weights(self.best_weights, self.model.network)
+
+
+class ModelCheckpoint(Callback):
+    """Saves the weights of the epochs with the best ``save_top_k`` values of a monitored entry of the epoch logs.
+
+    The weights of an epoch are saved with :meth:`Model.save_weights` into ``directory`` as ``filename`` formatted
+    with the epoch and the logs. When more than ``save_top_k`` files are kept, the one of the worst epoch is deleted.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the files, created if it does not exist.
+    monitor : str
+        The entry of the epoch logs to rank the epochs by, epochs without it are not saved. Default 'val_loss'.
+    mode : str
+        'min' if the value should decrease, 'max' if it should increase, 'auto' infers it from the name of the
+        value. Default 'auto'.
+    save_top_k : int
+        The number of best files to keep. Default 1.
+    save_last : bool
+        If True, the weights of the last epoch are also saved as ``last`` with the extension of ``filename``.
+        Default False.
+    filename : str
+        The name of the files, formatted with ``epoch`` (counted from 1) and the entries of the logs. Its extension
+        is the format of the files, see :meth:`Model.save_weights`. Default 'epoch{epoch:03d}.npz'.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> checkpoint = tlx.model.ModelCheckpoint('checkpoints', monitor='val_acc', save_top_k=3, filename='epoch{epoch:03d}-{val_acc:.4f}.npz')
+    >>> model.train(n_epoch=100, train_dataset=train_loader, test_dataset=val_loader, print_freq=1, callbacks=[checkpoint])
+    >>> model.load_weights(checkpoint.best_model_path)
+
+    """
+
+    def __init__(
+        self, directory, monitor='val_loss', mode='auto', save_top_k=1, save_last=False, filename='epoch{epoch:03d}.npz'
+    ):
+        if not isinstance(save_top_k, int) or save_top_k <= 0:
+            raise ValueError("save_top_k should be a positive integer, but got {}.".format(save_top_k))
+        self._monitor = _Monitor(monitor, mode)
+        self.directory = directory
+        self.monitor = monitor
+        self.save_top_k = save_top_k
+        self.save_last = save_last
+        self.filename = filename
+        # (value, path) of the kept files, the best first
+        self.best_k_models = []
+
+    @property
+    def best_model_path(self):
+        """The path of the best file, or ``None`` if none was saved."""
+        return self.best_k_models[0][1] if self.best_k_models else None
+
+    def _save(self, file_path):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        self.model.save_weights(file_path)
+
+    def on_epoch_end(self, epoch, logs):
+        if self.save_last:
+            self._save(os.path.join(self.directory, 'last' + os.path.splitext(self.filename)[1]))
+        value = self._monitor.get(logs)
+        if value is None:
+            return
+        if len(self.best_k_models) == self.save_top_k and \
+                not self._monitor.is_better(value, self.best_k_models[-1][0]):
+            return
+        file_path = os.path.join(self.directory, self.filename.format(epoch=epoch + 1, **logs))
+        self._save(file_path)
+        self.best_k_models = [(v, path) for v, path in self.best_k_models if path != file_path]
+        self.best_k_models.append((value, file_path))
+        self.best_k_models.sort(key=lambda item: item[0], reverse=self._monitor.mode == 'max')
+        for _, path in self.best_k_models[self.save_top_k:]:
+            if os.path.exists(path):
+                os.remove(path)
+        del self.best_k_models[self.save_top_k:]
+
+
+class LearningRateScheduler(Callback):
+    """Steps a scheduler of :mod:`tensorlayerx.optimizers.lr` during the training.
+
+    Parameters
+    ----------
+    scheduler : LRScheduler
+        The scheduler, given as learning rate to the optimizer.
+    interval : str
+        'epoch' steps the scheduler after every epoch, 'batch' after every batch. Default 'epoch'.
+    monitor : str or None
+        If given, the scheduler is stepped with this entry of the epoch logs, in the epochs where it is in the logs.
+        Default None, which is 'val_loss' for ``ReduceOnPlateau`` and no value for the other schedulers.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> scheduler = tlx.optimizers.lr.CosineAnnealingDecay(learning_rate=0.1, T_max=100)
+    >>> optimizer = tlx.optimizers.SGD(lr=scheduler)
+    >>> model = tlx.model.Model(network=net, loss_fn=tlx.losses.softmax_cross_entropy_with_logits, optimizer=optimizer)
+    >>> model.train(n_epoch=100, train_dataset=train_loader, callbacks=[tlx.model.LearningRateScheduler(scheduler)])
+
+    """
+
+    def __init__(self, scheduler, interval='epoch', monitor=None):
+        if interval not in ('epoch', 'batch'):
+            raise ValueError("interval should be 'epoch' or 'batch', but got {}.".format(interval))
+        if monitor is None and type(scheduler).__name__ == 'ReduceOnPlateau':
+            monitor = 'val_loss'
+        if monitor is not None and interval != 'epoch':
+            raise ValueError("a monitored value is only available with interval='epoch'.")
+        self.scheduler = scheduler
+        self.interval = interval
+        self.monitor = monitor
+        if interval == 'batch':
+            self.on_batch_end = self._step_batch
+        else:
+            self.on_epoch_end = self._step_epoch
+
+    def _step_batch(self, batch, logs):
+        self.scheduler.step()
+
+    def _step_epoch(self, epoch, logs):
+        if self.monitor is None:
+            self.scheduler.step()
+        elif logs.get(self.monitor) is not None:
+            self.scheduler.step(float(logs[self.monitor]))
+
+
+class ThroughputLogger(Callback):
+    """Logs the training throughput in samples per second.
+
+    The throughput of every epoch is logged and added to the epoch logs as ``samples_per_sec``.
+
+    Parameters
+    ----------
+    log_every : int or None
+        If given, the throughput of the last ``log_every`` batches is also logged every ``log_every`` batches.
+        Default None.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> model.train(n_epoch=10, train_dataset=train_loader, callbacks=[tlx.model.ThroughputLogger(log_every=100)])
+
+    """
+
+    def __init__(self, log_every=None):
+        if log_every is not None and (not isinstance(log_every, int) or log_every <= 0):
+            raise ValueError("log_every should be a positive integer, but got {}.".format(log_every))
+        self.log_every = log_every
+        self.history = []
+        self._start = self._window_start = 0.
+        self._samples = self._window_samples = 0
+
+    def on_epoch_begin(self, epoch, logs):
+        self._start = self._window_start = time.perf_counter()
+        self._samples = self._window_samples = 0
+
+    def on_batch_end(self, batch, logs):
+        self._samples += logs['size']
+        self._window_samples += logs['size']
+        if self.log_every is not None and (batch + 1) % self.log_every == 0:
+            now = time.perf_counter()
+            logging.info(
+                "batch {}: {:.1f} samples/s".format(batch + 1, self._window_samples / max(now - self._window_start, 1e-12))
+            )
+            self._window_start, self._window_samples = now, 0
+
+    def on_epoch_end(self, epoch, logs):
+        samples_per_sec = self._samples / max(time.perf_counter() - self._start, 1e-12)
+        self.history.append(samples_per_sec)
+        logs['samples_per_sec'] = samples_per_sec
+        logging.info("Epoch {}: {} samples, {:.1f} samples/s".format(epoch + 1, self._samples, samples_per_sec))
@@ -1,20 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import contextlib
 from collections.abc import Iterable
 from tensorlayerx.nn.core.common import _save_weights, _load_weights, \
     _save_standard_weights_dict, _load_standard_weights_dict
+from .callbacks import _CallbackList, _NO_CALLBACKS
+from .mixed_precision import _mixed_precision
+from .profiler import _NULL_PROFILER, _null_phase
 from .utils import WithLoss, WithGradPD, WithGradMS, WithGradTF, TrainOneStepWithPD, \
     TrainOneStepWithMS, TrainOneStepWithTH, TrainOneStepWithTF, GradWrap, \
     TrainOneStepWithGradientClippingTF, TrainOneStepWithGradientClippingPD, TrainOneStepWithGradientClippingTH
 import tensorlayerx as tlx
+from tensorlayerx import logging
 from tensorlayerx.nn import Module
+from tensorlayerx.utils.distributed import (
+    all_reduce_gradients, broadcast_weights, get_world_size, is_initialized, partition_dataset
+)
 import numpy as np
 import time
 
 if tlx.BACKEND == 'tensorflow':
     import tensorflow as tf
 if tlx.BACKEND == 'mindspore':
+    import mindspore as ms
     from mindspore.ops import operations as P
 if tlx.BACKEND == 'paddle':
     import paddle as pd
@@ -87,56 +96,182 @@ class Model:
         self.metrics = metrics
         self.all_weights = network.all_weights
         self.train_weights = self.network.trainable_weights
+        self.stop_training = False
 
-    def train(self, n_epoch, train_dataset=None, test_dataset=False, print_train_batch=False, print_freq=5):
+    def train(
+        self, n_epoch, train_dataset=None, test_dataset=False, print_train_batch=False, print_freq=5, compile=False,
+        accumulate_steps=1, distributed=False, profiler=None, callbacks=None, mixed_precision=None
+    ):
+        """Train the network.
+
+        Parameters
+        ----------
+        n_epoch : int
+            The number of epochs.
+        train_dataset : Iterable
+            Yields batches of ``(inputs, labels)``, e.g. a :class:`tensorlayerx.dataflow.DataLoader`.
+        test_dataset : Iterable
+            If given, the network is evaluated on it every ``print_freq`` epochs, see :meth:`eval`. Default False.
+        print_train_batch : bool
+            If True, the training loss and accuracy are printed after every batch. Default False.
+        print_freq : int
+            The frequency in epochs of printing the training and validation results. Default 5.
+        compile : bool
+            If True, the training step is captured into a graph, with ``tf.function`` for TensorFlow,
+            ``torch.compile`` for PyTorch, ``paddle.jit.to_static`` for PaddlePaddle and ``mindspore.jit`` for
+            MindSpore. A graph is built for every distinct shape of the batches, so a smaller last batch costs one
+            more capture instead of a retrace every epoch. If the capture fails, a warning is logged and the
+            training continues eagerly. Default False.
+        accumulate_steps : int
+            If greater than 1, every batch is split into ``accumulate_steps`` micro-batches whose gradients are
+            summed before the optimizer is applied once, which trains with the batch size of the dataset while only
+            the activations of a micro-batch are held in memory. The loss of every micro-batch is scaled by its share
+            of the batch, so the update is the same as without accumulation. Default 1.
+        distributed : bool
+            If True, the network is trained data-parallel by the processes of the group joined with
+            :func:`tensorlayerx.utils.distributed.init_process_group` or started by
+            :func:`tensorlayerx.utils.distributed.spawn`. The weights of rank 0 are broadcast to all processes, every
+            process reads its part of ``train_dataset`` (see :func:`tensorlayerx.utils.distributed.partition_dataset`)
+            and the gradients are averaged over the processes before every update. Default False.
+        profiler : :class:`Profiler` or None
+            If given, the time of every training step is recorded per phase into the profiler, and with
+            ``module_timing=True`` the forward calls of the sub-modules of the network. A captured graph has no
+            module boundaries, so with ``compile=True`` the modules are not timed. Default None.
+        callbacks : list of :class:`Callback` or None
+            Called at the beginning and the end of the training, of every epoch and of every batch, e.g.
+            :class:`EarlyStopping`, :class:`ModelCheckpoint`, :class:`LearningRateScheduler` and
+            :class:`ThroughputLogger`. The validation results are passed to the callbacks in the epochs the network
+            is validated. A callback stops the training by setting ``model.stop_training = True``. Default None.
+        mixed_precision : str, :class:`MixedPrecision` or None
+            If 'bfloat16' or 'float16', or a :class:`MixedPrecision` policy, the forward pass runs in autocast with
+            float32 master weights, and float16 losses are scaled dynamically. Only supported by PyTorch and
+            PaddlePaddle. Default None.
+
+        Examples
+        --------
+        >>> model = tlx.model.Model(network=net, loss_fn=tlx.losses.softmax_cross_entropy_with_logits, optimizer=optimizer)
+        >>> model.train(n_epoch=10, train_dataset=train_loader, test_dataset=test_loader, compile=True)
+        >>> # a batch of 512 samples in 8 micro-batches of 64
+        >>> model.train(n_epoch=10, train_dataset=tlx.dataflow.DataLoader(train_dataset, batch_size=512), accumulate_steps=8)
+        >>> profiler = tlx.model.Profiler()
+        >>> model.train(n_epoch=1, train_dataset=train_loader, profiler=profiler)
+        >>> profiler.export_chrome_trace('train_trace.json')
+        >>> early_stopping = tlx.model.EarlyStopping(monitor='val_loss', patience=3)
+        >>> model.train(n_epoch=100, train_dataset=train_loader, test_dataset=val_loader, print_freq=1, callbacks=[early_stopping])
+        >>> model.train(n_epoch=10, train_dataset=train_loader, mixed_precision='bfloat16')
+
+        """
         if not isinstance(train_dataset, Iterable):
             raise Exception("Expected type in (train_dataset, Iterable), but got {}.".format(type(train_dataset)))
-
+        _check_accumulate_steps(accumulate_steps)
+        if distributed:
+            if not is_initialized():
+                raise RuntimeError(
+                    "distributed=True requires a process group, call tlx.utils.distributed.init_process_group "
+                    "or start the processes with tlx.utils.distributed.spawn."
+                )
+            distributed = get_world_size() > 1
+        if distributed:
+            train_dataset = partition_dataset(train_dataset)
+            broadcast_weights(self.all_weights)
+        if profiler is None:
+            profiler = _NULL_PROFILER
+        callbacks = _CallbackList(callbacks, self) if callbacks else _NO_CALLBACKS
+        mixed_precision = _mixed_precision(mixed_precision)
+        if mixed_precision is not None:
+            mixed_precision.attach(self.network)
+        if profiler.module_timing:
+            if compile:
+                logging.warning("module timing is disabled, the sub-modules of a compiled network are not timed.")
+            else:
+                profiler.attach(self.network)
+
+        self.stop_training = False
+        try:
+            callbacks.on_train_begin({})
+            self._train(
+                n_epoch, train_dataset, test_dataset, print_train_batch, print_freq, compile, accumulate_steps,
+                distributed, profiler, callbacks, mixed_precision
+            )
+            callbacks.on_train_end({})
+        finally:
+            profiler.detach()
+            if mixed_precision is not None:
+                mixed_precision.detach()
+
+    def _train(
+        self, n_epoch, train_dataset, test_dataset, print_train_batch, print_freq, compile, accumulate_steps,
+        distributed, profiler, callbacks, mixed_precision
+    ):
         if tlx.BACKEND == 'tensorflow':
             self.tf_train(
                 n_epoch=n_epoch, train_dataset=train_dataset, network=self.network, loss_fn=self.loss_fn,
                 train_weights=self.train_weights, optimizer=self.optimizer, metrics=self.metrics,
-                print_train_batch=print_train_batch, print_freq=print_freq, test_dataset=test_dataset
+                print_train_batch=print_train_batch, print_freq=print_freq, test_dataset=test_dataset,
+                compile=compile, accumulate_steps=accumulate_steps, distributed=distributed, profiler=profiler,
+                callbacks=callbacks, mixed_precision=mixed_precision
             )
         elif tlx.BACKEND == 'mindspore':
             self.ms_train(
                 n_epoch=n_epoch, train_dataset=train_dataset, network=self.network, loss_fn=self.loss_fn,
                 train_weights=self.train_weights, optimizer=self.optimizer, metrics=self.metrics,
-                print_train_batch=print_train_batch, print_freq=print_freq, test_dataset=test_dataset
+                print_train_batch=print_train_batch, print_freq=print_freq, test_dataset=test_dataset,
+                compile=compile, accumulate_steps=accumulate_steps, distributed=distributed, profiler=profiler,
+                callbacks=callbacks, mixed_precision=mixed_precision
             )
         elif tlx.BACKEND == 'paddle':
             self.pd_train(
                 n_epoch=n_epoch, train_dataset=train_dataset, network=self.network, loss_fn=self.loss_fn,
                 train_weights=self.train_weights, optimizer=self.optimizer, metrics=self.metrics,
-                print_train_batch=print_train_batch, print_freq=print_freq, test_dataset=test_dataset
+                print_train_batch=print_train_batch, print_freq=print_freq, test_dataset=test_dataset,
+                compile=compile, accumulate_steps=accumulate_steps, distributed=distributed, profiler=profiler,
+                callbacks=callbacks, mixed_precision=mixed_precision
             )
         elif tlx.BACKEND == 'torch':
             self.th_train(
                 n_epoch=n_epoch, train_dataset=train_dataset, network=self.network, loss_fn=self.loss_fn,
                 train_weights=self.train_weights, optimizer=self.optimizer, metrics=self.metrics,
-                print_train_batch=print_train_batch, print_freq=print_freq, test_dataset=test_dataset
+                print_train_batch=print_train_batch, print_freq=print_freq, test_dataset=test_dataset,
+                compile=compile, accumulate_steps=accumulate_steps, distributed=distributed, profiler=profiler,
+                callbacks=callbacks, mixed_precision=mixed_precision
             )
 
-    def eval(self, test_dataset):
-        self.network.set_eval()
-        test_loss, test_acc, n_iter = 0, 0, 0
-        for X_batch, y_batch in test_dataset:
-            _logits = self.network(X_batch)
-            test_loss += self.loss_fn(_logits, y_batch)
-            if self.metrics:
-                try:
-                    test_acc += self.metrics(_logits, y_batch)
-                except:
-                    self.metrics.update(_logits, y_batch)
-                    test_acc += self.metrics.result()
-                    self.metrics.reset()
-            else:
-                test_acc += np.mean(np.equal(np.argmax(_logits, 1), y_batch))
-            n_iter += 1
-        print("   test loss: {}".format(test_loss / n_iter))
-        print("   test acc:  {}".format(test_acc / n_iter))
+    def eval(self, test_dataset, sync_every=None):
+        """Evaluate the network on a dataset without computing gradients.
 
-    def save_standard_weights(self, file_path):
+        The loss and the metrics are accumulated on the device of the network and copied to the host once at the
+        end, or every ``sync_every`` batches to report progress.
+
+        Parameters
+        ----------
+        test_dataset : Iterable
+            Yields batches of ``(inputs, labels)``, e.g. a :class:`tensorlayerx.dataflow.DataLoader`.
+        sync_every : int or None
+            If set, the running loss is copied to the host and logged every ``sync_every`` batches. Default None.
+
+        Returns
+        -------
+        dict
+            The mean ``loss`` per sample, ``metrics`` a dict from the name of every metric to its value (``acc`` if
+            the model has no metrics), ``num_samples``, ``num_batches``, the elapsed ``time`` in seconds and the
+            throughput ``samples_per_sec``.
+
+        Examples
+        --------
+        >>> model = tlx.model.Model(network=net, loss_fn=tlx.losses.softmax_cross_entropy_with_logits, metrics=tlx.metrics.Accuracy())
+        >>> result = model.eval(test_loader)
+        >>> print(result['loss'], result['metrics']['accuracy'], result['samples_per_sec'])
+
+        """
+        result = _evaluate(self.network, test_dataset, self.loss_fn, self.metrics, sync_every)
+        logging.info(
+            "eval loss: {} metrics: {} ({:.1f} samples/s)".format(
+                result['loss'], result['metrics'], result['samples_per_sec']
+            )
+        )
+        return result
+
+    def save_standard_weights(self, file_path, format='npz_dict'):
         """Save to standard format parameter format as {conv.filters: filters_param, conv.biases: biases_parm,
         linear.weights: weights_parm ...}
 
@@ -144,10 +279,13 @@ class Model:
         ----------
         file_path : str
             Name of the saved file
+        format : str
+            'npz_dict' or 'safetensors', an uncompressed file with an offset table which is memory-mapped when
+            loading. Default 'npz_dict'.
 
         """
 
-        _save_standard_weights_dict(self.network, file_path)
+        _save_standard_weights_dict(self.network, file_path, format)
 
     def load_standard_weights(self, file_path, skip=False, reshape=False, format='npz_dict'):
         """
@@ -163,12 +301,14 @@ class Model:
             This parameter needs to be set to True when importing parameters from tensorflow training to paddle/mindspore/pytorch,
             and similarly when importing parameters from paddle/mindspore/pytorch training to tensorflow.
             This parameter does not need to be set between paddle/mindspore/pytorch.
+        format : str
+            'npz_dict', 'npz' or 'safetensors'. Default 'npz_dict'.
 
         """
 
         _load_standard_weights_dict(self.network, file_path, skip, reshape, format)
 
-    def save_weights(self, file_path, format=None):
+    def save_weights(self, file_path, format=None, async_save=False):
         """Input file_path, save model weights into a file of given format.
             Use self.load_weights() to restore.
 
@@ -178,16 +318,23 @@ class Model:
             Filename to which the model weights will be saved.
         format : str or None
             Saved file format.
-            Value should be None, 'hdf5', 'npz', 'npz_dict' or 'ckpt'. Other format is not supported now.
+            Value should be None, 'hdf5', 'npz', 'npz_dict', 'safetensors' or 'ckpt'. Other format is not supported now.
             1) If this is set to None, then the postfix of file_path will be used to decide saved format.
-            If the postfix is not in ['h5', 'hdf5', 'npz', 'ckpt'], then file will be saved in hdf5 format by default.
+            If the postfix is not in ['h5', 'hdf5', 'npz', 'safetensors', 'ckpt'], then file will be saved in hdf5
+            format by default.
             2) 'hdf5' will save model weights name in a list and each layer has its weights stored in a group of
             the hdf5 file.
             3) 'npz' will save model weights sequentially into a npz file.
             4) 'npz_dict' will save model weights along with its name as a dict into a npz file.
-            5) 'ckpt' will save model weights into a tensorflow ckpt file.
+            5) 'safetensors' will save model weights by name into an uncompressed file with an offset table, which
+            is memory-mapped when loading.
+            6) 'ckpt' will save model weights into a tensorflow ckpt file.
 
             Default None.
+        async_save : bool
+            If True, the weights are copied to host memory and written by a background thread, use
+            tlx.files.wait_for_saves() to wait for the file. Only supported by 'npz', 'npz_dict' and
+            'safetensors'. Default False.
 
         Examples
         --------
@@ -204,9 +351,13 @@ class Model:
         >>> model.save_weights('./model.npz')
         >>> model.save_weights('./model.npz', format='npz_dict')
 
+        3) Save model weights without stalling training, the file is written to a temporary name and renamed
+        >>> model.save_weights('./model.npz', format='npz_dict', async_save=True)
+        >>> tlx.files.wait_for_saves()
+
         """
 
-        _save_weights(net=self.network, file_path=file_path, format=format)
+        _save_weights(net=self.network, file_path=file_path, format=format, async_save=async_save)
 
     def load_weights(self, file_path, format=None, in_order=True, skip=False):
         """Load model weights from a given file, which should be previously saved by self.save_weights().
@@ -217,7 +368,7 @@ class Model:
             Filename from which the model weights will be loaded.
         format : str or None
             If not specified (None), the postfix of the file_path will be used to decide its format. If specified,
-            value should be 'hdf5', 'npz', 'npz_dict' or 'ckpt'. Other format is not supported now.
+            value should be 'hdf5', 'npz', 'npz_dict', 'safetensors' or 'ckpt'. Other format is not supported now.
             In addition, it should be the same format when you saved the file using self.save_weights().
             Default is None.
         in_order : bool
@@ -229,7 +380,7 @@ class Model:
             Default is True.
         skip : bool
             Allow skipping weights whose name is mismatched between the file and model. Only useful when 'format' is
-            'hdf5' or 'npz_dict'. If 'skip' is True, 'in_order' argument will be ignored and those loaded weights
+            'hdf5', 'npz_dict' or 'safetensors'. If 'skip' is True, 'in_order' argument will be ignored and those loaded weights
             whose name is not found in model weights (self.all_weights) will be skipped. If 'skip' is False, error will
             occur when mismatch is found.
             Default is False.
@@ -263,32 +414,37 @@ class Model:
 
     def tf_train(
         self, n_epoch, train_dataset, network, loss_fn, train_weights, optimizer, metrics, print_train_batch,
-        print_freq, test_dataset
+        print_freq, test_dataset, compile=False, accumulate_steps=1, distributed=False, profiler=_NULL_PROFILER,
+        callbacks=_NO_CALLBACKS, mixed_precision=None
     ):
+        train_step = _make_train_step(
+            network, loss_fn, train_weights, optimizer, compile, accumulate_steps, distributed, profiler.phase,
+            mixed_precision
+        )
         for epoch in range(n_epoch):
             start_time = time.time()
+            callbacks.on_epoch_begin(epoch, {})
 
             train_loss, train_acc, n_iter = 0, 0, 0
-            for X_batch, y_batch in train_dataset:
+            for X_batch, y_batch in profiler.iterate(train_dataset, epoch):
+                if callbacks.batch_hooks:
+                    callbacks.on_batch_begin(n_iter, {'size': _batch_size(y_batch)})
                 network.set_train()
-
-                with tf.GradientTape() as tape:
-                    # compute outputs
-                    _logits = network(X_batch)
-                    # compute loss and update model
-                    _loss_ce = loss_fn(_logits, y_batch)
-
-                grad = tape.gradient(_loss_ce, train_weights)
-                optimizer.apply_gradients(zip(grad, train_weights))
-
-                train_loss += _loss_ce
-                if metrics:
-                    metrics.update(_logits, y_batch)
-                    train_acc += metrics.result()
-                    metrics.reset()
-                else:
-                    train_acc += np.mean(np.equal(np.argmax(_logits, 1), y_batch))
+                _logits, _loss_ce = train_step(X_batch, y_batch)
+
+                with profiler.phase('metric'):
+                    train_loss += _loss_ce
+                    if metrics:
+                        metrics.update(_logits, y_batch)
+                        train_acc += metrics.result()
+                        metrics.reset()
+                    else:
+                        train_acc += np.mean(np.equal(np.argmax(_logits, 1), y_batch))
                 n_iter += 1
+                if callbacks.batch_hooks:
+                    callbacks.on_batch_end(n_iter - 1, {'size': _batch_size(y_batch), 'loss': _loss_ce})
+                    if self.stop_training:
+                        break
 
                 if print_train_batch:
                     print("Epoch {} of {} took {}".format(epoch + 1, n_epoch, time.time() - start_time))
@@ -300,48 +456,50 @@ class Model:
                 print("   train loss: {}".format(train_loss / n_iter))
                 print("   train acc:  {}".format(train_acc / n_iter))
 
+            logs = {'loss': _to_float(train_loss) / max(n_iter, 1), 'acc': _to_float(train_acc) / max(n_iter, 1)}
             if test_dataset:
                 # use training and evaluation sets to evaluate the model every print_freq epoch
                 if epoch + 1 == 1 or (epoch + 1) % print_freq == 0:
-                    network.set_eval()
-                    val_loss, val_acc, n_iter = 0, 0, 0
-                    for X_batch, y_batch in test_dataset:
-                        _logits = network(X_batch)  # is_train=False, disable dropout
-                        val_loss += loss_fn(_logits, y_batch)
-                        if metrics:
-                            metrics.update(_logits, y_batch)
-                            val_acc += metrics.result()
-                            metrics.reset()
-                        else:
-                            val_acc += np.mean(np.equal(np.argmax(_logits, 1), y_batch))
-                        n_iter += 1
-                    print("   val loss: {}".format(val_loss / n_iter))
-                    print("   val acc:  {}".format(val_acc / n_iter))
+                    result = _evaluate(network, test_dataset, loss_fn, metrics)
+                    print("   val loss: {}".format(result['loss']))
+                    for name, value in result['metrics'].items():
+                        print("   val {}:  {}".format(name, value))
+                    logs.update(_val_logs(result))
+            callbacks.on_epoch_end(epoch, logs)
+            if self.stop_training:
+                break
 
     def ms_train(
         self, n_epoch, train_dataset, network, loss_fn, train_weights, optimizer, metrics, print_train_batch,
-        print_freq, test_dataset
+        print_freq, test_dataset, compile=False, accumulate_steps=1, distributed=False, profiler=_NULL_PROFILER,
+        callbacks=_NO_CALLBACKS, mixed_precision=None
     ):
-        net_with_criterion = WithLoss(network, loss_fn)
-        train_network = GradWrap(net_with_criterion, network.trainable_weights)
-        train_network.set_train()
+        train_step = _make_train_step(
+            network, loss_fn, train_weights, optimizer, compile, accumulate_steps, distributed, profiler.phase,
+            mixed_precision
+        )
         for epoch in range(n_epoch):
             start_time = time.time()
+            callbacks.on_epoch_begin(epoch, {})
             train_loss, train_acc, n_iter = 0, 0, 0
-            for X_batch, y_batch in train_dataset:
-                output = network(X_batch)
-                loss_output = loss_fn(output, y_batch)
-                grads = train_network(X_batch, y_batch)
-                success = optimizer.apply_gradients(zip(grads, train_weights))
-                loss = loss_output.asnumpy()
-                train_loss += loss
-                if metrics:
-                    metrics.update(output, y_batch)
-                    train_acc += metrics.result()
-                    metrics.reset()
-                else:
-                    train_acc += np.mean((P.Equal()(P.Argmax(axis=1)(output), y_batch).asnumpy()))
+            for X_batch, y_batch in profiler.iterate(train_dataset, epoch):
+                if callbacks.batch_hooks:
+                    callbacks.on_batch_begin(n_iter, {'size': _batch_size(y_batch)})
+                output, loss_output = train_step(X_batch, y_batch)
+                with profiler.phase('metric'):
+                    loss = loss_output.asnumpy()
+                    train_loss += loss
+                    if metrics:
+                        metrics.update(output, y_batch)
+                        train_acc += metrics.result()
+                        metrics.reset()
+                    else:
+                        train_acc += np.mean((P.Equal()(P.Argmax(axis=1)(output), y_batch).asnumpy()))
                 n_iter += 1
+                if callbacks.batch_hooks:
+                    callbacks.on_batch_end(n_iter - 1, {'size': _batch_size(y_batch), 'loss': loss_output})
+                    if self.stop_training:
+                        break
 
                 if print_train_batch:
                     print("Epoch {} of {} took {}".format(epoch + 1, n_epoch, time.time() - start_time))
@@ -353,49 +511,52 @@ class Model:
                 print("   train loss: {}".format(train_loss / n_iter))
                 print("   train acc:  {}".format(train_acc / n_iter))
 
+            logs = {'loss': _to_float(train_loss) / max(n_iter, 1), 'acc': _to_float(train_acc) / max(n_iter, 1)}
             if test_dataset:
                 # use training and evaluation sets to evaluate the model every print_freq epoch
                 if epoch + 1 == 1 or (epoch + 1) % print_freq == 0:
-                    network.set_eval()
-                    val_loss, val_acc, n_iter = 0, 0, 0
-                    for X_batch, y_batch in test_dataset:
-                        _logits = network(X_batch)
-                        val_loss += loss_fn(_logits, y_batch)
-                        if metrics:
-                            metrics.update(_logits, y_batch)
-                            val_acc += metrics.result()
-                            metrics.reset()
-                        else:
-                            val_acc += np.mean((P.Equal()(P.Argmax(axis=1)(_logits), y_batch).asnumpy()))
-                        n_iter += 1
-                    print("   val loss: {}".format(val_loss / n_iter))
-                    print("   val acc:  {}".format(val_acc / n_iter))
+                    result = _evaluate(network, test_dataset, loss_fn, metrics)
+                    print("   val loss: {}".format(result['loss']))
+                    for name, value in result['metrics'].items():
+                        print("   val {}:  {}".format(name, value))
+                    logs.update(_val_logs(result))
+            callbacks.on_epoch_end(epoch, logs)
+            if self.stop_training:
+                break
 
     def pd_train(
         self, n_epoch, train_dataset, network, loss_fn, train_weights, optimizer, metrics, print_train_batch,
-        print_freq, test_dataset
+        print_freq, test_dataset, compile=False, accumulate_steps=1, distributed=False, profiler=_NULL_PROFILER,
+        callbacks=_NO_CALLBACKS, mixed_precision=None
     ):
+        train_step = _make_train_step(
+            network, loss_fn, train_weights, optimizer, compile, accumulate_steps, distributed, profiler.phase,
+            mixed_precision
+        )
         for epoch in range(n_epoch):
             start_time = time.time()
+            callbacks.on_epoch_begin(epoch, {})
 
             train_loss, train_acc, n_iter = 0, 0, 0
-            for X_batch, y_batch in train_dataset:
+            for X_batch, y_batch in profiler.iterate(train_dataset, epoch):
+                if callbacks.batch_hooks:
+                    callbacks.on_batch_begin(n_iter, {'size': _batch_size(y_batch)})
                 network.set_train()
-
-                output = network(X_batch)
-                loss = loss_fn(output, y_batch)
-                loss_ce = loss.numpy()
-                grads = optimizer.gradient(loss, train_weights)
-                optimizer.apply_gradients(zip(grads, train_weights))
-
-                train_loss += loss_ce
-                if metrics:
-                    metrics.update(output, y_batch)
-                    train_acc += metrics.result()
-                    metrics.reset()
-                else:
-                    train_acc += pd.metric.accuracy(output, y_batch)
+                output, loss = train_step(X_batch, y_batch)
+                with profiler.phase('metric'):
+                    loss_ce = loss.numpy()
+                    train_loss += loss_ce
+                    if metrics:
+                        metrics.update(output, y_batch)
+                        train_acc += metrics.result()
+                        metrics.reset()
+                    else:
+                        train_acc += pd.metric.accuracy(output, y_batch)
                 n_iter += 1
+                if callbacks.batch_hooks:
+                    callbacks.on_batch_end(n_iter - 1, {'size': _batch_size(y_batch), 'loss': loss})
+                    if self.stop_training:
+                        break
 
                 if print_train_batch:
                     print("Epoch {} of {} took {}".format(epoch + 1, n_epoch, time.time() - start_time))
@@ -407,49 +568,54 @@ class Model:
                 print("   train loss: {}".format(train_loss / n_iter))
                 print("   train acc:  {}".format(train_acc / n_iter))
 
+            logs = {'loss': _to_float(train_loss) / max(n_iter, 1), 'acc': _to_float(train_acc) / max(n_iter, 1)}
             if test_dataset:
                 # use training and evaluation sets to evaluate the model every print_freq epoch
                 if epoch + 1 == 1 or (epoch + 1) % print_freq == 0:
-                    network.set_eval()
-                    val_loss, val_acc, n_iter = 0, 0, 0
-                    for X_batch, y_batch in test_dataset:
-                        _logits = network(X_batch)  # is_train=False, disable dropout
-                        val_loss += loss_fn(_logits, y_batch)
-                        if metrics:
-                            metrics.update(_logits, y_batch)
-                            val_acc += metrics.result()
-                            metrics.reset()
-                        else:
-                            val_acc += np.mean(np.equal(np.argmax(_logits, 1), y_batch))
-                        n_iter += 1
-                    print("   val loss: {}".format(val_loss / n_iter))
-                    print("   val acc:  {}".format(val_acc / n_iter))
+                    result = _evaluate(network, test_dataset, loss_fn, metrics)
+                    print("   val loss: {}".format(result['loss']))
+                    for name, value in result['metrics'].items():
+                        print("   val {}:  {}".format(name, value))
+                    logs.update(_val_logs(result))
+            callbacks.on_epoch_end(epoch, logs)
+            if self.stop_training:
+                break
 
     def th_train(
         self, n_epoch, train_dataset, network, loss_fn, train_weights, optimizer, metrics, print_train_batch,
-        print_freq, test_dataset
+        print_freq, test_dataset, compile=False, accumulate_steps=1, distributed=False, profiler=_NULL_PROFILER,
+        callbacks=_NO_CALLBACKS, mixed_precision=None
     ):
         # device = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
         # network = network.to(device)
+        train_step = _make_train_step(
+            network, loss_fn, train_weights, optimizer, compile, accumulate_steps, distributed, profiler.phase,
+            mixed_precision
+        )
         for epoch in range(n_epoch):
             start_time = time.time()
+            callbacks.on_epoch_begin(epoch, {})
 
             train_loss, train_acc, n_iter = 0, 0, 0
-            for X_batch, y_batch in train_dataset:
+            for X_batch, y_batch in profiler.iterate(train_dataset, epoch):
+                if callbacks.batch_hooks:
+                    callbacks.on_batch_begin(n_iter, {'size': _batch_size(y_batch)})
                 network.set_train()
-                output = network(X_batch)
-                loss = loss_fn(output, y_batch)
-                grads = optimizer.gradient(loss, train_weights)
-                optimizer.apply_gradients(zip(grads, train_weights))
-
-                train_loss += loss
-                if metrics:
-                    metrics.update(output, y_batch)
-                    train_acc += metrics.result()
-                    metrics.reset()
-                else:
-                    train_acc += (output.argmax(1) == y_batch).type(torch.float).sum().item()
+                output, loss = train_step(X_batch, y_batch)
+
+                with profiler.phase('metric'):
+                    train_loss += loss
+                    if metrics:
+                        metrics.update(output, y_batch)
+                        train_acc += metrics.result()
+                        metrics.reset()
+                    else:
+                        train_acc += (output.argmax(1) == y_batch).type(torch.float).sum().item()
                 n_iter += 1
+                if callbacks.batch_hooks:
+                    callbacks.on_batch_end(n_iter - 1, {'size': _batch_size(y_batch), 'loss': loss})
+                    if self.stop_training:
+                        break
 
                 if print_train_batch:
                     print("Epoch {} of {} took {}".format(epoch + 1, n_epoch, time.time() - start_time))
@@ -461,23 +627,443 @@ class Model:
                 print("   train loss: {}".format(train_loss / n_iter))
                 print("   train acc:  {}".format(train_acc / n_iter))
 
+            logs = {'loss': _to_float(train_loss) / max(n_iter, 1), 'acc': _to_float(train_acc) / max(n_iter, 1)}
             if test_dataset:
                 # use training and evaluation sets to evaluate the model every print_freq epoch
                 if epoch + 1 == 1 or (epoch + 1) % print_freq == 0:
-                    network.set_eval()
-                    val_loss, val_acc, n_iter = 0, 0, 0
-                    for X_batch, y_batch in test_dataset:
-                        _logits = network(X_batch)  # is_train=False, disable dropout
-                        val_loss += loss_fn(_logits, y_batch)
-                        if metrics:
-                            metrics.update(_logits, y_batch)
-                            val_acc += metrics.result()
-                            metrics.reset()
-                        else:
-                            val_acc += (_logits.argmax(1) == y_batch).type(torch.float).sum().item()
-                        n_iter += 1
-                    print("   val loss: {}".format(val_loss / n_iter))
-                    print("   val acc:  {}".format(val_acc / n_iter))
+                    result = _evaluate(network, test_dataset, loss_fn, metrics)
+                    print("   val loss: {}".format(result['loss']))
+                    for name, value in result['metrics'].items():
+                        print("   val {}:  {}".format(name, value))
+                    logs.update(_val_logs(result))
+            callbacks.on_epoch_end(epoch, logs)
+            if self.stop_training:
+                break
+
+
+def _signature(value):
+    # the shapes and dtypes of the inputs, nested like the inputs
+    if isinstance(value, (list, tuple)):
+        return tuple(_signature(v) for v in value)
+    if isinstance(value, dict):
+        return tuple((k, _signature(v)) for k, v in sorted(value.items()))
+    shape = getattr(value, 'shape', None)
+    if shape is None:
+        return value
+    return tuple(shape), str(getattr(value, 'dtype', None))
+
+
+class _CompiledFunction(object):
+    """Calls ``fn`` through a graph captured by ``compile_fn``, one per signature of the arguments.
+
+    The first call with a new signature captures a graph. If the capture fails, a warning is logged and all later
+    calls run ``fn`` eagerly.
+    """
+
+    def __init__(self, fn, compile_fn):
+        self._fn = fn
+        self._compile_fn = compile_fn
+        self._graphs = {}
+        self.eager = False
+
+    @property
+    def num_graphs(self):
+        return len(self._graphs)
+
+    def __call__(self, *args):
+        if self.eager:
+            return self._fn(*args)
+        key = _signature(args)
+        graph = self._graphs.get(key)
+        if graph is not None:
+            return graph(*args)
+        try:
+            graph = self._compile_fn(self._fn)
+            outputs = graph(*args)
+        except Exception as e:
+            logging.warning("Capturing the training step failed, falling back to eager execution: {}".format(e))
+            self.eager = True
+            return self._fn(*args)
+        self._graphs[key] = graph
+        return outputs
+
+
+def _compile_fn():
+    if tlx.BACKEND == 'tensorflow':
+        return tf.function
+    elif tlx.BACKEND == 'torch':
+        if not hasattr(torch, 'compile'):
+            raise RuntimeError("compile=True requires torch.compile, which is available from PyTorch 2.0.")
+        # every signature gets its own graph, so the shapes can be static
+        return lambda fn: torch.compile(fn, dynamic=False)
+    elif tlx.BACKEND == 'paddle':
+        return pd.jit.to_static
+    elif tlx.BACKEND == 'mindspore':
+        return ms.jit if hasattr(ms, 'jit') else ms.ms_function
+    raise NotImplementedError("compile=True is not supported by the {} backend.".format(tlx.BACKEND))
+
+
+def _identity(value):
+    return value
+
+
+def _make_train_step(
+    network, loss_fn, train_weights, optimizer, compile=False, accumulate_steps=1, distributed=False,
+    phase=_null_phase, mixed_precision=None
+):
+    """Returns a function running one training step on a batch, which returns the outputs and the loss.
+
+    With ``compile=True`` the part of the step which can be captured is wrapped in a :class:`_CompiledFunction`.
+    TensorFlow captures the forward pass, the gradients and the update in one graph. PyTorch and PaddlePaddle
+    capture the forward pass and the loss, whose backward graph is captured with it, while the optimizer update
+    runs eagerly. MindSpore captures the forward pass and the gradients. With ``distributed=True`` the gradients
+    are averaged over the processes of the group between the backward pass and the update. ``phase(name)``
+    returns a context manager timing a phase of the step, see :class:`Profiler`. ``mixed_precision`` is a
+    :class:`MixedPrecision` policy or None.
+    """
+    reduce_grads = all_reduce_gradients if distributed else _identity
+    if mixed_precision is not None:
+        forward = mixed_precision.forward(network, loss_fn)
+    else:
+
+        def forward(X_batch, y_batch):
+            output = network(X_batch)
+            return output, loss_fn(output, y_batch)
+
+    if accumulate_steps > 1:
+        return _make_accumulating_step(
+            forward, WithLoss(network, loss_fn), train_weights, optimizer, accumulate_steps, compile, reduce_grads,
+            phase, mixed_precision
+        )
+
+    if tlx.BACKEND == 'tensorflow':
+
+        def make_step(phase):
+
+            def step(X_batch, y_batch):
+                with tf.GradientTape() as tape:
+                    with phase('forward'):
+                        # compute outputs
+                        _logits = network(X_batch)
+                        # compute loss and update model
+                        _loss = loss_fn(_logits, y_batch)
+                with phase('backward'):
+                    grad = tape.gradient(_loss, train_weights)
+                with phase('communication'):
+                    grad = reduce_grads(grad)
+                with phase('optimizer'):
+                    optimizer.apply_gradients(zip(grad, train_weights))
+                return _logits, _loss
+
+            return step
+
+        return _with_phases(make_step, phase, compile)
+
+    if tlx.BACKEND == 'mindspore':
+        net_with_criterion = WithLoss(network, loss_fn)
+        train_network = GradWrap(net_with_criterion, network.trainable_weights)
+        train_network.set_train()
+
+        def make_forward(phase):
+
+            def forward(X_batch, y_batch):
+                with phase('forward'):
+                    output = network(X_batch)
+                    loss = loss_fn(output, y_batch)
+                with phase('backward'):
+                    grads = train_network(X_batch, y_batch)
+                return output, loss, grads
+
+            return forward
+
+        forward = _with_phases(make_forward, phase, compile)
+
+        def step(X_batch, y_batch):
+            output, loss, grads = forward(X_batch, y_batch)
+            with phase('communication'):
+                grads = reduce_grads(grads)
+            with phase('optimizer'):
+                optimizer.apply_gradients(zip(grads, train_weights))
+            return output, loss
+
+        return step
+
+    return _make_eager_step(forward, train_weights, optimizer, compile, reduce_grads, phase, mixed_precision)
+
+
+def _make_eager_step(
+    forward, train_weights, optimizer, compile=False, reduce_grads=_identity, phase=_null_phase, mixed_precision=None
+):
+    # the PyTorch and PaddlePaddle step, forward(X, y) returns the outputs and the loss
+    if compile:
+        forward = _CompiledFunction(forward, _compile_fn())
+
+    def step(X_batch, y_batch):
+        with phase('forward'):
+            output, loss = forward(X_batch, y_batch)
+        with phase('backward'):
+            grads = optimizer.gradient(_scale_loss(loss, mixed_precision), train_weights)
+        with phase('communication'):
+            grads = reduce_grads(grads)
+        with phase('optimizer'):
+            _apply_gradients(optimizer, grads, train_weights, mixed_precision)
+        return output, loss
+
+    return step
+
+
+def _scale_loss(loss, mixed_precision):
+    return loss if mixed_precision is None else mixed_precision.scale_loss(loss)
+
+
+def _apply_gradients(optimizer, grads, train_weights, mixed_precision=None, grad_clip=None):
+    # with a loss scaler the gradients are unscaled, and the update is skipped if they overflowed
+    if mixed_precision is not None and not mixed_precision.unscale(grads, train_weights):
+        return
+    if grad_clip is not None:
+        grad_clip(train_weights)
+    optimizer.apply_gradients(zip(grads, train_weights))
+
+
+def _unclipped_gradient(optimizer, loss, weights):
+    # the torch optimizers clip the gradients in gradient(), the gradients of the micro-batches are clipped once
+    # they are summed instead, otherwise the clipped pieces add up to more than the clipping norm
+    grad_clip = getattr(optimizer, 'grad_clip', None)
+    optimizer.grad_clip = None
+    try:
+        return optimizer.gradient(loss, weights)
+    finally:
+        optimizer.grad_clip = grad_clip
+
+
+def _with_phases(make_fn, phase, compile):
+    # make_fn(phase) returns a function timing its phases with phase. A captured graph runs all of them at once, its
+    # calls are timed as one 'graph' phase instead, while the phases traced into it are not timed at all.
+    if not compile:
+        return make_fn(phase)
+    graph = _CompiledFunction(make_fn(_null_phase), _compile_fn())
+
+    def fn(*args):
+        with phase('graph'):
+            return graph(*args)
+
+    return fn
+
+
+def _check_accumulate_steps(accumulate_steps):
+    if not isinstance(accumulate_steps, int) or accumulate_steps <= 0:
+        raise ValueError("accumulate_steps should be a positive integer, but got {}.".format(accumulate_steps))
+
+
+def _batch_size(value):
+    while isinstance(value, (list, tuple, dict)):
+        value = next(iter(value.values())) if isinstance(value, dict) else value[0]
+    return int(value.shape[0])
+
+
+def _split_batch(value, num_splits):
+    # splits along the first dimension into at most num_splits non-empty parts of nearly equal size
+    if isinstance(value, (list, tuple)):
+        return [type(value)(parts) for parts in zip(*[_split_batch(v, num_splits) for v in value])]
+    if isinstance(value, dict):
+        keys = list(value.keys())
+        return [dict(zip(keys, parts)) for parts in zip(*[_split_batch(value[k], num_splits) for k in keys])]
+    size = _batch_size(value)
+    bounds = [size * i // num_splits for i in range(num_splits + 1)]
+    return [value[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def _concat_batch(values):
+    if values[0] is None:
+        return None
+    if isinstance(values[0], (list, tuple)):
+        return type(values[0])(_concat_batch(list(parts)) for parts in zip(*values))
+    if isinstance(values[0], dict):
+        return {k: _concat_batch([v[k] for v in values]) for k in values[0]}
+    return tlx.concat(values, 0)
+
+
+def _accumulate_grads(accumulated, grads, scale):
+    if tlx.BACKEND == 'tensorflow':
+        # sparse gradients, e.g. of an embedding, are made dense to be summed
+        grads = [None if g is None else tf.convert_to_tensor(g) for g in grads]
+    grads = [None if g is None else g * scale for g in grads]
+    if accumulated is None:
+        return grads
+    return [g if a is None else a if g is None else a + g for a, g in zip(accumulated, grads)]
+
+
+def _make_accumulating_step(
+    forward, net_with_loss, train_weights, optimizer, accumulate_steps, compile=False, reduce_grads=_identity,
+    phase=_null_phase, mixed_precision=None
+):
+    """Returns a training step which splits every batch into ``accumulate_steps`` micro-batches.
+
+    ``forward(X, y)`` returns the outputs and the loss of a micro-batch. The loss of every micro-batch is scaled by
+    its share of the batch, so the summed gradients and the returned loss are those of the mean loss over the whole
+    batch, and the optimizer is applied once per batch. Only one micro-batch is held in memory for backpropagation.
+    """
+    if tlx.BACKEND == 'tensorflow':
+
+        def make_forward_backward(phase):
+
+            def forward_backward(X_batch, y_batch):
+                with tf.GradientTape() as tape:
+                    with phase('forward'):
+                        output, loss = forward(X_batch, y_batch)
+                with phase('backward'):
+                    grads = tape.gradient(loss, train_weights)
+                return output, loss, grads
+
+            return forward_backward
+
+    elif tlx.BACKEND == 'mindspore':
+        train_network = GradWrap(net_with_loss, train_weights)
+        train_network.set_train()
+
+        def make_forward_backward(phase):
+
+            def forward_backward(X_batch, y_batch):
+                with phase('forward'):
+                    output, loss = forward(X_batch, y_batch)
+                with phase('backward'):
+                    grads = train_network(X_batch, y_batch)
+                return output, loss, grads
+
+            return forward_backward
+
+    elif compile:
+        forward = _CompiledFunction(forward, _compile_fn())
+    if tlx.BACKEND in ('tensorflow', 'mindspore'):
+        forward_backward = _with_phases(make_forward_backward, phase, compile)
+
+    def step(X_batch, y_batch):
+        batch_size = _batch_size(y_batch)
+        outputs, total_loss, grads = [], 0., None
+        for X, y in zip(_split_batch(X_batch, accumulate_steps), _split_batch(y_batch, accumulate_steps)):
+            scale = _batch_size(y) / batch_size
+            if tlx.BACKEND in ('tensorflow', 'mindspore'):
+                output, loss, micro_grads = forward_backward(X, y)
+                grads = _accumulate_grads(grads, micro_grads, scale)
+            else:
+                with phase('forward'):
+                    output, loss = forward(X, y)
+                with phase('backward'):
+                    scaled_loss = _scale_loss(loss * scale, mixed_precision)
+                    if tlx.BACKEND == 'torch':
+                        # gradient() zeroes the gradients of the weights before the backward pass
+                        grads = _accumulate_grads(grads, _unclipped_gradient(optimizer, scaled_loss, train_weights), 1.)
+                    else:
+                        # paddle sums the gradients of the weights until apply_gradients clears them, and clips the
+                        # sum when it applies them
+                        grads = optimizer.gradient(scaled_loss, train_weights)
+            outputs.append(output)
+            total_loss = total_loss + loss * scale
+        with phase('communication'):
+            grads = reduce_grads(grads)
+        with phase('optimizer'):
+            if tlx.BACKEND == 'torch':
+                # the torch optimizers read the gradients from the weights
+                for weight, grad in zip(train_weights, grads):
+                    weight.grad = grad
+            grad_clip = getattr(optimizer, 'grad_clip', None) if tlx.BACKEND == 'torch' else None
+            _apply_gradients(optimizer, grads, train_weights, mixed_precision, grad_clip)
+        return _concat_batch(outputs), total_loss
+
+    return step
+
+
+def _no_grad():
+    if tlx.BACKEND == 'torch':
+        return torch.no_grad()
+    elif tlx.BACKEND == 'paddle':
+        return pd.no_grad()
+    # tensorflow and mindspore only compute gradients inside a tape or a grad operation
+    return contextlib.nullcontext()
+
+
+def _metric_name(metric):
+    # functions are named by their name, metric objects by their class
+    return getattr(metric, '__name__', type(metric).__name__).lower()
+
+
+def _named_metrics(metrics):
+    if metrics is None:
+        return []
+    if isinstance(metrics, dict):
+        return list(metrics.items())
+    if isinstance(metrics, (list, tuple, set)):
+        return [(_metric_name(metric), metric) for metric in metrics]
+    return [(_metric_name(metrics), metrics)]
+
+
+def _to_float(value):
+    if not isinstance(value, (int, float, np.generic, np.ndarray)):
+        value = tlx.convert_to_numpy(value)
+    return np.asarray(value).item()
+
+
+def _val_logs(result):
+    logs = {'val_' + name: value for name, value in result['metrics'].items()}
+    if result['loss'] is not None:
+        logs['val_loss'] = result['loss']
+    return logs
+
+
+def _evaluate(network, dataset, loss_fn=None, metrics=None, sync_every=None):
+    """Runs network on dataset without gradients, accumulating the loss and the metrics as device tensors."""
+    named_metrics = _named_metrics(metrics)
+    for _, metric in named_metrics:
+        if hasattr(metric, 'reset'):
+            metric.reset()
+    # sums of per-batch values weighted by the batch size, for the loss and metric functions without state
+    total_loss = 0.
+    totals = {name: 0. for name, metric in named_metrics if not hasattr(metric, 'update')}
+    if not named_metrics:
+        totals['acc'] = 0.
+    num_samples, num_batches = 0, 0
+
+    network.set_eval()
+    start_time = time.time()
+    with _no_grad():
+        for X_batch, y_batch in dataset:
+            _logits = network(X_batch)
+            batch_size = int(y_batch.shape[0])
+            if loss_fn is not None:
+                total_loss = total_loss + loss_fn(_logits, y_batch) * batch_size
+            for name, metric in named_metrics:
+                if hasattr(metric, 'update'):
+                    metric.update(_logits, y_batch)
+                else:
+                    totals[name] = totals[name] + metric(_logits, y_batch) * batch_size
+            if not named_metrics:
+                y_true = tlx.convert_to_tensor(y_batch) if isinstance(y_batch, np.ndarray) else y_batch
+                # elementwise ==, tlx.equal of the torch backend compares whole tensors
+                correct = tlx.argmax(_logits, 1) == tlx.cast(tlx.reshape(y_true, [-1]), tlx.int64)
+                totals['acc'] = totals['acc'] + tlx.reduce_sum(tlx.cast(correct, tlx.float32))
+            num_samples += batch_size
+            num_batches += 1
+            if sync_every and num_batches % sync_every == 0:
+                logging.info(
+                    "eval batch {}: loss {}".format(num_batches,
+                                                    _to_float(total_loss) / num_samples)
+                )
+
+    result = {'loss': _to_float(total_loss) / max(num_samples, 1) if loss_fn is not None else None, 'metrics': {}}
+    for name, metric in named_metrics:
+        if hasattr(metric, 'update'):
+            result['metrics'][name] = metric.result()
+            metric.reset()
+        else:
+            result['metrics'][name] = _to_float(totals[name]) / max(num_samples, 1)
+    if not named_metrics:
+        result['metrics']['acc'] = _to_float(totals['acc']) / max(num_samples, 1)
+    elapsed = time.time() - start_time
+    result.update(
+        num_samples=num_samples, num_batches=num_batches, time=elapsed,
+        samples_per_sec=num_samples / elapsed if elapsed > 0 else 0.
+    )
+    return result
 
 
 class WithGrad(object):
@@ -533,6 +1119,12 @@ class TrainOneStep(object):
         Optimizer for updating the weights
     train_weights : class
         Dict or set of metrics to be evaluated by the model during
+    accumulate_steps : int
+        If greater than 1, every batch is split into ``accumulate_steps`` micro-batches whose gradients are summed
+        before the optimizer is applied once, see :meth:`Model.train`. Default 1.
+    mixed_precision : str, :class:`MixedPrecision` or None
+        If given, the forward pass runs in mixed precision, see :meth:`Model.train`. The float32 sub-modules of the
+        network are wrapped for the lifetime of the step. Default None.
 
     Examples
     --------
@@ -548,8 +1140,31 @@ class TrainOneStep(object):
 
     """
 
-    def __init__(self, net_with_loss, optimizer, train_weights):
-        if tlx.BACKEND == 'tensorflow':
+    def __init__(self, net_with_loss, optimizer, train_weights, accumulate_steps=1, mixed_precision=None):
+        _check_accumulate_steps(accumulate_steps)
+        mixed_precision = _mixed_precision(mixed_precision)
+        if mixed_precision is not None:
+            mixed_precision.attach(net_with_loss)
+            forward = mixed_precision.forward_with_loss(net_with_loss)
+        else:
+
+            def forward(data, label):
+                return None, net_with_loss(data, label)
+
+        if accumulate_steps > 1 or mixed_precision is not None:
+            if accumulate_steps > 1:
+                step = _make_accumulating_step(
+                    forward, net_with_loss, train_weights, optimizer, accumulate_steps,
+                    mixed_precision=mixed_precision
+                )
+            else:
+                step = _make_eager_step(forward, train_weights, optimizer, mixed_precision=mixed_precision)
+
+            def train_step(data, label):
+                return tlx.convert_to_numpy(step(data, label)[1])
+
+            self.net_with_train = train_step
+        elif tlx.BACKEND == 'tensorflow':
             self.net_with_train = TrainOneStepWithTF(net_with_loss, optimizer, train_weights)
         elif tlx.BACKEND == 'mindspore':
             self.net_with_train = TrainOneStepWithMS(net_with_loss, optimizer, train_weights)
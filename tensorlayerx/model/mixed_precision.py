@@ -0,0 +1,263 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import tensorlayerx as tlx
+from tensorlayerx import logging
+from .profiler import _named_submodules
+from .utils import WithLoss
+
+if tlx.BACKEND == 'paddle':
+    import paddle as pd
+if tlx.BACKEND == 'torch':
+    import torch
+
+__all__ = ['MixedPrecision', 'DynamicLossScaler']
+
+_DTYPES = {'bfloat16': 'bfloat16', 'bf16': 'bfloat16', 'float16': 'float16', 'fp16': 'float16'}
+
+# sub-modules whose class name contains one of these run in float32, they reduce over many values
+_FP32_MODULES = ('BatchNorm', 'LayerNorm', 'GroupNorm', 'InstanceNorm', 'Softmax')
+
+# the paddle operators kept in float32 inside the autocast regions, in addition to paddle's own list
+_PADDLE_FP32_OPS = (
+    'softmax', 'log_softmax', 'softmax_with_cross_entropy', 'cross_entropy', 'cross_entropy2', 'batch_norm',
+    'layer_norm', 'group_norm', 'instance_norm', 'reduce_mean', 'reduce_sum', 'mean', 'sum', 'exp', 'log'
+)
+
+
+def _is_low_precision(value):
+    if tlx.BACKEND == 'torch':
+        return isinstance(value, torch.Tensor) and value.dtype in (torch.float16, torch.bfloat16)
+    return isinstance(value, pd.Tensor) and value.dtype in (pd.float16, pd.bfloat16)
+
+
+def _to_float32(value):
+    # casts the half precision tensors of a nested structure to float32
+    if isinstance(value, (list, tuple)):
+        return type(value)(_to_float32(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _to_float32(v) for k, v in value.items()}
+    if _is_low_precision(value):
+        return value.float() if tlx.BACKEND == 'torch' else value.astype('float32')
+    return value
+
+
+class DynamicLossScaler(object):
+    """Scales the loss so that small float16 gradients do not flush to zero, and adapts the scale to the gradients.
+
+    The gradients are unscaled before the update. If one of them is not finite, the update is skipped and the scale
+    is multiplied by ``backoff_factor``. After ``growth_interval`` updates without overflow the scale is multiplied
+    by ``growth_factor``.
+
+    Parameters
+    ----------
+    init_scale : float
+        The initial scale. Default 2**16.
+    growth_factor : float
+        The factor the scale grows by. Default 2.
+    backoff_factor : float
+        The factor the scale shrinks by after an overflow. Default 0.5.
+    growth_interval : int
+        The number of updates without overflow after which the scale grows. Default 2000.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> scaler = tlx.model.DynamicLossScaler(init_scale=2.**12)
+    >>> model.train(n_epoch=10, train_dataset=train_loader, mixed_precision=tlx.model.MixedPrecision('float16', loss_scale=scaler))
+
+    """
+
+    def __init__(self, init_scale=2.**16, growth_factor=2., backoff_factor=0.5, growth_interval=2000):
+        if init_scale <= 0:
+            raise ValueError("init_scale should be positive, but got {}.".format(init_scale))
+        if growth_factor <= 1 or not 0 < backoff_factor < 1:
+            raise ValueError(
+                "growth_factor should be greater than 1 and backoff_factor in (0, 1), but got {} and {}.".format(
+                    growth_factor, backoff_factor
+                )
+            )
+        self.scale = float(init_scale)
+        self.growth_factor = growth_factor
+        self.backoff_factor = backoff_factor
+        self.growth_interval = growth_interval
+        self.skipped_steps = 0
+        self._good_steps = 0
+
+    def scale_loss(self, loss):
+        return loss * self.scale
+
+    def unscale(self, grads):
+        """Divides the gradients by the scale in place, returns ``True`` if all of them are finite."""
+        grads = [grad for grad in grads if grad is not None]
+        if not grads:
+            return True
+        inv_scale = 1. / self.scale
+        if tlx.BACKEND == 'torch':
+            for grad in grads:
+                grad.mul_(inv_scale)
+            return bool(torch.stack([torch.isfinite(grad).all() for grad in grads]).all())
+        for grad in grads:
+            grad.scale_(inv_scale)
+        return bool(pd.stack([pd.isfinite(grad).all() for grad in grads]).all())
+
+    def update(self, finite):
+        """Updates the scale after a step whose gradients were finite or not."""
+        if finite:
+            self._good_steps += 1
+            if self._good_steps >= self.growth_interval:
+                self.scale *= self.growth_factor
+                self._good_steps = 0
+        else:
+            self.skipped_steps += 1
+            self.scale *= self.backoff_factor
+            self._good_steps = 0
+            logging.warning("gradient overflow, the update is skipped and the loss scale is {}.".format(self.scale))
+
+    def state_dict(self):
+        return {'scale': self.scale, 'good_steps': self._good_steps, 'skipped_steps': self.skipped_steps}
+
+    def load_state_dict(self, state):
+        self.scale = state['scale']
+        self._good_steps = state['good_steps']
+        self.skipped_steps = state['skipped_steps']
+
+
+class MixedPrecision(object):
+    """Automatic mixed-precision policy of :meth:`Model.train` and :class:`TrainOneStep`.
+
+    The forward pass of the network runs in an autocast region, ``torch.autocast`` for PyTorch and
+    ``paddle.amp.auto_cast`` for PaddlePaddle, which computes matrix multiplications and convolutions in ``dtype``
+    while the weights stay in float32, so the optimizer updates float32 master weights and only the activations
+    take half the memory and bandwidth. The sub-modules in ``fp32_modules``, the outputs of the network and the
+    loss are computed in float32. ``bfloat16`` has the range of float32 and needs no loss scaling, it is fast on CPUs
+    with native bfloat16 instructions (AVX512-BF16, AMX) and recent GPUs. ``float16`` needs dynamic loss scaling.
+
+    TensorFlow and MindSpore are not supported, their layers create float32 variables which do not mix with half
+    precision inputs outside of Keras.
+
+    Parameters
+    ----------
+    dtype : str
+        'bfloat16' or 'float16'. Default 'bfloat16'.
+    loss_scale : str, DynamicLossScaler or None
+        'auto' uses a :class:`DynamicLossScaler` for float16 and no scaling for bfloat16, 'dynamic' always uses a
+        :class:`DynamicLossScaler`, ``None`` disables the scaling. Default 'auto'.
+    fp32_modules : tuple of str
+        The sub-modules whose class name contains one of these names run in float32. Default the normalization and
+        softmax layers.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> model = tlx.model.Model(network=net, loss_fn=tlx.losses.softmax_cross_entropy_with_logits, optimizer=optimizer)
+    >>> model.train(n_epoch=10, train_dataset=train_loader, mixed_precision='bfloat16')
+    >>> amp = tlx.model.MixedPrecision('float16', fp32_modules=('BatchNorm', 'LayerNorm', 'Softmax', 'Attention'))
+    >>> model.train(n_epoch=10, train_dataset=train_loader, mixed_precision=amp)
+
+    """
+
+    def __init__(self, dtype='bfloat16', loss_scale='auto', fp32_modules=_FP32_MODULES):
+        if tlx.BACKEND not in ('torch', 'paddle'):
+            raise NotImplementedError("mixed precision is only supported by the torch and paddle backends.")
+        if dtype not in _DTYPES:
+            raise ValueError("dtype should be 'bfloat16' or 'float16', but got {}.".format(dtype))
+        self.dtype = _DTYPES[dtype]
+        if loss_scale == 'auto':
+            loss_scale = 'dynamic' if self.dtype == 'float16' else None
+        if loss_scale == 'dynamic':
+            loss_scale = DynamicLossScaler()
+        if loss_scale is not None and not isinstance(loss_scale, DynamicLossScaler):
+            raise ValueError("loss_scale should be 'auto', 'dynamic', None or a DynamicLossScaler.")
+        self.loss_scaler = loss_scale
+        self.fp32_modules = tuple(fp32_modules)
+        self._device_type = 'cpu'
+        self._attached = []
+
+    def autocast(self, enabled=True):
+        """Returns the autocast context of the backend."""
+        if tlx.BACKEND == 'torch':
+            dtype = torch.bfloat16 if self.dtype == 'bfloat16' else torch.float16
+            return torch.autocast(device_type=self._device_type, dtype=dtype, enabled=enabled)
+        if not enabled:
+            return pd.amp.auto_cast(enable=False)
+        return pd.amp.auto_cast(enable=True, custom_black_list=set(_PADDLE_FP32_OPS), level='O1', dtype=self.dtype)
+
+    def attach(self, network):
+        """Runs the sub-modules of ``network`` in ``fp32_modules`` in float32 until :meth:`detach` is called."""
+        self.detach()
+        if tlx.BACKEND == 'torch':
+            for weight in network.parameters():
+                self._device_type = weight.device.type
+                break
+        for _, module in _named_submodules(network):
+            if any(name in type(module).__name__ for name in self.fp32_modules):
+                forward = module.__dict__.get('forward')
+                module.forward = self._fp32_forward(module.forward)
+                self._attached.append((module, forward))
+
+    def _fp32_forward(self, forward):
+
+        def fp32_forward(*args, **kwargs):
+            with self.autocast(enabled=False):
+                return forward(*_to_float32(args), **_to_float32(kwargs))
+
+        return fp32_forward
+
+    def detach(self):
+        """Restores the forward methods wrapped by :meth:`attach`."""
+        for module, forward in reversed(self._attached):
+            if forward is not None:
+                module.forward = forward
+            else:
+                del module.forward
+        self._attached = []
+
+    def forward(self, network, loss_fn):
+        """Returns a function computing the outputs of ``network`` in the autocast region and the loss in float32."""
+
+        def forward(X_batch, y_batch):
+            with self.autocast():
+                output = network(X_batch)
+            output = _to_float32(output)
+            return output, loss_fn(output, y_batch)
+
+        return forward
+
+    def forward_with_loss(self, net_with_loss):
+        """Like :meth:`forward` for a network computing its loss, which is computed in float32 if it is a
+        :class:`WithLoss`."""
+        if isinstance(net_with_loss, WithLoss):
+            backbone_forward = self.forward(net_with_loss._backbone, net_with_loss._loss_fn)
+            return lambda data, label: (None, backbone_forward(data, label)[1])
+
+        def forward(data, label):
+            with self.autocast():
+                loss = net_with_loss(data, label)
+            return None, _to_float32(loss)
+
+        return forward
+
+    def scale_loss(self, loss):
+        return loss if self.loss_scaler is None else self.loss_scaler.scale_loss(loss)
+
+    def unscale(self, grads, weights):
+        """Unscales the gradients, returns ``False`` and clears the gradients of ``weights`` if the update should be
+        skipped because of an overflow."""
+        if self.loss_scaler is None:
+            return True
+        finite = self.loss_scaler.unscale(grads)
+        self.loss_scaler.update(finite)
+        if not finite and tlx.BACKEND == 'paddle':
+            # paddle sums the gradients of the weights until they are cleared
+            for weight in weights:
+                weight.clear_gradient()
+        return finite
+
+
+def _mixed_precision(mixed_precision):
+    if mixed_precision is None or isinstance(mixed_precision, MixedPrecision):
+        return mixed_precision
+    return MixedPrecision(mixed_precision)
@@ -0,0 +1,325 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import tensorlayerx as tlx
+
+__all__ = ['Profiler']
+
+PHASES = ('data', 'forward', 'backward', 'communication', 'optimizer', 'metric', 'graph')
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def _null_phase(name):
+    return _NULL_CONTEXT
+
+
+def _peak_rss():
+    # the peak resident set size of the process in bytes, ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _num_samples(batch):
+    while isinstance(batch, (list, tuple, dict)):
+        if not batch:
+            return 0
+        batch = next(iter(batch.values())) if isinstance(batch, dict) else batch[0]
+    shape = getattr(batch, 'shape', None)
+    if shape is not None and len(shape) > 0:
+        return int(shape[0])
+    try:
+        return len(batch)
+    except TypeError:
+        return 1
+
+
+def _named_submodules(network):
+    if tlx.BACKEND == 'torch':
+        return list(network.named_modules())[1:]
+    if tlx.BACKEND == 'paddle':
+        return list(network.named_sublayers())
+    if tlx.BACKEND == 'mindspore':
+        return list(network.cells_and_names())[1:]
+    modules, seen = [], {id(network)}
+
+    def collect(module, prefix):
+        for name, child in getattr(module, '_layers', {}).items():
+            if child is None or id(child) in seen:
+                continue
+            seen.add(id(child))
+            child_name = prefix + '.' + name if prefix else name
+            modules.append((child_name, child))
+            collect(child, child_name)
+
+    collect(network, '')
+    return modules
+
+
+def _synchronize():
+    if tlx.BACKEND == 'torch':
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+
+
+class _Phase(object):
+    # reused for every step, a phase is never nested in itself
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.
+
+    def __enter__(self):
+        if self.profiler.synchronize:
+            _synchronize()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler.synchronize:
+            _synchronize()
+        self.profiler._add_phase(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Profiler(object):
+    """Records where the time of a training loop goes.
+
+    Every step is split into the phases ``data`` (waiting for the next batch), ``forward``, ``backward``,
+    ``communication`` (averaging the gradients of a distributed training), ``optimizer`` and ``metric``. A captured
+    graph runs several phases at once, its time is recorded as ``graph``. The time of a step not spent in a phase,
+    e.g. printing, is recorded as ``other``. Every step also records its number of samples, the throughput and the
+    peak resident memory of the process. With ``module_timing=True`` the forward calls of every sub-module of the
+    network are timed too, the time of a module includes the time of its children.
+
+    The records are exported as JSON lines with :meth:`export_jsonl` or as a Chrome trace with
+    :meth:`export_chrome_trace`, which can be opened in ``chrome://tracing`` or Perfetto. Pass the profiler to
+    :meth:`Model.train`, without a profiler the training loop only enters empty context managers.
+
+    Parameters
+    ----------
+    module_timing : bool
+        If True, the forward calls of the sub-modules are timed. Default False.
+    trace : bool
+        If True, every phase and forward call is kept as a span for :meth:`export_chrome_trace`. If False, only the
+        per-step records are kept. Default True.
+    synchronize : bool
+        If True, the device is synchronized at the boundaries of every phase, so that the time of asynchronous GPU
+        kernels is attributed to the phase which launched them instead of the phase which waits for them. It slows
+        the training down. Default False.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> profiler = tlx.model.Profiler(module_timing=True)
+    >>> model = tlx.model.Model(network=net, loss_fn=tlx.losses.softmax_cross_entropy_with_logits, optimizer=optimizer)
+    >>> model.train(n_epoch=1, train_dataset=train_loader, profiler=profiler)
+    >>> print(profiler.summary()['phases'])
+    >>> profiler.export_chrome_trace('train_trace.json')
+
+    """
+
+    def __init__(self, module_timing=False, trace=True, synchronize=False):
+        self.module_timing = module_timing
+        self.trace = trace
+        self.synchronize = synchronize
+        self.steps = []
+        self.spans = []
+        self.modules = {}
+        self._phases = {}
+        self._step = None
+        self._origin = time.perf_counter()
+        self._attached = []
+
+    def reset(self):
+        """Clears all records."""
+        self.steps = []
+        self.spans = []
+        self.modules = {}
+        self._step = None
+        self._origin = time.perf_counter()
+
+    def phase(self, name):
+        """Returns a context manager adding its time to the phase ``name`` of the current step."""
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, name)
+        return phase
+
+    def _add_phase(self, name, start, end):
+        step = self._step
+        if step is not None:
+            step[name] = step.get(name, 0.) + end - start
+        if self.trace:
+            self.spans.append((name, 'phase', start, end, threading.get_ident()))
+
+    def iterate(self, dataset, epoch=0):
+        """Yields the batches of ``dataset``, every batch is a step which lasts until the next one is requested.
+
+        The time spent waiting for a batch is recorded as its ``data`` phase.
+        """
+        iterator = iter(dataset)
+        step = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                return
+            self._step = {'epoch': epoch, 'step': step}
+            self._add_phase('data', start, time.perf_counter())
+            try:
+                yield batch
+            finally:
+                self._end_step(start, time.perf_counter(), _num_samples(batch))
+            step += 1
+
+    def _end_step(self, start, end, samples):
+        record, self._step = self._step, None
+        duration = end - start
+        record['start'] = start - self._origin
+        record['time'] = duration
+        record['other'] = max(duration - sum(record.get(name, 0.) for name in PHASES), 0.)
+        record['samples'] = samples
+        record['samples_per_sec'] = samples / duration if duration > 0 else 0.
+        record['peak_rss'] = _peak_rss()
+        self.steps.append(record)
+        if self.trace:
+            self.spans.append(('step', 'step', start, end, threading.get_ident()))
+
+    def attach(self, network):
+        """Times the forward calls of every sub-module of ``network`` until :meth:`detach` is called."""
+        self.detach()
+        for name, module in _named_submodules(network):
+            forward = module.__dict__.get('forward')
+            module.forward = self._timed_forward(name, module.forward)
+            self._attached.append((module, forward))
+
+    def _timed_forward(self, name, forward):
+        stats = self.modules.setdefault(name, {'calls': 0, 'time': 0.})
+
+        def timed_forward(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return forward(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                stats['calls'] += 1
+                stats['time'] += end - start
+                if self.trace:
+                    self.spans.append((name, 'module', start, end, threading.get_ident()))
+
+        return timed_forward
+
+    def detach(self):
+        """Restores the forward methods wrapped by :meth:`attach`."""
+        for module, forward in reversed(self._attached):
+            if forward is not None:
+                module.forward = forward
+            else:
+                # the forward method of the class is used again
+                del module.forward
+        self._attached = []
+
+    def summary(self):
+        """Returns the number of ``steps``, the total ``time`` in seconds, the throughput ``samples_per_sec``, the
+        ``peak_rss`` in bytes, for every phase its ``total`` and ``mean`` time per step and ``fraction`` of the time,
+        and for every timed module its ``calls``, ``total`` and ``mean`` time per call."""
+        total = sum(step['time'] for step in self.steps)
+        samples = sum(step['samples'] for step in self.steps)
+        num_steps = len(self.steps)
+        phases = {}
+        for name in PHASES + ('other', ):
+            phase_total = sum(step.get(name, 0.) for step in self.steps)
+            if phase_total > 0 or name in ('data', 'other'):
+                phases[name] = {
+                    'total': phase_total,
+                    'mean': phase_total / max(num_steps, 1),
+                    'fraction': phase_total / total if total > 0 else 0.,
+                }
+        modules = {
+            name: {
+                'calls': stats['calls'],
+                'total': stats['time'],
+                'mean': stats['time'] / max(stats['calls'], 1)
+            } for name, stats in self.modules.items()
+        }
+        rss = [step['peak_rss'] for step in self.steps if step['peak_rss'] is not None]
+        return {
+            'steps': num_steps,
+            'time': total,
+            'samples_per_sec': samples / total if total > 0 else 0.,
+            'peak_rss': max(rss) if rss else None,
+            'phases': phases,
+            'modules': modules,
+        }
+
+    def export_jsonl(self, file_path):
+        """Writes one JSON object per line, ``{"event": "step", ...}`` for every step record and
+        ``{"event": "module", ...}`` for every timed module."""
+        _makedirs(file_path)
+        with open(file_path, 'w') as f:
+            for record in self.steps:
+                f.write(json.dumps(dict(event='step', **record)) + '\n')
+            for name, stats in self.summary()['modules'].items():
+                f.write(json.dumps(dict(event='module', name=name, **stats)) + '\n')
+
+    def export_chrome_trace(self, file_path):
+        """Writes the spans in the Chrome trace event format, requires ``trace=True``."""
+        pid = os.getpid()
+        events = [
+            {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': (start - self._origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': pid,
+                'tid': tid,
+            } for name, category, start, end, tid in self.spans
+        ]
+        _makedirs(file_path)
+        with open(file_path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def _makedirs(file_path):
+    directory = os.path.dirname(os.path.abspath(file_path))
+    if not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+
+
+class _NullProfiler(object):
+    # used when Model.train is not given a profiler
+
+    module_timing = False
+
+    def phase(self, name):
+        return _NULL_CONTEXT
+
+    def iterate(self, dataset, epoch=0):
+        return dataset
+
+    def attach(self, network):
+        pass
+
+    def detach(self):
+        pass
+
+
+_NULL_PROFILER = _NullProfiler()
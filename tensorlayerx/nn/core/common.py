@@ -1,9 +1,11 @@
 #! /usr/bin/python
 # -*- coding: utf-8 -*-
 
+import functools
 import os
 import tensorlayerx as tlx
 from tensorlayerx.files import utils
+from tensorlayerx.files import checkpoint
 from tensorlayerx import logging
 import numpy as np
 from queue import Queue
@@ -14,6 +16,14 @@ if tlx.BACKEND == 'mindspore':
     from mindspore.nn import Cell
     from mindspore import Tensor
     import mindspore as ms
+if tlx.BACKEND == 'tensorflow':
+    import tensorflow as tf
+    from tensorlayerx.backend.ops.tensorflow_nn import stateless_random_scope
+if tlx.BACKEND == 'paddle':
+    import paddle as pd
+if tlx.BACKEND == 'torch':
+    import torch
+    import torch.utils.checkpoint
 
 _act_dict = {
     "relu": tlx.ops.ReLU,
@@ -111,7 +121,7 @@ def processing_act(act):
     return out_act
 
 
-def _save_weights(net, file_path, format=None):
+def _save_weights(net, file_path, format=None, async_save=False):
     """Input file_path, save model weights into a file of given format.
                 Use net.load_weights() to restore.
 
@@ -121,16 +131,23 @@ def _save_weights(net, file_path, format=None):
         Filename to which the model weights will be saved.
     format : str or None
         Saved file format.
-        Value should be None, 'hdf5', 'npz', 'npz_dict' or 'ckpt'. Other format is not supported now.
+        Value should be None, 'hdf5', 'npz', 'npz_dict', 'safetensors' or 'ckpt'. Other format is not supported now.
         1) If this is set to None, then the postfix of file_path will be used to decide saved format.
-        If the postfix is not in ['h5', 'hdf5', 'npz', 'ckpt'], then file will be saved in hdf5 format by default.
+        If the postfix is not in ['h5', 'hdf5', 'npz', 'safetensors', 'ckpt'], then file will be saved in hdf5
+        format by default.
         2) 'hdf5' will save model weights name in a list and each layer has its weights stored in a group of
         the hdf5 file.
         3) 'npz' will save model weights sequentially into a npz file.
         4) 'npz_dict' will save model weights along with its name as a dict into a npz file.
-        5) 'ckpt' will save model weights into a tensorflow ckpt file.
+        5) 'safetensors' will save model weights by name into an uncompressed file with an offset table, which is
+        memory-mapped when loading.
+        6) 'ckpt' will save model weights into a tensorflow ckpt file.
 
         Default None.
+    async_save : bool
+        If True, the weights are copied to host memory and written by a background thread, use
+        tlx.files.wait_for_saves() to wait for the file. Only supported by 'npz', 'npz_dict' and 'safetensors'.
+        Default False.
 
     Examples
     --------
@@ -147,6 +164,10 @@ def _save_weights(net, file_path, format=None):
     >>> model.save_weights('./model.npz')
     >>> model.save_weights('./model.npz', format='npz_dict')
 
+    3) Save model weights without stalling training, the file is written to a temporary name and renamed
+    >>> model.save_weights('./model.npz', format='npz_dict', async_save=True)
+    >>> tlx.files.wait_for_saves()
+
     """
 
     if tlx.BACKEND != 'torch' and net.all_weights is None or len(net.all_weights) == 0:
@@ -155,7 +176,7 @@ def _save_weights(net, file_path, format=None):
 
     if format is None:
         postfix = file_path.split('.')[-1]
-        if postfix in ['h5', 'hdf5', 'npz', 'ckpt']:
+        if postfix in ['h5', 'hdf5', 'npz', 'safetensors', 'ckpt']:
             format = postfix
         else:
             format = 'hdf5'
@@ -163,19 +184,28 @@ def _save_weights(net, file_path, format=None):
     if format == 'hdf5' or format == 'h5':
         raise NotImplementedError("hdf5 load/save is not supported now.")
         # utils.save_weights_to_hdf5(file_path, net)
-    elif format == 'npz':
-        utils.save_npz(net.all_weights, file_path)
-    elif format == 'npz_dict':
-        if tlx.BACKEND == 'torch':
-            utils.save_npz_dict(net.named_parameters(), file_path)
+    elif format in ('npz', 'npz_dict', 'safetensors'):
+        # only the copy to host memory runs on the calling thread when saving asynchronously
+        if format == 'npz':
+            arrays = checkpoint._snapshot(net.all_weights)
+            write = functools.partial(checkpoint._write_npz, file_path, arrays)
+        else:
+            named = checkpoint._named_weights(net)
+            names, arrays = [name for name, _ in named], checkpoint._snapshot([tensor for _, tensor in named])
+            if format == 'npz_dict':
+                write = functools.partial(checkpoint._write_npz_dict, file_path, names, arrays)
+            else:
+                write = functools.partial(checkpoint._write_safetensors, file_path, names, arrays)
+        if async_save:
+            checkpoint._background_writer().submit(write)
         else:
-            utils.save_npz_dict(net.all_weights, file_path)
+            write()
     elif format == 'ckpt':
         # TODO: enable this when tf save ckpt is enabled
         raise NotImplementedError("ckpt load/save is not supported now.")
     else:
         raise ValueError(
-            "Save format must be 'hdf5', 'npz', 'npz_dict' or 'ckpt'."
+            "Save format must be 'hdf5', 'npz', 'npz_dict', 'safetensors' or 'ckpt'."
             "Other format is not supported now."
         )
 
@@ -189,7 +219,7 @@ def _load_weights(net, file_path, format=None, in_order=True, skip=False):
         Filename from which the model weights will be loaded.
     format : str or None
         If not specified (None), the postfix of the file_path will be used to decide its format. If specified,
-        value should be 'hdf5', 'npz', 'npz_dict' or 'ckpt'. Other format is not supported now.
+        value should be 'hdf5', 'npz', 'npz_dict', 'safetensors' or 'ckpt'. Other format is not supported now.
         In addition, it should be the same format when you saved the file using net.save_weights().
         Default is None.
     in_order : bool
@@ -201,7 +231,7 @@ def _load_weights(net, file_path, format=None, in_order=True, skip=False):
         Default is True.
     skip : bool
         Allow skipping weights whose name is mismatched between the file and model. Only useful when 'format' is
-        'hdf5' or 'npz_dict'. If 'skip' is True, 'in_order' argument will be ignored and those loaded weights
+        'hdf5', 'npz_dict' or 'safetensors'. If 'skip' is True, 'in_order' argument will be ignored and those loaded weights
         whose name is not found in model weights (net.all_weights) will be skipped. If 'skip' is False, error will
         occur when mismatch is found.
         Default is False.
@@ -248,22 +278,31 @@ def _load_weights(net, file_path, format=None, in_order=True, skip=False):
         utils.load_and_assign_npz(file_path, net)
     elif format == 'npz_dict':
         utils.load_and_assign_npz_dict(file_path, net, skip)
+    elif format == 'safetensors':
+        utils.load_and_assign_safetensors(file_path, net, skip)
     elif format == 'ckpt':
         # TODO: enable this when tf save ckpt is enabled
         raise NotImplementedError("ckpt load/save is not supported now.")
     else:
         raise ValueError(
-            "File format must be 'hdf5', 'npz', 'npz_dict' or 'ckpt'. "
+            "File format must be 'hdf5', 'npz', 'npz_dict', 'safetensors' or 'ckpt'. "
             "Other format is not supported now."
         )
 
 
-def _save_standard_weights_dict(net, file_path):
+def _save_standard_weights_dict(net, file_path, format='npz_dict'):
     # Eliminate parameter naming differences between frameworks.
-    if tlx.BACKEND == 'torch':
-        save_standard_npz_dict(net.named_parameters(), file_path)
+    if format == 'npz_dict':
+        if tlx.BACKEND == 'torch':
+            save_standard_npz_dict(net.named_parameters(), file_path)
+        else:
+            save_standard_npz_dict(net.all_weights, file_path)
+    elif format == 'safetensors':
+        named = checkpoint._named_weights(net)
+        names = encode_list_name([name for name, _ in named])
+        checkpoint._write_safetensors(file_path, names, checkpoint._snapshot([tensor for _, tensor in named]))
     else:
-        save_standard_npz_dict(net.all_weights, file_path)
+        raise ValueError("Save format must be 'npz_dict' or 'safetensors', but got {}.".format(format))
 
 
 def encode_list_name(list_name):
@@ -352,6 +391,12 @@ def _load_standard_weights_dict(net, file_path, skip=False, reshape=False, forma
         load_and_assign_standard_npz_dict(net, file_path, skip, reshape)
     elif format == 'npz':
         load_and_assign_standard_npz(file_path, net, reshape)
+    elif format == 'safetensors':
+        if not os.path.exists(file_path):
+            logging.error("file {} doesn't exist.".format(file_path))
+            return False
+        _assign_standard_weights(net, utils.load_safetensors(file_path), skip, reshape)
+        logging.info("[*] Model restored from safetensors %s" % file_path)
 
 
 def load_and_assign_standard_npz_dict(net, file_path, skip=False, reshape=False):
@@ -359,19 +404,24 @@ def load_and_assign_standard_npz_dict(net, file_path, skip=False, reshape=False)
         logging.error("file {} doesn't exist.".format(file_path))
         return False
 
-    weights = np.load(file_path, allow_pickle=True)
-    if len(weights.keys()) != len(set(weights.keys())):
-        raise Exception("Duplication in model npz_dict %s" % file_path)
+    with np.load(file_path, allow_pickle=True) as weights:
+        if len(weights.keys()) != len(set(weights.keys())):
+            raise Exception("Duplication in model npz_dict %s" % file_path)
+        _assign_standard_weights(net, weights, skip, reshape)
 
+    logging.info("[*] Model restored from npz_dict %s" % file_path)
+
+
+def _assign_standard_weights(net, weights, skip=False, reshape=False):
+    # the weights of the network are looked up by name once, the arrays are read one at a time
     if tlx.BACKEND == 'torch':
-        net_weights_name = [n for n, v in net.named_parameters()]
-        torch_weights_dict = {n: v for n, v in net.named_parameters()}
+        net_weights = dict(net.named_parameters())
     else:
-        net_weights_name = [w.name for w in net.all_weights]
+        net_weights = {w.name: w for w in net.all_weights}
 
     for key in weights.keys():
         de_key = decode_key_name(key)
-        if de_key not in net_weights_name:
+        if de_key not in net_weights:
             if skip:
                 logging.warning("Weights named '%s' not found in network. Skip it." % key)
             else:
@@ -380,29 +430,25 @@ def load_and_assign_standard_npz_dict(net, file_path, skip=False, reshape=False)
                     "if you want to skip redundant or mismatch weights." % key
                 )
         else:
+            weight = net_weights[de_key]
+            reshape_weights = weight_reshape(weights[key], reshape)
             if tlx.BACKEND == 'tensorflow':
-                reshape_weights = weight_reshape(weights[key], reshape)
-                check_reshape(reshape_weights, net.all_weights[net_weights_name.index(de_key)])
-                utils.assign_tf_variable(net.all_weights[net_weights_name.index(de_key)], reshape_weights)
+                check_reshape(reshape_weights, weight)
+                utils.assign_tf_variable(weight, reshape_weights)
             elif tlx.BACKEND == 'mindspore':
-                reshape_weights = weight_reshape(weights[key], reshape)
                 import mindspore as ms
                 assign_param = ms.Tensor(reshape_weights, dtype=ms.float32)
-                check_reshape(assign_param, net.all_weights[net_weights_name.index(de_key)])
-                utils.assign_ms_variable(net.all_weights[net_weights_name.index(de_key)], assign_param)
+                check_reshape(assign_param, weight)
+                utils.assign_ms_variable(weight, assign_param)
             elif tlx.BACKEND == 'paddle':
-                reshape_weights = weight_reshape(weights[key], reshape)
-                check_reshape(reshape_weights, net.all_weights[net_weights_name.index(de_key)])
-                utils.assign_pd_variable(net.all_weights[net_weights_name.index(de_key)], reshape_weights)
+                check_reshape(reshape_weights, weight)
+                utils.assign_pd_variable(weight, reshape_weights)
             elif tlx.BACKEND == 'torch':
-                reshape_weights = weight_reshape(weights[key], reshape)
-                check_reshape(reshape_weights, net.all_weights[net_weights_name.index(de_key)])
-                utils.assign_th_variable(torch_weights_dict[de_key], reshape_weights)
+                check_reshape(reshape_weights, weight)
+                utils.assign_th_variable(weight, reshape_weights)
             else:
                 raise NotImplementedError('Not implemented')
 
-    logging.info("[*] Model restored from npz_dict %s" % file_path)
-
 
 def load_and_assign_standard_npz(file_path=None, network=None, reshape=False):
     if network is None:
@@ -608,4 +654,84 @@ class ModuleNode(object):
         outputs = self.layer(inputs, **kwargs)
         self.in_tensors = tolist(inputs)
         self.out_tensors = tolist(outputs)
-        return self.out_tensors
\ No newline at end of file
+        return self.out_tensors
+
+
+_tf_recompute_generator = None
+
+
+def _tf_recompute_seed():
+    global _tf_recompute_generator
+    if _tf_recompute_generator is None:
+        # the generator owns its state, drawing seeds from it does not move the global random state
+        with tf.init_scope():
+            _tf_recompute_generator = tf.random.Generator.from_non_deterministic_state()
+    return _tf_recompute_generator.make_seeds(1)[:, 0]
+
+
+def _recompute(function, *args):
+    """Runs function(*args) without keeping its intermediate activations for the backward pass, which recomputes
+    them with the random state of the forward pass, so dropout draws the same masks."""
+    if tlx.BACKEND == 'torch':
+        if not torch.is_grad_enabled():
+            return function(*args)
+        return torch.utils.checkpoint.checkpoint(function, *args, use_reentrant=False, preserve_rng_state=True)
+    if tlx.BACKEND == 'paddle':
+        if not pd.is_grad_enabled():
+            return function(*args)
+        from paddle.distributed.fleet.utils import recompute
+        return recompute(function, *args, preserve_rng_state=True)
+    if tlx.BACKEND == 'tensorflow':
+        # the dropout masks are drawn with stateless ops from a seed tensor of the forward pass, which also works in
+        # a tf.function and leaves the global random state alone
+        seed = _tf_recompute_seed()
+
+        def replay(*args):
+            with stateless_random_scope(seed):
+                return function(*args)
+
+        return tf.recompute_grad(replay)(*args)
+    # mindspore recomputes the cells marked with Cell.recompute()
+    return function(*args)
+
+
+def _check_checkpoint_segments(checkpoint_segments):
+    if checkpoint_segments is not None and (not isinstance(checkpoint_segments, int) or checkpoint_segments <= 0):
+        raise ValueError(
+            "checkpoint_segments should be None or a positive integer, but got {}.".format(checkpoint_segments)
+        )
+
+
+def _segments(layers, num_segments):
+    # splits layers into at most num_segments contiguous chunks of nearly equal length
+    num_segments = min(num_segments, len(layers))
+    bounds = [i * len(layers) // num_segments for i in range(num_segments + 1)]
+    return [layers[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _run_layers(layers):
+
+    def forward(input_data):
+        for layer in layers:
+            input_data = layer(input_data)
+        return input_data
+
+    return forward
+
+
+def _checkpoint_sequential(layers, num_segments, input_data):
+    """Runs layers one after the other in num_segments segments, the activations inside all segments but the last
+    are recomputed in the backward pass."""
+    if not layers:
+        return input_data
+    segments = _segments(layers, num_segments)
+    for segment in segments[:-1]:
+        input_data = _recompute(_run_layers(segment), input_data)
+    return _run_layers(segments[-1])(input_data)
+
+
+def _mark_recompute(layers, num_segments):
+    # mindspore recomputes the marked cells in graph mode
+    for segment in _segments(layers, num_segments)[:-1]:
+        for layer in segment:
+            layer.recompute()
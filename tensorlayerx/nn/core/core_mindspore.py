@@ -3,6 +3,7 @@
 
 from .common import check_parameter, processing_act, str2init, random_normal, tolist, construct_graph, ModuleNode, select_attrs
 from .common import _save_weights, _load_weights, _save_standard_weights_dict, _load_standard_weights_dict
+from .common import _check_checkpoint_segments, _mark_recompute
 from mindspore.nn import Cell
 import tensorlayerx as tlx
 import mindspore as ms
@@ -104,16 +105,16 @@ class Module(Cell):
         self.trainable = trainable
         return var
 
-    def save_weights(self, file_path, format=None):
+    def save_weights(self, file_path, format=None, async_save=False):
         """Input file_path, save model weights into a file of given format."""
-        _save_weights(self, file_path, format)
+        _save_weights(self, file_path, format, async_save)
 
     def load_weights(self, file_path, format=None, in_order=True, skip=False):
         """Load model weights from a given file, which should be previously saved by self.save_weights()."""
         _load_weights(self, file_path, format, in_order, skip)
 
-    def save_standard_weights(self, file_path):
-        _save_standard_weights_dict(self, file_path)
+    def save_standard_weights(self, file_path, format='npz_dict'):
+        _save_standard_weights_dict(self, file_path, format)
 
     def load_standard_weights(self, file_path, skip=False, reshape=False, format='npz_dict'):
         _load_standard_weights_dict(self, file_path, skip, reshape, format)
@@ -294,6 +295,9 @@ class Sequential(Module):
         A list of layers.
     name : str or None
         A unique layer name. If None, a unique name will be automatically assigned.
+    checkpoint_segments : int or None
+        If given, the layers are split into this many segments and the activations inside all segments but the last
+        are not kept for the backward pass but recomputed, which trades compute for memory. Default None.
     Methods
     ---------
     __init__()
@@ -312,11 +316,14 @@ class Sequential(Module):
     >>> seq = tlx.nn.Sequential([conv, bn])
     >>> x = tlx.nn.Input((1, 3, 4, 4))
     >>> seq(x)
+    >>> # 24 blocks in 4 segments, only the inputs of the segments are kept for the backward pass
+    >>> deep = tlx.nn.Sequential([Block() for _ in range(24)], checkpoint_segments=4)
 
     """
 
-    def __init__(self, *args):
+    def __init__(self, *args, checkpoint_segments=None):
         super(Sequential, self).__init__()
+        _check_checkpoint_segments(checkpoint_segments)
         # self._built = True
         if len(args) == 1:
             layers = args[0]
@@ -332,6 +339,9 @@ class Sequential(Module):
             for index, layer in enumerate(args):
                 self.insert_child_to_layer(str(index), layer)
         self.layer_list = list(self._cells.values())
+        self.checkpoint_segments = checkpoint_segments
+        if checkpoint_segments:
+            _mark_recompute(self.layer_list, checkpoint_segments)
 
     def __getitem__(self, index):
         if isinstance(index, slice):
@@ -7,6 +7,7 @@ import paddle
 
 from .common import check_parameter, processing_act, str2init
 from .common import _save_weights, _load_weights, _save_standard_weights_dict, _load_standard_weights_dict
+from .common import _check_checkpoint_segments, _checkpoint_sequential
 from paddle.fluid import framework
 from paddle.fluid.dygraph import Layer
 from paddle.fluid.framework import in_dygraph_mode
@@ -262,15 +263,15 @@ class Module(Layer):
 
         self.forward(*inputs, **kwargs)
 
-    def save_weights(self, file_path, format=None):
-        _save_weights(net=self, file_path=file_path, format=format)
+    def save_weights(self, file_path, format=None, async_save=False):
+        _save_weights(net=self, file_path=file_path, format=format, async_save=async_save)
 
     def load_weights(self, file_path, format=None, in_order=True, skip=False):
         """Load model weights from a given file, which should be previously saved by self.save_weights()."""
         _load_weights(net=self, file_path=file_path, format=format, in_order=in_order, skip=skip)
 
-    def save_standard_weights(self, file_path):
-        _save_standard_weights_dict(self, file_path)
+    def save_standard_weights(self, file_path, format='npz_dict'):
+        _save_standard_weights_dict(self, file_path, format)
 
     def load_standard_weights(self, file_path, skip=False, reshape=False, format='npz_dict'):
         _load_standard_weights_dict(self, file_path, skip, reshape, format)
@@ -349,8 +350,9 @@ class Module(Layer):
 
 class Sequential(Module):
 
-    def __init__(self, *args):
+    def __init__(self, *args, checkpoint_segments=None):
         super(Sequential, self).__init__()
+        _check_checkpoint_segments(checkpoint_segments)
         if len(args) == 1:
             layers = args[0]
             if isinstance(layers, list):
@@ -365,6 +367,7 @@ class Sequential(Module):
             for index, layer in enumerate(args):
                 self.insert_child_to_layer(str(index), layer)
         self.layer_list = list(self._sub_layers.values())
+        self.checkpoint_segments = checkpoint_segments
 
     def __getitem__(self, index):
         if isinstance(index, slice):
@@ -402,6 +405,8 @@ class Sequential(Module):
         return self
 
     def forward(self, input_data):
+        if self.checkpoint_segments:
+            return _checkpoint_sequential(self.layer_list, self.checkpoint_segments, input_data)
         for layer in self.layer_list:
             input_data = layer(input_data)
         return input_data
@@ -3,6 +3,7 @@
 
 from .common import check_parameter, processing_act, str2init, tolist, construct_graph, ModuleNode, select_attrs
 from .common import _save_weights, _load_weights, _save_standard_weights_dict, _load_standard_weights_dict
+from .common import _check_checkpoint_segments, _checkpoint_sequential
 from collections import OrderedDict, abc as container_abcs
 import warnings
 import time
@@ -180,17 +181,17 @@ class Module(object):
         self.trainable = trainable
         return weight
 
-    def save_weights(self, file_path, format=None):
+    def save_weights(self, file_path, format=None, async_save=False):
         """Input file_path, save model weights into a file of given format."""
 
-        _save_weights(self, file_path, format)
+        _save_weights(self, file_path, format, async_save)
 
     def load_weights(self, file_path, format=None, in_order=True, skip=False):
         """Load model weights from a given file, which should be previously saved by self.save_weights()."""
 
         _load_weights(self, file_path, format, in_order, skip)
 
-    def save_standard_weights(self, file_path):
+    def save_standard_weights(self, file_path, format='npz_dict'):
         """Save to standard format parameter format as {conv.filters: filters_param, conv.biases: biases_parm,
         linear.weights: weights_parm ...}
 
@@ -198,10 +199,13 @@ class Module(object):
         ----------
         file_path : str
             Name of the saved file
+        format : str
+            'npz_dict' or 'safetensors', an uncompressed file with an offset table which is memory-mapped when
+            loading. Default 'npz_dict'.
 
         """
 
-        _save_standard_weights_dict(self, file_path)
+        _save_standard_weights_dict(self, file_path, format)
 
     def load_standard_weights(self, file_path, skip=False, reshape=False, format='npz_dict'):
         """
@@ -217,6 +221,8 @@ class Module(object):
             This parameter needs to be set to True when importing parameters from tensorflow training to paddle/mindspore/pytorch,
             and similarly when importing parameters from paddle/mindspore/pytorch training to tensorflow.
             This parameter does not need to be set between paddle/mindspore/pytorch.
+        format : str
+            'npz_dict', 'npz' or 'safetensors'. Default 'npz_dict'.
 
         """
 
@@ -630,6 +636,9 @@ class Sequential(Module):
         A list of layers.
     name : str or None
         A unique layer name. If None, a unique name will be automatically assigned.
+    checkpoint_segments : int or None
+        If given, the layers are split into this many segments and the activations inside all segments but the last
+        are not kept for the backward pass but recomputed, which trades compute for memory. Default None.
     Methods
     ---------
     __init__()
@@ -648,10 +657,13 @@ class Sequential(Module):
     >>> seq = tlx.nn.Sequential([conv, bn])
     >>> x = tlx.layers.Input((1, 3, 4, 4))
     >>> seq(x)
+    >>> # 24 blocks in 4 segments, only the inputs of the segments are kept for the backward pass
+    >>> deep = tlx.nn.Sequential([Block() for _ in range(24)], checkpoint_segments=4)
     """
 
-    def __init__(self, *args):
+    def __init__(self, *args, checkpoint_segments=None):
         super(Sequential, self).__init__()
+        _check_checkpoint_segments(checkpoint_segments)
         self._built = True
         if len(args) == 1:
             layers = args[0]
@@ -667,6 +679,7 @@ class Sequential(Module):
             for index, layer in enumerate(args):
                 self.insert_child_to_layer(str(index), layer)
         self.layer_list = list(self._layers.values())
+        self.checkpoint_segments = checkpoint_segments
 
     def __getitem__(self, index):
         if isinstance(index, slice):
@@ -707,6 +720,8 @@ class Sequential(Module):
         pass
 
     def forward(self, input_data):
+        if self.checkpoint_segments:
+            return _checkpoint_sequential(self.layer_list, self.checkpoint_segments, input_data)
         for layer in self.layer_list:
             input_data = layer(input_data)
         return input_data
@@ -4,6 +4,7 @@
 from torch.nn import Module as T_Module
 from .common import check_parameter, processing_act, str2init, tolist, construct_graph, ModuleNode, select_attrs
 from .common import _save_weights, _load_weights, _save_standard_weights_dict, _load_standard_weights_dict
+from .common import _check_checkpoint_segments, _checkpoint_sequential
 from torch.nn.parameter import Parameter
 from torch._C import _disabled_torch_function_impl
 import torch
@@ -146,15 +147,15 @@ class Module(T_Module):
                     self._nontrainable_weights.append(param)
         return self._nontrainable_weights
 
-    def save_weights(self, file_path, format=None):
-        _save_weights(net=self, file_path=file_path, format=format)
+    def save_weights(self, file_path, format=None, async_save=False):
+        _save_weights(net=self, file_path=file_path, format=format, async_save=async_save)
 
     def load_weights(self, file_path, format=None, in_order=True, skip=False):
         """Load model weights from a given file, which should be previously saved by self.save_weights()."""
         _load_weights(net=self, file_path=file_path, format=format, in_order=in_order, skip=skip)
 
-    def save_standard_weights(self, file_path):
-        _save_standard_weights_dict(self, file_path)
+    def save_standard_weights(self, file_path, format='npz_dict'):
+        _save_standard_weights_dict(self, file_path, format)
 
     def load_standard_weights(self, file_path, skip=False, reshape=False, format='npz_dict'):
         _load_standard_weights_dict(self, file_path, skip, reshape, format)
@@ -231,6 +232,9 @@ class Sequential(Module):
         A list of layers.
     name : str or None
         A unique layer name. If None, a unique name will be automatically assigned.
+    checkpoint_segments : int or None
+        If given, the layers are split into this many segments and the activations inside all segments but the last
+        are not kept for the backward pass but recomputed, which trades compute for memory. Default None.
     Methods
     ---------
     __init__()
@@ -249,10 +253,13 @@ class Sequential(Module):
     >>> seq = tlx.nn.Sequential([conv, bn])
     >>> x = tlx.layers.Input((1, 3, 4, 4))
     >>> seq(x)
+    >>> # 24 blocks in 4 segments, only the inputs of the segments are kept for the backward pass
+    >>> deep = tlx.nn.Sequential([Block() for _ in range(24)], checkpoint_segments=4)
     """
 
-    def __init__(self, *args):
+    def __init__(self, *args, checkpoint_segments=None):
         super(Sequential, self).__init__()
+        _check_checkpoint_segments(checkpoint_segments)
         self._built = True
         if len(args) == 1:
             layers = args[0]
@@ -268,6 +275,7 @@ class Sequential(Module):
             for index, layer in enumerate(args):
                 self.add_module(str(index), layer)
         self.layer_list = list(self._modules.values())
+        self.checkpoint_segments = checkpoint_segments
 
     def _get_item_by_idx(self, iterator, idx):
         """Get the idx-th item of the iterator"""
@@ -325,6 +333,8 @@ class Sequential(Module):
         pass
 
     def forward(self, input_data):
+        if self.checkpoint_segments:
+            return _checkpoint_sequential(self.layer_list, self.checkpoint_segments, input_data)
         for layer in self.layer_list:
             input_data = layer(input_data)
         return input_data
@@ -21,5 +21,6 @@ from .scale import *
 from .shape import *
 from .spatial_transformer import *
 from .stack import *
+from .checkpoint import *
 # from .utils import *
 from .Transformer import *
@@ -0,0 +1,62 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+from tensorlayerx import logging
+from tensorlayerx.nn.core import Module
+from tensorlayerx.nn.core.common import _recompute
+import tensorlayerx as tlx
+
+__all__ = [
+    'Checkpoint',
+]
+
+
+class Checkpoint(Module):
+    """A layer that runs a module without keeping its intermediate activations for the backward pass.
+
+    The activations are recomputed from the inputs of the module in the backward pass, with the random state of the
+    forward pass, so that dropout draws the same masks. It trades one more forward pass of the module for the memory
+    of its activations, which allows larger batches for deep stacks such as transformer encoders. The native
+    recompute utility of the backend is used: ``torch.utils.checkpoint``, ``paddle.distributed.fleet.utils.recompute``,
+    ``tf.recompute_grad`` and ``Cell.recompute`` for MindSpore, which only recomputes in graph mode.
+    Without gradients, e.g. in evaluation, the module runs as usual.
+
+    Parameters
+    ----------
+    module : Module
+        The module to recompute.
+    name : None or str
+        A unique layer name.
+
+    Examples
+    --------
+    >>> layers = [tlx.nn.TransformerEncoderLayer(d_model=512, nhead=8) for _ in range(12)]
+    >>> encoder = tlx.nn.Sequential([tlx.nn.Checkpoint(layer) for layer in layers])
+    >>> outputs = encoder(tlx.nn.Input([32, 128, 512]))
+
+    """
+
+    def __init__(self, module, name=None):
+        super(Checkpoint, self).__init__(name)
+        self.module = module
+        if tlx.BACKEND == 'mindspore':
+            module.recompute()
+
+        self.build()
+        self._built = True
+
+        logging.info("Checkpoint %s: %s" % (self.name, self.module.__class__.__name__))
+
+    def __repr__(self):
+        return '{classname}({module})'.format(classname=self.__class__.__name__, module=repr(self.module))
+
+    def build(self, inputs_shape=None):
+        pass
+
+    def forward(self, *inputs):
+        outputs = _recompute(self.module, *inputs)
+
+        if not self._nodes_fixed and self._build_graph:
+            self._add_node(inputs, outputs)
+            self._nodes_fixed = True
+        return outputs
@@ -2,4 +2,6 @@
 # -*- coding: utf-8 -*-
 
 from .nlp import *
+from .vocab import *
+from .word2vec import *
 from tensorlayerx.text import nlp
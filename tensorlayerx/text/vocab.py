@@ -0,0 +1,663 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import collections
+import io
+import itertools
+import multiprocessing
+import os
+import re
+import zlib
+
+import numpy as np
+
+import tensorlayerx as tlx
+
+__all__ = [
+    'CompactVocabulary',
+    'VocabularyBuilder',
+    'regex_tokenizer',
+]
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def regex_tokenizer(sentence):
+    """Splits a sentence into words and punctuation marks with one regular expression, a fast replacement of
+    ``nltk.tokenize.word_tokenize`` which is used by :func:`process_sentence`.
+
+    Parameters
+    ----------
+    sentence : str
+        A sentence.
+
+    Returns
+    -------
+    list of str
+        The tokens.
+
+    Examples
+    --------
+    >>> tlx.text.regex_tokenizer("how are you?")
+    ['how', 'are', 'you', '?']
+
+    """
+    return _TOKEN_RE.findall(sentence)
+
+
+def _pad(flat, lengths, max_length, pad_id, padding, truncating):
+    # builds the padded matrix of the sequences stored one after another in flat without a loop over the rows
+    if max_length is None:
+        max_length = int(lengths.max()) if len(lengths) else 0
+    kept = np.minimum(lengths, max_length)
+    starts = np.cumsum(lengths) - lengths
+    if truncating == 'pre':
+        starts += lengths - kept
+    output = np.full((len(lengths), max_length), pad_id, dtype=np.int32)
+    columns = np.arange(max_length)
+    if padding == 'post':
+        mask = columns < kept[:, None]
+    else:
+        mask = columns >= (max_length - kept)[:, None]
+    # the positions of the kept tokens in flat, in the row-major order of the mask
+    kept_starts = np.cumsum(kept) - kept
+    index = np.repeat(starts - kept_starts, kept) + np.arange(int(kept.sum()))
+    output[mask] = flat[index]
+    return output, kept.astype(np.int32)
+
+
+def _read_chunks(data_path, chunk_size):
+    # yields blocks of whole lines
+    with open(data_path, 'rb') as f:
+        rest = b''
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            block = rest + block
+            end = block.rfind(b'\n')
+            if end < 0:
+                rest = block
+                continue
+            rest = block[end + 1:]
+            yield block[:end + 1]
+        if rest:
+            yield rest + b'\n'
+
+
+def _split_lines(chunk, encoding):
+    return [line.rstrip('\r') for line in chunk.decode(encoding)[:-1].split('\n')]
+
+
+# the vocabulary or builder used by the chunk functions, set once in every worker process
+_WORKER = None
+
+
+def _init_worker(state):
+    global _WORKER
+    _WORKER = state
+
+
+def _map_chunks(function, chunks, args, state, num_workers):
+    # yields function(chunk, *args) for the chunks in order, computed by num_workers processes, at most two chunks per
+    # process are in flight so that the memory stays bounded for files of any size
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_workers <= 1:
+        _init_worker(state)
+        try:
+            for chunk in chunks:
+                yield function(chunk, *args)
+        finally:
+            _init_worker(None)
+        return
+    with multiprocessing.Pool(num_workers, initializer=_init_worker, initargs=(state, )) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(function, (chunk, ) + args))
+            if len(pending) >= 2 * num_workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def _encode_chunk(chunk, add_start_end, encoding):
+    return _WORKER._encode_flat(_split_lines(chunk, encoding), add_start_end)
+
+
+def _count_chunk(chunk, encoding):
+    return _WORKER._count(_split_lines(chunk, encoding))
+
+
+def _tokenize(sentence, tokenizer, lower):
+    if lower:
+        sentence = sentence.lower()
+    return (tokenizer or regex_tokenizer)(sentence)
+
+
+class CompactVocabulary(object):
+    """An array-backed vocabulary which encodes and decodes batches of sentences.
+
+    The words are kept in a list ordered by id and indexed by a hash table. :meth:`encode` tokenizes a
+    batch of sentences, looks all of their tokens up in one pass and returns a padded ``int32`` matrix with the
+    lengths, :meth:`decode` selects the ids of all the sentences with one mask and maps them back to words. :meth:`encode_corpus`
+    encodes a text file of one sentence per line with several processes and writes the ids to a memory-mapped file.
+
+    The special words missing from ``words`` are appended, like in :class:`Vocabulary`.
+
+    Parameters
+    ----------
+    words : list of str
+        The words ordered by id.
+    start_word : str
+        Special word denoting sentence start.
+    end_word : str
+        Special word denoting sentence end.
+    unk_word : str
+        Special word denoting unknown words.
+    pad_word : str
+        Special word denoting padding.
+    tokenizer : function or None
+        A function splitting a sentence into tokens, it must be picklable to be used by :meth:`encode_corpus`. If None,
+        :func:`regex_tokenizer` is used.
+    lower : boolean
+        If True, the sentences are lower-cased before they are tokenized.
+
+    Attributes
+    ----------
+    words : numpy.array
+        The words ordered by id, an object array built on first access.
+    start_id : int
+        For start ID.
+    end_id : int
+        For end ID.
+    unk_id : int
+        For unknown ID.
+    pad_id : int
+        For Padding ID.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> vocab = tlx.text.CompactVocabulary.from_counts(collections.Counter("the cat sat on the mat".split()))
+    >>> ids, lengths = vocab.encode(["The cat sat.", "on the mat"])
+    >>> print(ids)
+    [[4 5 8 3]
+     [7 4 6 0]]
+    >>> print(lengths)
+    [4 3]
+    >>> vocab.decode(ids, lengths)
+    ['the cat sat <UNK>', 'on the mat']
+
+    """
+
+    def __init__(
+        self, words, start_word="<S>", end_word="</S>", unk_word="<UNK>", pad_word="<PAD>", tokenizer=None, lower=True
+    ):
+        words = list(words)
+        index = {word: i for i, word in enumerate(words)}
+        if len(index) != len(words):
+            duplicates = [word for word, count in collections.Counter(words).items() if count > 1]
+            raise ValueError("The words of a vocabulary should be unique, but got duplicates {}.".format(duplicates[:10]))
+        for word in (start_word, end_word, unk_word, pad_word):
+            if word not in index:
+                index[word] = len(words)
+                words.append(word)
+
+        self._index = index
+        self._word_list = words
+        self._words = None
+        self.start_word = start_word
+        self.end_word = end_word
+        self.unk_word = unk_word
+        self.pad_word = pad_word
+        self.start_id = index[start_word]
+        self.end_id = index[end_word]
+        self.unk_id = index[unk_word]
+        self.pad_id = index[pad_word]
+        self.tokenizer = tokenizer
+        self.lower = lower
+
+    @classmethod
+    def from_file(cls, vocab_file, **kwargs):
+        """Reads a vocabulary file in the format of :class:`Vocabulary`, where the words are the first
+        whitespace-separated token on each line and the word ids are the line numbers."""
+        if not os.path.exists(vocab_file):
+            raise ValueError("Vocabulary file {} not found.".format(vocab_file))
+        with io.open(vocab_file, 'r', encoding='utf-8') as f:
+            words = [line.split()[0] for line in f if line.strip()]
+        return cls(words, **kwargs)
+
+    @classmethod
+    def from_counts(cls, counts, max_size=None, min_count=1, **kwargs):
+        """Builds a vocabulary from a mapping of words to counts, the special words get the first ids, starting
+        with the padding word, and the other words are sorted by descending count.
+
+        Parameters
+        ----------
+        counts : dict or collections.Counter
+            Maps the words to their number of occurrences.
+        max_size : int or None
+            The maximum number of words, including the special words.
+        min_count : int
+            Minimum number of occurrences for a word.
+
+        """
+        specials = [
+            kwargs.get('pad_word', "<PAD>"),
+            kwargs.get('start_word', "<S>"),
+            kwargs.get('end_word', "</S>"),
+            kwargs.get('unk_word', "<UNK>")
+        ]
+        words = sorted(
+            (word for word, count in counts.items() if count >= min_count and word not in specials),
+            key=lambda word: (-counts[word], word)
+        )
+        words = specials + words
+        if max_size is not None:
+            words = words[:max(max_size, len(specials))]
+        return cls(words, **kwargs)
+
+    def save(self, vocab_file):
+        """Writes the words one per line, the file can be read by :meth:`from_file` and :class:`Vocabulary`."""
+        with io.open(vocab_file, 'w', encoding='utf-8') as f:
+            f.write(u'\n'.join(self._word_list) + u'\n')
+
+    @property
+    def words(self):
+        # an object array, a fixed-width string array would take the size of the longest word for every word
+        if self._words is None:
+            self._words = np.array(self._word_list, dtype=object)
+        return self._words
+
+    def __len__(self):
+        return len(self._word_list)
+
+    def __contains__(self, word):
+        return word in self._index
+
+    def __getstate__(self):
+        # only the word list is pickled, the hash index and the word array are rebuilt from it
+        state = self.__dict__.copy()
+        del state['_index']
+        state['_words'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._index = {word: i for i, word in enumerate(self._word_list)}
+
+    def word_to_id(self, word):
+        """Returns the integer word id of a word string."""
+        return self._index.get(word, self.unk_id)
+
+    def id_to_word(self, word_id):
+        """Returns the word string of an integer word id."""
+        if 0 <= word_id < len(self._word_list):
+            return self._word_list[word_id]
+        return self.unk_word
+
+    def tokenize(self, sentence):
+        """Splits a sentence into tokens with the tokenizer of the vocabulary."""
+        return _tokenize(sentence, self.tokenizer, self.lower)
+
+    def lookup(self, tokens):
+        """Returns the ``int32`` ids of a list of tokens, the unknown tokens get ``unk_id``."""
+        return np.fromiter(map(self._index.get, tokens, itertools.repeat(self.unk_id)), np.int32, len(tokens))
+
+    def _encode_flat(self, sentences, add_start_end):
+        # returns the ids of all the sentences one after another and the length of every sentence
+        sentences = [self.tokenize(s) if isinstance(s, str) else s for s in sentences]
+        lengths = np.fromiter(map(len, sentences), np.int32, len(sentences))
+        ids = self.lookup(list(itertools.chain.from_iterable(sentences)))
+        if add_start_end:
+            lengths = lengths + 2
+            ends = np.cumsum(lengths)
+            words = np.ones(int(ends[-1]) if len(ends) else 0, dtype=bool)
+            words[ends - lengths] = False
+            words[ends - 1] = False
+            flat = np.empty(len(words), dtype=np.int32)
+            flat[ends - lengths] = self.start_id
+            flat[ends - 1] = self.end_id
+            flat[words] = ids
+            ids = flat
+        return ids, lengths
+
+    def encode(self, sentences, max_length=None, padding='post', truncating='post', add_start_end=False):
+        """Encodes a batch of sentences into a padded id matrix.
+
+        Parameters
+        ----------
+        sentences : list of str or list of list of str
+            The sentences, or the sentences already split into tokens.
+        max_length : int or None
+            The number of columns of the matrix. If None, the length of the longest sentence.
+        padding : str
+            Either 'pre' or 'post', pad either before or after each sentence.
+        truncating : str
+            Either 'pre' or 'post', remove the tokens of the sentences longer than ``max_length`` either in the
+            beginning or in the end.
+        add_start_end : boolean
+            If True, every sentence starts with ``start_id`` and ends with ``end_id``.
+
+        Returns
+        -------
+        ids : numpy.array
+            The ``int32`` ids of shape (number of sentences, max_length), padded with ``pad_id``.
+        lengths : numpy.array
+            The ``int32`` number of tokens of every sentence after the truncation.
+
+        """
+        if padding not in ('pre', 'post'):
+            raise ValueError("padding should be 'pre' or 'post', but got {}.".format(padding))
+        if truncating not in ('pre', 'post'):
+            raise ValueError("truncating should be 'pre' or 'post', but got {}.".format(truncating))
+        ids, lengths = self._encode_flat(sentences, add_start_end)
+        return _pad(ids, lengths, max_length, self.pad_id, padding, truncating)
+
+    def decode(self, ids, lengths=None, join=True):
+        """Decodes an id matrix into sentences.
+
+        Parameters
+        ----------
+        ids : numpy.array or list of list of int
+            The ids of shape (number of sentences, length).
+        lengths : numpy.array or None
+            The number of tokens of every sentence, the tokens are the first ``lengths`` ids of each row. If None, all
+            the ids except ``pad_id`` are decoded.
+        join : boolean
+            If True, the words of every sentence are joined by spaces, else a list of words is returned for every
+            sentence.
+
+        Returns
+        -------
+        list of str or list of list of str
+            The sentences.
+
+        """
+        ids = np.asarray(ids)
+        if ids.ndim != 2:
+            raise ValueError("ids should be a matrix, but got an array of shape {}.".format(ids.shape))
+        if lengths is None:
+            keep = ids != self.pad_id
+        else:
+            keep = np.arange(ids.shape[1]) < np.asarray(lengths)[:, None]
+        flat = ids[keep]
+        flat = np.where((flat >= 0) & (flat < len(self._word_list)), flat, self.unk_id)
+        # the cached list hands out the same str objects, converting the numpy table would create new ones
+        tokens = list(map(self._word_list.__getitem__, flat.tolist()))
+        ends = np.cumsum(keep.sum(axis=1)).tolist()
+        rows = [tokens[start:end] for start, end in zip([0] + ends[:-1], ends)]
+        if join:
+            return [' '.join(row) for row in rows]
+        return rows
+
+    def encode_corpus(
+        self, data_path, target_path, num_workers=None, chunk_size=4 << 20, add_start_end=False, encoding='utf-8'
+    ):
+        """Encodes a text file of one sentence per line into a memory-mapped file of ``int32`` ids.
+
+        The file is read in chunks of whole lines which are encoded by ``num_workers`` processes, at most two chunks
+        per process are in flight so that the memory stays bounded for files of any size. The ids of all the
+        sentences are written one after another to ``target_path`` and the number of ids of every sentence to
+        ``target_path + '.lengths'``, both raw ``int32`` files which can be opened again with ``numpy.memmap``.
+
+        Parameters
+        ----------
+        data_path : str
+            Path to the data file in one-sentence-per-line format.
+        target_path : str
+            Path where the ids will be written.
+        num_workers : int or None
+            The number of processes. If None, the number of CPUs. With 0 or 1 the chunks are encoded in this process.
+        chunk_size : int
+            The approximate number of bytes of a chunk.
+        add_start_end : boolean
+            If True, every sentence starts with ``start_id`` and ends with ``end_id``.
+        encoding : str
+            The encoding of the data file.
+
+        Returns
+        -------
+        ids : numpy.memmap
+            The ids of all the sentences.
+        lengths : numpy.memmap
+            The number of ids of every sentence.
+
+        Examples
+        --------
+        With TensorLayerx
+
+        >>> ids, lengths = vocab.encode_corpus('train.txt', 'train.ids', num_workers=8)
+        >>> offsets = np.concatenate([[0], np.cumsum(lengths)])
+        >>> sentence = ids[offsets[10]:offsets[11]]
+
+        """
+        if not os.path.exists(data_path):
+            raise ValueError("Data file {} not found.".format(data_path))
+        lengths_path = target_path + '.lengths'
+        results = _map_chunks(
+            _encode_chunk, _read_chunks(data_path, chunk_size), (add_start_end, encoding), self, num_workers
+        )
+        num_sentences = 0
+        with open(target_path, 'wb') as ids_file, open(lengths_path, 'wb') as lengths_file:
+            for ids, lengths in results:
+                ids_file.write(ids.tobytes())
+                lengths_file.write(lengths.tobytes())
+                num_sentences += len(lengths)
+        tlx.logging.info("Encoded %d sentences of %s to %s" % (num_sentences, data_path, target_path))
+        return _open_ids(target_path), _open_ids(lengths_path)
+
+
+def _open_ids(path):
+    # numpy.memmap cannot map an empty file
+    if os.path.getsize(path) == 0:
+        return np.zeros((0, ), dtype=np.int32)
+    return np.memmap(path, dtype=np.int32, mode='r')
+
+
+class VocabularyBuilder(object):
+    """Counts the words of a corpus which does not fit in memory and builds a vocabulary of the most frequent ones.
+
+    Text files are streamed in chunks of whole lines which are tokenized and counted by a process pool, the counts of
+    the chunks are merged as they arrive. Builders which counted different parts of a corpus are merged with
+    :meth:`merge`.
+
+    By default the counts are exact, which needs memory for every distinct word. With ``approximate=True`` the counts
+    are kept in a count-min sketch of ``depth`` rows of ``width`` counters with conservative update, whose estimates are
+    never below the true counts and above them by at most ``e / width`` times the number of counted words with
+    probability ``1 - exp(-depth)``, and only the ``heavy_hitters`` words with the largest estimates are kept, so that the
+    memory is fixed whatever the number of distinct words.
+
+    Parameters
+    ----------
+    tokenizer : function or None
+        A function splitting a sentence into tokens, it must be picklable to be used by several processes. If None,
+        :func:`regex_tokenizer` is used.
+    lower : boolean
+        If True, the sentences are lower-cased before they are tokenized.
+    approximate : boolean
+        If True, the words are counted in a count-min sketch.
+    width : int
+        The number of counters of every row of the sketch.
+    depth : int
+        The number of rows of the sketch.
+    heavy_hitters : int
+        The number of words kept with an approximate count, it bounds the size of the vocabulary.
+
+    Attributes
+    ----------
+    total : int
+        The number of counted words.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> builder = tlx.text.VocabularyBuilder(approximate=True, heavy_hitters=200000)
+    >>> builder.update_files(['wiki_00.txt', 'wiki_01.txt'], num_workers=8)
+    >>> builder.save('vocab.txt', max_size=50000)
+    >>> vocab = tlx.text.Vocabulary('vocab.txt')
+
+    """
+
+    def __init__(
+        self, tokenizer=None, lower=True, approximate=False, width=2**20, depth=4, heavy_hitters=100000
+    ):
+        if approximate and (width < 1 or depth < 1 or heavy_hitters < 1):
+            raise ValueError(
+                "width, depth and heavy_hitters should be positive, but got {}, {} and {}.".format(
+                    width, depth, heavy_hitters
+                )
+            )
+        self.tokenizer = tokenizer
+        self.lower = lower
+        self.approximate = approximate
+        self.width = width
+        self.depth = depth
+        self.heavy_hitters = heavy_hitters
+        self.total = 0
+        if approximate:
+            self._sketch = np.zeros((depth, width), dtype=np.int64)
+            # the estimated counts of the candidate heavy hitters
+            self._candidates = {}
+        else:
+            self._counts = collections.Counter()
+
+    def _worker_copy(self):
+        # the workers only tokenize and hash, they do not need the counts
+        worker = object.__new__(VocabularyBuilder)
+        worker.__dict__.update(
+            (name, value) for name, value in self.__dict__.items() if name not in ('_sketch', '_candidates', '_counts')
+        )
+        return worker
+
+    def _columns(self, words):
+        # the counter of every word in every row of the sketch, a 64 bit key made of the crc32 and adler32 checksums
+        # is mixed with a different seed for every row by the finalizer of splitmix64, the builtin hash of str differs
+        # between processes
+        encoded = [word.encode('utf-8') for word in words]
+        crc = np.fromiter(map(zlib.crc32, encoded), np.uint64, len(encoded))
+        adler = np.fromiter(map(zlib.adler32, encoded), np.uint64, len(encoded))
+        seeds = (np.arange(1, self.depth + 1, dtype=np.uint64) * np.uint64(0x9e3779b97f4a7c15))[:, None]
+        with np.errstate(over='ignore'):
+            x = ((crc << np.uint64(32)) | adler) + seeds
+            x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+            x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+            x = x ^ (x >> np.uint64(31))
+        return (x % np.uint64(self.width)).astype(np.int64)
+
+    def _count(self, sentences):
+        # counts the words of a list of sentences, with approximate counting also returns their sketch counters
+        tokens = (_tokenize(s, self.tokenizer, self.lower) if isinstance(s, str) else s for s in sentences)
+        counts = collections.Counter(itertools.chain.from_iterable(tokens))
+        if not self.approximate:
+            return counts
+        words = list(counts)
+        return words, np.fromiter(counts.values(), np.int64, len(words)), self._columns(words)
+
+    def _add(self, counts):
+        if not self.approximate:
+            self._counts.update(counts)
+            self.total += sum(counts.values())
+            return
+        words, counts, columns = counts
+        # conservative update, a counter only grows up to the new estimate of the word, which keeps the estimates
+        # above the true counts and adds much less to the words sharing the counter
+        rows = np.arange(self.depth)[:, None]
+        estimates = self._sketch[rows, columns].min(axis=0) + counts
+        for row in range(self.depth):
+            np.maximum.at(self._sketch[row], columns[row], estimates)
+        self.total += int(counts.sum())
+        self._candidates.update(zip(words, estimates.tolist()))
+        if len(self._candidates) > 2 * self.heavy_hitters:
+            self._prune()
+
+    def _prune(self):
+        top = sorted(self._candidates.items(), key=lambda item: -item[1])[:self.heavy_hitters]
+        self._candidates = dict(top)
+
+    def update(self, sentences):
+        """Counts the words of a list of sentences, or of sentences already split into tokens."""
+        self._add(self._count(sentences))
+        return self
+
+    def update_files(self, paths, num_workers=None, chunk_size=4 << 20, encoding='utf-8'):
+        """Counts the words of text files of one sentence per line.
+
+        Parameters
+        ----------
+        paths : str or list of str
+            The text files.
+        num_workers : int or None
+            The number of processes. If None, the number of CPUs. With 0 or 1 the chunks are counted in this process.
+        chunk_size : int
+            The approximate number of bytes of a chunk.
+        encoding : str
+            The encoding of the files.
+
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        for path in paths:
+            if not os.path.exists(path):
+                raise ValueError("Data file {} not found.".format(path))
+
+        def chunks():
+            for path in paths:
+                for chunk in _read_chunks(path, chunk_size):
+                    yield chunk
+
+        for counts in _map_chunks(_count_chunk, chunks(), (encoding, ), self._worker_copy(), num_workers):
+            self._add(counts)
+        tlx.logging.info("Counted %d words of %d files" % (self.total, len(paths)))
+        return self
+
+    def merge(self, other):
+        """Adds the counts of another builder with the same counting options."""
+        options = (self.approximate, self.width, self.depth) if self.approximate else (False, )
+        other_options = (other.approximate, other.width, other.depth) if other.approximate else (False, )
+        if options != other_options:
+            raise ValueError("Only builders with the same counting options can be merged.")
+        if not self.approximate:
+            self._counts.update(other._counts)
+        else:
+            self._sketch += other._sketch
+            words = list(set(self._candidates) | set(other._candidates))
+            estimates = self._sketch[np.arange(self.depth)[:, None], self._columns(words)].min(axis=0)
+            self._candidates = dict(zip(words, estimates.tolist()))
+            if len(self._candidates) > self.heavy_hitters:
+                self._prune()
+        self.total += other.total
+        return self
+
+    def most_common(self, max_size=None, min_count=1):
+        """Returns the ``(word, count)`` pairs of the ``max_size`` most frequent words, sorted by descending count and
+        then by word, the counts are estimates with approximate counting."""
+        counts = self._candidates if self.approximate else self._counts
+        if self.approximate and max_size is not None and max_size > self.heavy_hitters:
+            tlx.logging.warning(
+                "max_size %d is larger than heavy_hitters %d, only %d words are kept." %
+                (max_size, self.heavy_hitters, self.heavy_hitters)
+            )
+        items = sorted((item for item in counts.items() if item[1] >= min_count), key=lambda item: (-item[1], item[0]))
+        return items if max_size is None else items[:max_size]
+
+    def save(self, vocab_file, max_size=None, min_count=1, pad_word="<PAD>"):
+        """Writes the most frequent words with their counts in the format of :func:`create_vocab`, which is read by
+        :class:`Vocabulary` and :meth:`CompactVocabulary.from_file`. ``pad_word`` is written first with a zero count
+        to reserve the id 0 for padding, it is not counted in ``max_size``."""
+        words = self.most_common(max_size, min_count)
+        if pad_word is not None:
+            words = [(pad_word, 0)] + [item for item in words if item[0] != pad_word]
+        with io.open(vocab_file, 'w', encoding='utf-8') as f:
+            f.write(u''.join(u'%s %d\n' % item for item in words))
+        tlx.logging.info("Wrote vocabulary file of %d words: %s" % (len(words), vocab_file))
+
+    def build(self, max_size=None, min_count=1, **kwargs):
+        """Returns a :class:`CompactVocabulary` of the ``max_size`` most frequent words and the special words, the
+        keyword arguments are passed to :class:`CompactVocabulary`."""
+        kwargs.setdefault('tokenizer', self.tokenizer)
+        kwargs.setdefault('lower', self.lower)
+        return CompactVocabulary.from_counts(dict(self.most_common(max_size, min_count)), **kwargs)
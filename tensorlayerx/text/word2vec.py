@@ -0,0 +1,261 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from tensorlayerx.dataflow import IterableDataset, get_worker_info
+
+__all__ = [
+    'AliasTable',
+    'Word2vecDataset',
+]
+
+
+class AliasTable(object):
+    """Draws samples from a discrete distribution in constant time per sample with the alias method of Walker and
+    Vose. The table is built once in linear time, then a batch of samples costs two random arrays and one
+    ``numpy.where``.
+
+    Parameters
+    ----------
+    weights : numpy.array
+        The non-negative weights of the outcomes, e.g. the counts of the words raised to the power 0.75 for the
+        negative sampling of word2vec.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> table = tlx.text.AliasTable(np.array([10., 5., 1.]) ** 0.75)
+    >>> negatives = table.sample((128, 5), rng=np.random.default_rng(0))
+
+    """
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 1 or len(weights) == 0 or np.any(weights < 0) or not weights.sum() > 0:
+            raise ValueError("weights should be a non-empty vector of non-negative numbers with a positive sum.")
+        n = len(weights)
+        scaled = weights * (n / weights.sum())
+        self.probability = np.ones(n, dtype=np.float64)
+        self.alias = np.arange(n, dtype=np.int64)
+        small = np.flatnonzero(scaled < 1.).tolist()
+        large = np.flatnonzero(scaled >= 1.).tolist()
+        scaled = scaled.tolist()
+        probability, alias = self.probability, self.alias
+        # every small outcome is filled up by a large one, which becomes small once it has given away enough
+        while small and large:
+            less, more = small.pop(), large[-1]
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - 1.
+            if scaled[more] < 1.:
+                small.append(large.pop())
+
+    def __len__(self):
+        return len(self.probability)
+
+    def sample(self, shape, rng=None):
+        """Returns an ``int64`` array of the given shape of samples."""
+        rng = np.random.default_rng() if rng is None else rng
+        outcome = rng.integers(len(self.probability), size=shape)
+        return np.where(rng.random(shape) < self.probability[outcome], outcome, self.alias[outcome])
+
+
+class Word2vecDataset(IterableDataset):
+    """Streams the skip-gram or CBOW training batches of a corpus of word ids, a vectorized and parallel
+    replacement of :func:`generate_skip_gram_batch`.
+
+    The corpus is cut into chunks of ``chunk_size`` words. The windows of a chunk are a strided view of the words and
+    all of its training pairs are extracted with NumPy masks, so that the time per batch does not grow with Python
+    loops over the words. Like the word2vec tool, the frequent words are randomly discarded before the windows are
+    taken, with the probability ``1 - (sqrt(f / subsample) + 1) * subsample / f`` for a word of frequency ``f``, and
+    the window of every center word is shrunk to a random size in ``[1, window]``. With ``num_negatives > 0`` every
+    pair gets negative samples drawn from the unigram distribution raised to the power ``0.75`` with an
+    :class:`AliasTable`.
+
+    The dataset yields whole batches, use it with ``batch_size=None`` in the :class:`DataLoader`. With several
+    workers the chunks are split between the workers by worker id, so every chunk is read exactly once per epoch.
+
+    Parameters
+    ----------
+    data : numpy.array
+        The word ids of the corpus one after another, e.g. the memory-mapped ids written by
+        :meth:`CompactVocabulary.encode_corpus`.
+    batch_size : int
+        The number of training pairs of a batch.
+    window : int
+        The maximum number of words considered on the left and on the right of a center word.
+    mode : str
+        'skipgram' yields the center words as inputs and one context word per pair as label, 'cbow' yields the
+        context words of a center word as inputs and the center word as label.
+    lengths : numpy.array or None
+        The number of words of every sentence of ``data``. If given, the windows do not cross the sentences.
+    counts : numpy.array or None
+        The number of occurrences of every word id, used for the subsampling and the negative sampling. If None, it
+        is counted from ``data``.
+    subsample : float or None
+        The subsampling threshold, usually between 1e-5 and 1e-3. None or 0 keeps all the words.
+    num_negatives : int
+        The number of negative samples of every pair, 0 for none.
+    dynamic_window : boolean
+        If True, the window of every center word has a random size in ``[1, window]``.
+    pad_id : int
+        The id filling the missing context words of the CBOW inputs.
+    shuffle : boolean
+        If True, the order of the chunks and the order of the pairs in a chunk are shuffled.
+    drop_last : boolean
+        If True, the last incomplete batch of a worker is dropped.
+    chunk_size : int
+        The number of words of a chunk.
+    seed : int or None
+        The seed of the random sampling, None draws a random seed when the dataset is created. The workers of a
+        non-persistent DataLoader should be told the epoch with :meth:`set_epoch` to get new samples every epoch.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> ids, lengths = vocab.encode_corpus('text8.txt', 'text8.ids')
+    >>> dataset = tlx.text.Word2vecDataset(ids, batch_size=1024, window=5, lengths=lengths, subsample=1e-4)
+    >>> loader = tlx.dataflow.DataLoader(dataset, batch_size=None, num_workers=4)
+    >>> emb_net = tlx.nn.Word2vecEmbedding(num_embeddings=len(vocab), embedding_dim=128, num_sampled=64)
+    >>> for inputs, labels in loader:
+    >>>     embedding, nce_loss = emb_net([inputs, labels], use_nce_loss=True)
+
+    """
+
+    def __init__(
+        self, data, batch_size=128, window=5, mode='skipgram', lengths=None, counts=None, subsample=1e-3,
+        num_negatives=0, dynamic_window=True, pad_id=0, shuffle=True, drop_last=False, chunk_size=1 << 18, seed=None
+    ):
+        super(Word2vecDataset, self).__init__()
+        if mode not in ('skipgram', 'cbow'):
+            raise ValueError("mode should be 'skipgram' or 'cbow', but got {}.".format(mode))
+        if window < 1 or batch_size < 1 or chunk_size < 1:
+            raise ValueError(
+                "window, batch_size and chunk_size should be positive, but got {}, {} and {}.".format(
+                    window, batch_size, chunk_size
+                )
+            )
+        self.data = data if isinstance(data, np.ndarray) else np.asarray(data, dtype=np.int64)
+        if self.data.ndim != 1:
+            raise ValueError("data should be a vector of word ids, but got shape {}.".format(self.data.shape))
+        if lengths is not None:
+            # the index of the first word of every sentence, to find the sentence of a word with searchsorted
+            lengths = np.asarray(lengths, dtype=np.int64)
+            if lengths.sum() != len(self.data):
+                raise ValueError("The lengths add up to {} words, but data has {}.".format(lengths.sum(), len(self.data)))
+            self._sentence_starts = np.cumsum(lengths) - lengths
+        else:
+            self._sentence_starts = None
+        if counts is None:
+            counts = np.bincount(self.data)
+        self.counts = np.asarray(counts, dtype=np.float64)
+        self.batch_size = batch_size
+        self.window = window
+        self.mode = mode
+        self.subsample = subsample
+        self.num_negatives = num_negatives
+        self.dynamic_window = dynamic_window
+        self.pad_id = pad_id
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.chunk_size = chunk_size
+        self.seed = int(np.random.SeedSequence().entropy % (1 << 63)) if seed is None else seed
+        self.epoch = 0
+
+        if subsample:
+            frequency = self.counts / max(self.counts.sum(), 1.)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                keep = (np.sqrt(frequency / subsample) + 1.) * subsample / frequency
+            self.keep_probability = np.where(frequency > 0, np.minimum(keep, 1.), 1.)
+        else:
+            self.keep_probability = None
+        self.negative_table = AliasTable(self.counts**0.75) if num_negatives > 0 else None
+
+    def set_epoch(self, epoch):
+        """Sets the epoch which seeds the chunk order and the sampling."""
+        self.epoch = epoch
+
+    def _chunk_pairs(self, start, rng):
+        # the training pairs of the center words in data[start:start + chunk_size], the words of the windows on both
+        # sides of the chunk are read too so that no pair is lost at the boundaries
+        end = min(start + self.chunk_size, len(self.data))
+        # the discarded words widen the windows, so more words are read around the chunk when subsampling
+        halo = self.window if self.keep_probability is None else self.window * 4
+        first, last = max(start - halo, 0), min(end + halo, len(self.data))
+        words = np.asarray(self.data[first:last], dtype=np.int64)
+        center = np.zeros(len(words), dtype=bool)
+        center[start - first:end - first] = True
+        if self._sentence_starts is not None:
+            sentence = np.searchsorted(self._sentence_starts, np.arange(first, last), side='right')
+        else:
+            sentence = np.zeros(len(words), dtype=np.int64)
+        if self.keep_probability is not None:
+            keep = rng.random(len(words)) < self.keep_probability[words]
+            words, center, sentence = words[keep], center[keep], sentence[keep]
+
+        window = self.window
+        width = 2 * window + 1
+        padded_words = np.concatenate([np.full(window, -1), words, np.full(window, -1)])
+        padded_sentence = np.concatenate([np.full(window, -1), sentence, np.full(window, -1)])
+        # one row per word, its window in the columns, without a copy
+        windows = np.lib.stride_tricks.sliding_window_view(padded_words, width)[center]
+        same_sentence = np.lib.stride_tricks.sliding_window_view(padded_sentence, width)[center] == sentence[center, None]
+        offsets = np.abs(np.arange(-window, window + 1))
+        if self.dynamic_window:
+            reach = rng.integers(1, window + 1, size=len(windows))
+        else:
+            reach = np.full(len(windows), window)
+        mask = same_sentence & (offsets <= reach[:, None]) & (offsets > 0)
+        centers = windows[:, window]
+
+        if self.mode == 'skipgram':
+            rows, columns = np.nonzero(mask)
+            inputs, labels = centers[rows], windows[rows, columns]
+        else:
+            has_context = mask.any(axis=1)
+            contexts = np.where(mask, windows, self.pad_id)[has_context]
+            # the context words first, the padding last, the center column is always padding
+            order = np.argsort(~mask[has_context], axis=1, kind='stable')
+            inputs = np.take_along_axis(contexts, order, axis=1)[:, :2 * window]
+            labels = centers[has_context]
+        if self.shuffle:
+            permutation = rng.permutation(len(labels))
+            inputs, labels = inputs[permutation], labels[permutation]
+        return inputs.astype(np.int32), labels.astype(np.int32).reshape(-1, 1)
+
+    def _batch(self, inputs, labels, rng):
+        if self.negative_table is None:
+            return inputs, labels
+        return inputs, labels, self.negative_table.sample((len(labels), self.num_negatives), rng).astype(np.int32)
+
+    def __iter__(self):
+        worker_info = get_worker_info()
+        worker_id, num_workers = (0, 1) if worker_info is None else (worker_info.id, worker_info.num_workers)
+        starts = np.arange(0, len(self.data), self.chunk_size)
+        if self.shuffle:
+            # every worker draws the same chunk order, so the split between the workers stays disjoint
+            starts = starts[np.random.default_rng((self.seed, self.epoch)).permutation(len(starts))]
+        rng = np.random.default_rng((self.seed, self.epoch, worker_id))
+        self.epoch += 1
+        pending_inputs, pending_labels = [], []
+        num_pending = 0
+        for start in starts[worker_id::num_workers]:
+            inputs, labels = self._chunk_pairs(int(start), rng)
+            pending_inputs.append(inputs)
+            pending_labels.append(labels)
+            num_pending += len(labels)
+            if num_pending < self.batch_size:
+                continue
+            inputs, labels = np.concatenate(pending_inputs), np.concatenate(pending_labels)
+            num_batches = len(labels) // self.batch_size
+            for i in range(num_batches):
+                batch = slice(i * self.batch_size, (i + 1) * self.batch_size)
+                yield self._batch(inputs[batch], labels[batch], rng)
+            rest = num_batches * self.batch_size
+            pending_inputs, pending_labels = [inputs[rest:]], [labels[rest:]]
+            num_pending = len(labels) - rest
+        if num_pending > 0 and not self.drop_last:
+            yield self._batch(np.concatenate(pending_inputs), np.concatenate(pending_labels), rng)
@@ -4,4 +4,5 @@
 # from .iterate import *
 # from .prepro import *
 from .lazy_imports import *
+from . import distributed
 # from .visualize import *
@@ -0,0 +1,414 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import socket
+import tensorlayerx as tlx
+from tensorlayerx import logging
+
+__all__ = [
+    'init_process_group',
+    'destroy_process_group',
+    'is_initialized',
+    'get_rank',
+    'get_world_size',
+    'all_reduce_gradients',
+    'broadcast_weights',
+    'partition_dataset',
+    'spawn',
+]
+
+# the processes of TensorFlow and MindSpore can not be asked whether they joined a group
+_initialized = {'value': False}
+
+# the gradients of PyTorch are all-reduced in flat buckets of this size, one collective call per bucket
+_BUCKET_BYTES = 25 << 20
+
+
+def _horovod():
+    try:
+        import horovod.tensorflow as hvd
+    except ImportError:
+        raise ImportError(
+            "Data-parallel training with the TensorFlow backend requires Horovod, install it with "
+            "`pip install horovod` and launch the processes with `horovodrun`."
+        )
+    return hvd
+
+
+def init_process_group(backend=None, init_method=None, world_size=None, rank=None):
+    """Joins the calling process to the group of data-parallel training processes, with the collective library
+    of the backend: ``torch.distributed`` for PyTorch, ``paddle.distributed`` for PaddlePaddle, Horovod for
+    TensorFlow and ``mindspore.communication`` for MindSpore.
+
+    Parameters
+    ----------
+    backend : str
+        The PyTorch collective backend. Default None, which uses ``gloo`` and works on CPU hosts.
+    init_method : str
+        The PyTorch rendezvous URL. Default None, which reads ``MASTER_ADDR`` and ``MASTER_PORT`` from the
+        environment.
+    world_size : int
+        The number of processes. Default None, which reads the ``WORLD_SIZE`` environment variable.
+    rank : int
+        The rank of the calling process. Default None, which reads the ``RANK`` environment variable.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> import tensorlayerx as tlx
+    >>> tlx.utils.distributed.init_process_group()
+    >>> model.train(n_epoch=10, train_dataset=train_loader, distributed=True)
+
+    """
+    if tlx.BACKEND == 'torch':
+        import torch.distributed as dist
+        if world_size is None:
+            world_size = int(os.environ.get('WORLD_SIZE', 1))
+        if rank is None:
+            rank = int(os.environ.get('RANK', 0))
+        dist.init_process_group(
+            backend or 'gloo', init_method=init_method or 'env://', world_size=world_size, rank=rank
+        )
+    elif tlx.BACKEND == 'paddle':
+        import paddle.distributed as pd_dist
+        pd_dist.init_parallel_env()
+    elif tlx.BACKEND == 'tensorflow':
+        _horovod().init()
+    elif tlx.BACKEND == 'mindspore':
+        from mindspore.communication import init
+        init()
+    else:
+        raise NotImplementedError("This backend is not supported")
+    _initialized['value'] = True
+
+
+def destroy_process_group():
+    """Leaves the group of data-parallel training processes."""
+    if tlx.BACKEND == 'torch':
+        import torch.distributed as dist
+        if dist.is_initialized():
+            dist.destroy_process_group()
+    elif tlx.BACKEND == 'tensorflow' and _initialized['value']:
+        _horovod().shutdown()
+    elif tlx.BACKEND == 'mindspore' and _initialized['value']:
+        from mindspore.communication import release
+        release()
+    _initialized['value'] = False
+
+
+def is_initialized():
+    """Returns whether the calling process joined a group of data-parallel training processes."""
+    if tlx.BACKEND == 'torch':
+        import torch.distributed as dist
+        return dist.is_available() and dist.is_initialized()
+    if tlx.BACKEND == 'paddle':
+        import paddle.distributed as pd_dist
+        return pd_dist.is_initialized() if hasattr(pd_dist, 'is_initialized') else _initialized['value']
+    return _initialized['value']
+
+
+def get_rank():
+    """Returns the rank of the calling process, 0 if it is not in a group."""
+    if not is_initialized():
+        return 0
+    if tlx.BACKEND == 'torch':
+        import torch.distributed as dist
+        return dist.get_rank()
+    elif tlx.BACKEND == 'paddle':
+        import paddle.distributed as pd_dist
+        return pd_dist.get_rank()
+    elif tlx.BACKEND == 'tensorflow':
+        return _horovod().rank()
+    from mindspore.communication import get_rank as ms_get_rank
+    return ms_get_rank()
+
+
+def get_world_size():
+    """Returns the number of processes in the group, 1 if the calling process is not in a group."""
+    if not is_initialized():
+        return 1
+    if tlx.BACKEND == 'torch':
+        import torch.distributed as dist
+        return dist.get_world_size()
+    elif tlx.BACKEND == 'paddle':
+        import paddle.distributed as pd_dist
+        return pd_dist.get_world_size()
+    elif tlx.BACKEND == 'tensorflow':
+        return _horovod().size()
+    from mindspore.communication import get_group_size
+    return get_group_size()
+
+
+def _torch_buckets(grads):
+    bucket, nbytes = [], 0
+    for grad in grads:
+        bucket.append(grad)
+        nbytes += grad.numel() * grad.element_size()
+        if nbytes >= _BUCKET_BYTES:
+            yield bucket
+            bucket, nbytes = [], 0
+    if bucket:
+        yield bucket
+
+
+def all_reduce_gradients(grads):
+    """Averages the gradients over all processes of the group, and returns them.
+
+    The gradients of PyTorch and PaddlePaddle are averaged in place, so the optimizers which read the gradients
+    from the weights see the average. ``None`` gradients are returned unchanged.
+
+    Parameters
+    ----------
+    grads : list
+        The gradients of the calling process, in the same order in every process.
+
+    """
+    world_size = get_world_size()
+    if world_size == 1:
+        return grads
+    if tlx.BACKEND == 'torch':
+        import torch
+        import torch.distributed as dist
+        # one all-reduce per flat bucket instead of one per gradient
+        for bucket in _torch_buckets([g for g in grads if g is not None]):
+            flat = torch.cat([g.reshape(-1) for g in bucket])
+            dist.all_reduce(flat)
+            flat /= world_size
+            offset = 0
+            for g in bucket:
+                g.copy_(flat[offset:offset + g.numel()].view_as(g))
+                offset += g.numel()
+        return grads
+    elif tlx.BACKEND == 'paddle':
+        import paddle.distributed as pd_dist
+        for g in grads:
+            if g is not None:
+                pd_dist.all_reduce(g)
+                g.scale_(1.0 / world_size)
+        return grads
+    elif tlx.BACKEND == 'tensorflow':
+        hvd = _horovod()
+        return [None if g is None else hvd.allreduce(g, op=hvd.Average) for g in grads]
+    from mindspore import ops
+    all_reduce = ops.AllReduce()
+    return [None if g is None else all_reduce(g) / world_size for g in grads]
+
+
+def broadcast_weights(weights, src=0):
+    """Copies the values of the weights of process ``src`` to all processes of the group, so every process starts
+    training from the same weights.
+
+    Parameters
+    ----------
+    weights : list
+        The weights, e.g. ``network.all_weights``, in the same order in every process.
+    src : int
+        The rank of the process whose values are broadcast. Default 0.
+
+    """
+    if get_world_size() == 1:
+        return
+    if tlx.BACKEND == 'torch':
+        import torch
+        import torch.distributed as dist
+        with torch.no_grad():
+            for w in weights:
+                dist.broadcast(w.data, src)
+    elif tlx.BACKEND == 'paddle':
+        import paddle.distributed as pd_dist
+        for w in weights:
+            pd_dist.broadcast(w, src)
+    elif tlx.BACKEND == 'tensorflow':
+        _horovod().broadcast_variables(weights, root_rank=src)
+    else:
+        from mindspore import ops
+        broadcast = ops.Broadcast(src)
+        for w in weights:
+            w.set_data(broadcast((w, ))[0])
+
+
+class _PartitionedBatches(object):
+    # every process takes every num_replicas-th batch, and all take the same number of batches
+
+    def __init__(self, batches, num_replicas, rank):
+        self.batches = batches
+        self.num_replicas = num_replicas
+        self.rank = rank
+
+    def __len__(self):
+        return len(self.batches) // self.num_replicas
+
+    def __iter__(self):
+        return itertools.islice(iter(self.batches), self.rank, len(self) * self.num_replicas, self.num_replicas)
+
+
+def partition_dataset(dataset, num_replicas=None, rank=None):
+    """Returns the part of a training dataset read by the calling process in data-parallel training.
+
+    A :class:`tensorlayerx.dataflow.DataLoader` with a sequential or random sampler is switched to a
+    :class:`tensorlayerx.dataflow.DistributedSampler`, in place, and one which already uses a DistributedSampler
+    is returned unchanged. Any other iterable of batches with a length is split batch-wise, the process of rank
+    ``r`` reading the batches ``r, r + num_replicas, ...``. Every process gets the same number of batches, which
+    the gradient all-reduce of every step requires.
+
+    Parameters
+    ----------
+    dataset : DataLoader or Iterable
+        The batches of the training data.
+    num_replicas : int
+        The number of processes. Default None, which uses :func:`get_world_size`.
+    rank : int
+        The rank of the calling process. Default None, which uses :func:`get_rank`.
+
+    """
+    from tensorlayerx.dataflow import (DataLoader, BatchSampler, DistributedSampler, RandomSampler, SequentialSampler,
+                                       IterableDataset)
+    num_replicas = get_world_size() if num_replicas is None else num_replicas
+    rank = get_rank() if rank is None else rank
+    if num_replicas == 1:
+        return dataset
+    if isinstance(dataset, DataLoader) and not isinstance(dataset.dataset, IterableDataset):
+        sampler = dataset.sampler
+        if isinstance(sampler, DistributedSampler) or isinstance(getattr(dataset.batch_sampler, 'sampler', None),
+                                                                 DistributedSampler):
+            return dataset
+        if type(sampler) not in (SequentialSampler, RandomSampler) or type(dataset.batch_sampler) is not BatchSampler:
+            raise ValueError(
+                "can not partition a DataLoader with a {}, use a DistributedSampler instead.".format(
+                    type(sampler).__name__
+                )
+            )
+        sampler = DistributedSampler(
+            dataset.dataset, num_replicas=num_replicas, rank=rank, shuffle=isinstance(sampler, RandomSampler)
+        )
+        dataset.sampler = sampler
+        dataset.batch_sampler = BatchSampler(sampler, dataset.batch_size, dataset.drop_last)
+        return dataset
+    if not hasattr(dataset, '__len__'):
+        raise TypeError(
+            "can not partition a dataset without a length, every process must read the same number of batches."
+        )
+    return _PartitionedBatches(dataset, num_replicas, rank)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('', 0))
+        return s.getsockname()[1]
+
+
+def _spawned_worker(fn, args, env, backend):
+    os.environ.update(env)
+    if tlx.BACKEND == 'paddle':
+        os.environ['PADDLE_TRAINER_ID'] = env['RANK']
+        os.environ['PADDLE_TRAINERS_NUM'] = env['WORLD_SIZE']
+        port = int(env['MASTER_PORT'])
+        endpoints = ['{}:{}'.format(env['MASTER_ADDR'], port + i) for i in range(int(env['WORLD_SIZE']))]
+        os.environ['PADDLE_TRAINER_ENDPOINTS'] = ','.join(endpoints)
+        os.environ['PADDLE_CURRENT_ENDPOINT'] = endpoints[int(env['RANK'])]
+    init_process_group(backend)
+    try:
+        fn(int(env['LOCAL_RANK']), *args)
+    finally:
+        destroy_process_group()
+
+
+def spawn(fn, nprocs, args=(), nnodes=1, node_rank=0, master_addr='127.0.0.1', master_port=None, backend=None):
+    """Starts ``nprocs`` data-parallel training processes on this host and waits for them.
+
+    Every process joins the group with :func:`init_process_group` and calls ``fn(local_rank, *args)``, in which
+    a :class:`Model` trained with ``distributed=True`` averages its gradients with the other processes. To train on
+    several hosts, run ``spawn`` on every host with the same ``nnodes``, ``master_addr`` and ``master_port`` and
+    its own ``node_rank``. With TensorFlow and MindSpore, launch the processes with ``horovodrun`` or ``msrun``
+    and call :func:`init_process_group` instead.
+
+    Parameters
+    ----------
+    fn : callable
+        The training function, a module-level function so it can be sent to the processes.
+    nprocs : int
+        The number of processes on this host, e.g. ``os.cpu_count()`` divided by the threads per process.
+    args : tuple
+        Further arguments of ``fn``.
+    nnodes : int
+        The number of hosts. Default 1.
+    node_rank : int
+        The rank of this host. Default 0.
+    master_addr : str
+        The address of the host of rank 0. Default '127.0.0.1'.
+    master_port : int
+        A free port of the host of rank 0. Default None, which picks one on a single host.
+    backend : str
+        The PyTorch collective backend, see :func:`init_process_group`.
+
+    Examples
+    --------
+    With TensorLayerx
+
+    >>> import tensorlayerx as tlx
+    >>> def main(rank):
+    >>>     model = tlx.model.Model(network=Net(), loss_fn=tlx.losses.softmax_cross_entropy_with_logits, optimizer=tlx.optimizers.Adam(1e-3))
+    >>>     model.train(n_epoch=10, train_dataset=tlx.dataflow.DataLoader(train_dataset, batch_size=32, shuffle=True), distributed=True)
+    >>> if __name__ == '__main__':
+    >>>     tlx.utils.distributed.spawn(main, nprocs=4)
+
+    """
+    if tlx.BACKEND in ('tensorflow', 'mindspore'):
+        raise NotImplementedError(
+            "spawn does not support the {} backend, launch the processes with horovodrun or msrun and call "
+            "init_process_group.".format(tlx.BACKEND)
+        )
+    if not isinstance(nprocs, int) or nprocs <= 0:
+        raise ValueError("nprocs should be a positive integer, but got {}.".format(nprocs))
+    if master_port is None:
+        if nnodes > 1:
+            raise ValueError("master_port should be given when training on several hosts.")
+        master_port = _free_port()
+    world_size = nnodes * nprocs
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    # the spawned interpreters inherit the environment and import tensorlayerx before running the worker, the
+    # backend variable makes them load the backend of this process
+    backend_env = os.environ.get('TL_BACKEND')
+    os.environ['TL_BACKEND'] = tlx.BACKEND
+    try:
+        for local_rank in range(nprocs):
+            env = {
+                'MASTER_ADDR': master_addr,
+                'MASTER_PORT': str(master_port),
+                'WORLD_SIZE': str(world_size),
+                'RANK': str(node_rank * nprocs + local_rank),
+                'LOCAL_RANK': str(local_rank),
+            }
+            process = context.Process(target=_spawned_worker, args=(fn, args, env, backend))
+            process.start()
+            processes.append(process)
+    finally:
+        if backend_env is None:
+            del os.environ['TL_BACKEND']
+        else:
+            os.environ['TL_BACKEND'] = backend_env
+    failed = None
+    try:
+        # the other processes block in a collective when one fails, so stop waiting at the first failure
+        pending = list(processes)
+        while pending and failed is None:
+            multiprocessing.connection.wait([process.sentinel for process in pending])
+            for process in pending:
+                if process.exitcode is not None and process.exitcode != 0:
+                    failed = (processes.index(process), process.exitcode)
+                    logging.error("Training process {} exited with code {}.".format(*failed))
+                    break
+            pending = [process for process in pending if process.exitcode is None]
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+    if failed is not None:
+        raise RuntimeError("training process {} exited with code {}.".format(*failed))
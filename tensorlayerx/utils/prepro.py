@@ -1,8 +1,11 @@
 #! /usr/bin/python
 # -*- coding: utf-8 -*-
 
+import collections
 import copy
+import itertools
 import math
+import numbers
 import random
 import threading
 import time
@@ -106,6 +109,14 @@ __all__ = [
     'sequences_add_end_id',
     'sequences_add_end_id_after_pad',
     'sequences_get_mask',
+    'sequences_to_ragged',
+    'ragged_to_sequences',
+    'ragged_truncate',
+    'ragged_mask',
+    'ragged_pad',
+    'ragged_from_padded',
+    'ragged_add_start_end',
+    'pad_collate',
     'keypoint_random_crop',
     'keypoint_resize_random_crop',
     'keypoint_random_rotate',
@@ -3313,46 +3324,8 @@ def pad_sequences(sequences, maxlen=None, dtype='int32', padding='post', truncat
      [3 3 0 0 0]]
 
     """
-    lengths = [len(s) for s in sequences]
-
-    nb_samples = len(sequences)
-    if maxlen is None:
-        maxlen = np.max(lengths)
-
-    # take the sample shape from the first non empty sequence
-    # checking for consistency in the main loop below.
-    sample_shape = tuple()
-    for s in sequences:
-        if len(s) > 0:
-            sample_shape = np.asarray(s).shape[1:]
-            break
-
-    x = (np.ones((nb_samples, maxlen) + sample_shape) * value).astype(dtype)
-    for idx, s in enumerate(sequences):
-        if len(s) == 0:
-            continue  # empty list was found
-        if truncating == 'pre':
-            trunc = s[-maxlen:]
-        elif truncating == 'post':
-            trunc = s[:maxlen]
-        else:
-            raise ValueError('Truncating type "%s" not understood' % truncating)
-
-        # check `trunc` has expected shape
-        trunc = np.asarray(trunc, dtype=dtype)
-        if trunc.shape[1:] != sample_shape:
-            raise ValueError(
-                'Shape of sample %s of sequence at position %s is different from expected shape %s' %
-                (trunc.shape[1:], idx, sample_shape)
-            )
-
-        if padding == 'post':
-            x[idx, :len(trunc)] = trunc
-        elif padding == 'pre':
-            x[idx, -len(trunc):] = trunc
-        else:
-            raise ValueError('Padding type "%s" not understood' % padding)
-    return x.tolist()
+    values, offsets = sequences_to_ragged(sequences, dtype)
+    return ragged_pad(values, offsets, maxlen, dtype, padding, truncating, value).tolist()
 
 
 def remove_pad_sequences(sequences, pad_id=0):
@@ -3584,14 +3557,393 @@ def sequences_get_mask(sequences, pad_val=0):
      [1 1 1 1 1 0]]
 
     """
-    mask = np.ones_like(sequences)
-    for i, seq in enumerate(sequences):
-        for i_w in reversed(range(len(seq))):
-            if seq[i_w] == pad_val:
-                mask[i, i_w] = 0
-            else:
-                break  # <-- exit the for loop, prepcess next sequence
-    return mask
+    sequences = np.asarray(sequences)
+    _, offsets = ragged_from_padded(sequences, pad_id=pad_val)
+    return ragged_mask(offsets, sequences.shape[1]).astype(sequences.dtype)
+
+
+def _check_padding(padding, truncating='post'):
+    if padding not in ('pre', 'post'):
+        raise ValueError('Padding type "%s" not understood' % padding)
+    if truncating not in ('pre', 'post'):
+        raise ValueError('Truncating type "%s" not understood' % truncating)
+
+
+def sequences_to_ragged(sequences, dtype=None):
+    """Concatenates sequences of different lengths into the ragged representation used by the ``ragged_*``
+    functions: one flat array of values and the offsets of the sequences in it.
+
+    Parameters
+    -----------
+    sequences : list of list or list of numpy.array
+        All sequences where each row is a sequence, the items can be numbers or arrays of the same shape.
+    dtype : numpy.dtype or str or None
+        Data type of the values, None keeps the type of the inputs.
+
+    Returns
+    ----------
+    values : numpy.array
+        The items of all sequences one after another.
+    offsets : numpy.array
+        The ``int64`` array of ``len(sequences) + 1`` offsets, the sequence ``i`` is ``values[offsets[i]:offsets[i + 1]]``.
+
+    Examples
+    ---------
+    >>> values, offsets = sequences_to_ragged([[1, 1, 1, 1, 1], [2, 2, 2], [3, 3]])
+    >>> values
+    [1 1 1 1 1 2 2 2 3 3]
+    >>> offsets
+    [ 0  5  8 10]
+
+    """
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if offsets[-1] == 0:
+        values = np.zeros((0, ), dtype=np.float64 if dtype is None else dtype)
+    elif all(isinstance(s, np.ndarray) for s in sequences):
+        values = np.concatenate(sequences)
+    else:
+        first = next(s for s in sequences if len(s) > 0)[0]
+        if isinstance(first, (numbers.Number, np.generic)):
+            # flat sequences of numbers are read without building an array per sequence
+            values = np.fromiter(
+                itertools.chain.from_iterable(sequences), dtype=np.asarray(first).dtype if dtype is None else dtype,
+                count=int(offsets[-1])
+            )
+        else:
+            values = np.concatenate([np.asarray(s) for s in sequences if len(s) > 0])
+    if dtype is not None:
+        values = values.astype(dtype, copy=False)
+    return values, offsets
+
+
+def ragged_to_sequences(values, offsets):
+    """Splits ragged sequences back into a list of arrays, which are views of ``values``.
+
+    Parameters
+    -----------
+    values : numpy.array
+        The items of all sequences one after another.
+    offsets : numpy.array
+        The offsets of the sequences in ``values``.
+
+    Returns
+    ----------
+    list of numpy.array
+        The sequences.
+
+    Examples
+    ---------
+    >>> ragged_to_sequences(np.array([1, 1, 2, 3, 3, 3]), np.array([0, 2, 3, 6]))
+    [array([1, 1]), array([2]), array([3, 3, 3])]
+
+    """
+    return np.split(values[offsets[0]:offsets[-1]], np.asarray(offsets[1:-1]) - offsets[0])
+
+
+def ragged_truncate(values, offsets, maxlen, truncating='pre'):
+    """Truncates ragged sequences to at most ``maxlen`` items.
+
+    Parameters
+    -----------
+    values : numpy.array
+        The items of all sequences one after another.
+    offsets : numpy.array
+        The offsets of the sequences in ``values``.
+    maxlen : int
+        Maximum length.
+    truncating : str
+        Either 'pre' or 'post', remove items from sequences longer than maxlen either in the beginning or in the end.
+
+    Returns
+    ----------
+    values : numpy.array
+        The items of the truncated sequences.
+    offsets : numpy.array
+        The offsets of the truncated sequences.
+
+    Examples
+    ---------
+    >>> values, offsets = sequences_to_ragged([[1, 2, 3, 4], [5, 6], [7, 8, 9]])
+    >>> ragged_truncate(values, offsets, maxlen=2, truncating='post')
+    (array([1, 2, 5, 6, 7, 8]), array([0, 2, 4, 6]))
+
+    """
+    _check_padding('post', truncating)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.diff(offsets)
+    kept = np.minimum(lengths, maxlen)
+    new_offsets = np.zeros_like(offsets)
+    np.cumsum(kept, out=new_offsets[1:])
+    if np.array_equal(kept, lengths):
+        return values[offsets[0]:offsets[-1]], new_offsets
+    # the position of every item in its sequence
+    position = np.arange(offsets[0], offsets[-1]) - np.repeat(offsets[:-1], lengths)
+    if truncating == 'pre':
+        keep = position >= np.repeat(lengths - kept, lengths)
+    else:
+        keep = position < np.repeat(kept, lengths)
+    return values[offsets[0]:offsets[-1]][keep], new_offsets
+
+
+def ragged_mask(offsets, maxlen=None, padding='post'):
+    """Returns the boolean mask of the items of ragged sequences once padded, True for the items and False for the
+    padding. Sequences longer than ``maxlen`` fill their whole row.
+
+    Parameters
+    -----------
+    offsets : numpy.array
+        The offsets of the sequences.
+    maxlen : int or None
+        The length of the padded sequences, None for the longest length.
+    padding : str
+        Either 'pre' or 'post', the padding before or after each sequence.
+
+    Returns
+    ----------
+    numpy.array
+        The mask of shape (number_of_sequences, maxlen).
+
+    Examples
+    ---------
+    >>> ragged_mask(np.array([0, 3, 4]), maxlen=4)
+    [[ True  True  True False]
+     [ True False False False]]
+
+    """
+    _check_padding(padding)
+    lengths = np.diff(offsets)
+    if maxlen is None:
+        maxlen = int(lengths.max()) if len(lengths) else 0
+    if padding == 'post':
+        return np.arange(maxlen) < lengths[:, None]
+    return np.arange(maxlen) >= maxlen - lengths[:, None]
+
+
+def ragged_pad(values, offsets, maxlen=None, dtype=None, padding='post', truncating='pre', value=0.):
+    """Pads ragged sequences into one array with the same behaviour as :func:`pad_sequences`, but with a single
+    vectorized assignment and without converting the result into lists.
+
+    Parameters
+    -----------
+    values : numpy.array
+        The items of all sequences one after another.
+    offsets : numpy.array
+        The offsets of the sequences in ``values``.
+    maxlen : int or None
+        Maximum length, None for the longest length.
+    dtype : numpy.dtype or str or None
+        Data type of the padded array, None keeps the type of ``values``.
+    padding : str
+        Either 'pre' or 'post', pad either before or after each sequence.
+    truncating : str
+        Either 'pre' or 'post', remove values from sequences larger than maxlen either in the beginning or in the end of the sequence
+    value : float
+        Value to pad the sequences to the desired value.
+
+    Returns
+    ----------
+    numpy.array
+        With dimensions (number_of_sequences, maxlen) followed by the shape of the items.
+
+    Examples
+    ---------
+    >>> values, offsets = sequences_to_ragged([[1, 1, 1, 1, 1], [2, 2, 2], [3, 3]])
+    >>> ragged_pad(values, offsets, maxlen=4, padding='post', truncating='pre')
+    [[1 1 1 1]
+     [2 2 2 0]
+     [3 3 0 0]]
+
+    """
+    _check_padding(padding, truncating)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if maxlen is None:
+        maxlen = int(np.diff(offsets).max()) if len(offsets) > 1 else 0
+    values, offsets = ragged_truncate(values, offsets, maxlen, truncating)
+    x = np.full((len(offsets) - 1, maxlen) + values.shape[1:], value, dtype=values.dtype if dtype is None else dtype)
+    x[ragged_mask(offsets, maxlen, padding)] = values
+    return x
+
+
+def ragged_from_padded(padded, pad_id=0, lengths=None, padding='post', end_id=None):
+    """Removes the padding of padded sequences and returns them as ragged sequences, the inverse of :func:`ragged_pad`.
+
+    Parameters
+    -----------
+    padded : numpy.array
+        The padded sequences of shape (number_of_sequences, maxlen) followed by the shape of the items.
+    pad_id : int
+        The pad ID, only the padding at the end (or the beginning with ``padding='pre'``) is removed.
+    lengths : numpy.array or None
+        The lengths of the sequences, if known. None finds them from ``pad_id``.
+    padding : str
+        Either 'pre' or 'post', the padding before or after each sequence.
+    end_id : int or None
+        If given, every sequence is also cut before its first ``end_id``, like :func:`process_sequences`.
+        Only used with ``padding='post'``.
+
+    Returns
+    ----------
+    values : numpy.array
+        The items of all sequences one after another.
+    offsets : numpy.array
+        The offsets of the sequences in ``values``.
+
+    Examples
+    ---------
+    >>> ragged_from_padded(np.array([[2, 3, 4, 0, 0], [4, 5, 0, 2, 0]]), pad_id=0)
+    (array([2, 3, 4, 4, 5, 0, 2]), array([0, 3, 7]))
+    >>> ragged_from_padded(np.array([[4, 3, 2, 2], [5, 3, 9, 4]]), end_id=2)
+    (array([4, 3, 5, 3, 9, 4]), array([0, 2, 6]))
+
+    """
+    _check_padding(padding)
+    padded = np.asarray(padded)
+    maxlen = padded.shape[1]
+    if lengths is None:
+        items = padded != pad_id
+        if items.ndim > 2:
+            items = items.reshape(items.shape[:2] + (-1, )).any(axis=2)
+        if padding == 'post':
+            last = np.argmax(items[:, ::-1], axis=1)
+        else:
+            last = np.argmax(items, axis=1)
+        lengths = np.where(items.any(axis=1), maxlen - last, 0)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    if end_id is not None and padding == 'post':
+        is_end = padded == end_id
+        if is_end.ndim > 2:
+            is_end = is_end.reshape(is_end.shape[:2] + (-1, )).all(axis=2)
+        lengths = np.where(is_end.any(axis=1), np.minimum(np.argmax(is_end, axis=1), lengths), lengths)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return padded[ragged_mask(offsets, maxlen, padding)], offsets
+
+
+def ragged_add_start_end(values, offsets, start_id=None, end_id=None):
+    """Adds a start ID at the beginning and an end ID at the end of every ragged sequence.
+
+    Parameters
+    -----------
+    values : numpy.array
+        The items of all sequences one after another.
+    offsets : numpy.array
+        The offsets of the sequences in ``values``.
+    start_id : int or None
+        The start ID, None for no start ID.
+    end_id : int or None
+        The end ID, None for no end ID.
+
+    Returns
+    ----------
+    values : numpy.array
+        The items of the new sequences.
+    offsets : numpy.array
+        The offsets of the new sequences.
+
+    Examples
+    ---------
+    >>> values, offsets = sequences_to_ragged([[4, 3, 5], [5, 3]])
+    >>> ragged_add_start_end(values, offsets, start_id=1, end_id=2)
+    (array([1, 4, 3, 5, 2, 1, 5, 3, 2]), array([0, 5, 9]))
+
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    extra = (start_id is not None) + (end_id is not None)
+    lengths = np.diff(offsets)
+    new_offsets = offsets - offsets[0] + np.arange(len(offsets)) * extra
+    out = np.empty((new_offsets[-1], ) + values.shape[1:], dtype=values.dtype)
+    # every item moves right by the ids added to the sequences before it and by its own start id
+    body = np.arange(offsets[-1] - offsets[0]) + np.repeat(np.arange(len(lengths)) * extra, lengths)
+    if start_id is not None:
+        body += 1
+        out[new_offsets[:-1]] = start_id
+    if end_id is not None:
+        out[new_offsets[1:] - 1] = end_id
+    out[body] = values[offsets[0]:offsets[-1]]
+    return out, new_offsets
+
+
+def _pad_collate_field(samples, **kwargs):
+    data = samples[0]
+    if isinstance(data, (numbers.Number, np.generic)):
+        return np.asarray(samples)
+    elif isinstance(data, (str, bytes)):
+        return samples
+    elif isinstance(data, collections.abc.Mapping):
+        return {key: _pad_collate_field([d[key] for d in samples], **kwargs) for key in data}
+    elif isinstance(data, tuple):
+        fields = [_pad_collate_field(list(field), **kwargs) for field in zip(*samples)]
+        return type(data)(*fields) if hasattr(data, '_fields') else tuple(fields)
+    return _pad_collate_sequences(samples, **kwargs)
+
+
+def _pad_collate_sequences(
+    sequences, pad_id=0, maxlen=None, dtype=None, padding='post', truncating='pre', start_id=None, end_id=None,
+    return_lengths=True
+):
+    values, offsets = sequences_to_ragged(sequences, dtype)
+    if start_id is not None or end_id is not None:
+        values, offsets = ragged_add_start_end(values, offsets, start_id, end_id)
+    if maxlen is not None:
+        values, offsets = ragged_truncate(values, offsets, maxlen, truncating)
+    padded = ragged_pad(values, offsets, None, None, padding, truncating, pad_id)
+    if return_lengths:
+        return padded, np.diff(offsets)
+    return padded
+
+
+def pad_collate(
+    batch, pad_id=0, maxlen=None, dtype=None, padding='post', truncating='pre', start_id=None, end_id=None,
+    return_lengths=True
+):
+    """A ``collate_fn`` for :class:`DataLoader` which pads the variable-length sequences of a batch, up to the longest
+    sequence of the batch, and returns NumPy arrays. Bind the options with ``functools.partial``.
+
+    A sample can be a sequence (a list or an array), or a tuple, named tuple or dict of sequences, numbers and
+    strings. The sequences are padded, the numbers are stacked and the strings are kept in a list. With
+    ``return_lengths`` every padded sequence field becomes a ``(padded, lengths)`` pair.
+
+    Parameters
+    -----------
+    batch : list
+        The samples of the batch.
+    pad_id : int
+        Value to pad the sequences to the desired value.
+    maxlen : int or None
+        Maximum length, None for no truncation.
+    dtype : numpy.dtype or str or None
+        Data type of the padded arrays, None keeps the type of the sequences.
+    padding : str
+        Either 'pre' or 'post', pad either before or after each sequence.
+    truncating : str
+        Either 'pre' or 'post', the end of the sequences truncated to maxlen.
+    start_id : int or None
+        If given, added at the beginning of every sequence before the truncation.
+    end_id : int or None
+        If given, added at the end of every sequence before the truncation.
+    return_lengths : boolean
+        If True, the lengths of the sequences are returned with the padded arrays.
+
+    Returns
+    ----------
+    The padded batch with the structure of a sample.
+
+    Examples
+    ---------
+    >>> import functools
+    >>> collate_fn = functools.partial(tlx.utils.prepro.pad_collate, pad_id=0, end_id=2)
+    >>> loader = tlx.dataflow.DataLoader(dataset, batch_size=32, collate_fn=collate_fn)
+    >>> for (inputs, lengths), labels in loader:
+    >>>     pass
+
+    """
+    _check_padding(padding, truncating)
+    return _pad_collate_field(
+        batch, pad_id=pad_id, maxlen=maxlen, dtype=dtype, padding=padding, truncating=truncating,
+        start_id=start_id, end_id=end_id, return_lengths=return_lengths
+    )
 
 
 def keypoint_random_crop(image, annos, mask=None, size=(368, 368)):
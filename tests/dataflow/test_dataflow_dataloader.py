@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+import tensorlayerx as tlx
+import numpy as np
+from tensorlayerx.dataflow import (
+    DataLoader, TensorDataset, ConcatDataset, Subset, MemmapDataset, write_memmap_dataset, ShardedRecordDataset,
+    write_record_shards, CachedDataset, Dataset, RandomSampler
+)
+from tests.utils import CustomTestCase
+
+
+class DataLoader_SharedMemory_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.x = np.random.random((50, 3, 8, 8)).astype(np.float32)
+        self.y = np.arange(50).astype(np.int64)
+        self.dataset = TensorDataset(self.x, self.y)
+
+    def test_shared_memory_batches(self):
+        loader = DataLoader(self.dataset, batch_size=8, num_workers=2, use_shared_memory=True)
+        batches = list(loader)
+        x = np.concatenate([tlx.convert_to_numpy(b[0]) for b in batches])
+        y = np.concatenate([tlx.convert_to_numpy(b[1]) for b in batches])
+        self.assertTrue(np.array_equal(x, self.x))
+        self.assertTrue(np.array_equal(y, self.y))
+
+        stats = loader.transport_stats
+        self.assertEqual(stats['batches'], 7)
+        self.assertEqual(stats['shared_memory_batches'] + stats['pickled_batches'], 7)
+        self.assertEqual(stats['shared_memory_batches'], 7)
+        self.assertGreaterEqual(stats['shared_memory_bytes'], self.x.nbytes + self.y.nbytes)
+
+    def test_shared_memory_needs_workers(self):
+        with self.assertRaises(ValueError):
+            DataLoader(self.dataset, batch_size=8, use_shared_memory=True)
+
+
+class DataLoader_Prefetch_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.x = np.random.random((50, 4)).astype(np.float32)
+        self.y = np.arange(50).astype(np.int64)
+        self.dataset = TensorDataset(self.x, self.y)
+
+    def test_prefetch_batches(self):
+        loader = DataLoader(self.dataset, batch_size=8, prefetch_batches=2, device='CPU')
+        self.assertEqual(len(iter(loader)), 7)
+        for _ in range(2):
+            batches = list(loader)
+            x = np.concatenate([tlx.convert_to_numpy(b[0]) for b in batches])
+            self.assertTrue(np.array_equal(x, self.x))
+
+    def test_prefetch_with_workers(self):
+        loader = DataLoader(self.dataset, batch_size=8, num_workers=2, prefetch_batches=3, use_shared_memory=True)
+        y = np.concatenate([tlx.convert_to_numpy(b[1]) for b in loader])
+        self.assertTrue(np.array_equal(y, self.y))
+
+    def test_prefetch_break_early(self):
+        loader = DataLoader(self.dataset, batch_size=4, num_workers=2, prefetch_batches=2)
+        num_threads = threading.active_count()
+        for _ in range(3):
+            for i, _ in enumerate(loader):
+                if i == 2:
+                    break
+        self.assertEqual(threading.active_count(), num_threads)
+        self.assertEqual(len(multiprocessing.active_children()), 0)
+
+    def test_prefetch_options(self):
+        with self.assertRaises(ValueError):
+            DataLoader(self.dataset, batch_size=8, pin_memory=True)
+        with self.assertRaises(ValueError):
+            DataLoader(self.dataset, batch_size=8, prefetch_batches=-1)
+
+
+class DataLoader_Dispatch_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.x = np.arange(60).astype(np.int64)
+        self.dataset = TensorDataset(self.x)
+
+    def test_least_loaded_in_order(self):
+        loader = DataLoader(self.dataset, batch_size=4, num_workers=3, worker_dispatch='least_loaded')
+        x = np.concatenate([tlx.convert_to_numpy(b[0]) for b in loader])
+        self.assertTrue(np.array_equal(x, self.x))
+
+        stats = loader.worker_stats
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(sum(s['batches'] for s in stats), 15)
+        self.assertTrue(all(s['outstanding'] == 0 for s in stats))
+        self.assertTrue(all(s['max_outstanding'] <= 2 * 3 for s in stats))
+
+    def test_out_of_order(self):
+        loader = DataLoader(self.dataset, batch_size=4, num_workers=3, worker_dispatch='least_loaded', in_order=False)
+        x = np.concatenate([tlx.convert_to_numpy(b[0]) for b in loader])
+        self.assertTrue(np.array_equal(np.sort(x), self.x))
+
+    def test_dispatch_option(self):
+        with self.assertRaises(ValueError):
+            DataLoader(self.dataset, num_workers=2, worker_dispatch='random')
+
+
+class Dataset_Getitems_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.x = np.random.random((30, 2)).astype(np.float32)
+        self.y = np.arange(30).astype(np.int64)
+        self.dataset = ConcatDataset([TensorDataset(self.x[:10], self.y[:10]), TensorDataset(self.x[10:], self.y[10:])])
+
+    def test_concat_getitems(self):
+        indices = [12, 3, 29, 0, 10]
+        x, y = self.dataset.__getitems__(indices)
+        self.assertTrue(np.array_equal(x, self.x[indices]))
+        self.assertTrue(np.array_equal(y, self.y[indices]))
+
+    def test_subset_getitems(self):
+        subset = Subset(self.dataset, indices=[29, 5, 17, 8])
+        x, y = subset.__getitems__([0, 2])
+        self.assertTrue(np.array_equal(y, self.y[[29, 17]]))
+
+    def test_batched_fetch(self):
+        loader = DataLoader(self.dataset, batch_size=7)
+        y = np.concatenate([tlx.convert_to_numpy(b[1]) for b in loader])
+        self.assertTrue(np.array_equal(y, self.y))
+
+
+class MemmapDataset_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.path = tempfile.mkdtemp()
+        self.x = np.random.randint(0, 255, (25, 4, 4, 3)).astype(np.uint8)
+        self.y = np.arange(25).astype(np.int64)
+        write_memmap_dataset(self.path, {'image': self.x, 'label': self.y}, records_per_shard=10)
+
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree(self.path)
+
+    def test_getitem(self):
+        dataset = MemmapDataset(self.path)
+        self.assertEqual(len(dataset), 25)
+        image, label = dataset[13]
+        self.assertTrue(np.array_equal(image, self.x[13]))
+        self.assertEqual(label, 13)
+
+    def test_getitems(self):
+        dataset = MemmapDataset(self.path, fields=['label', 'image'])
+        label, image = dataset.__getitems__([24, 0, 11, 9])
+        self.assertTrue(np.array_equal(label, self.y[[24, 0, 11, 9]]))
+        self.assertTrue(np.array_equal(image, self.x[[24, 0, 11, 9]]))
+
+    def test_getitems_negative(self):
+        # the records are split into three shards
+        dataset = MemmapDataset(self.path, fields=['label'])
+        label, = dataset.__getitems__([-1, -25, -16, 3])
+        self.assertTrue(np.array_equal(label, self.y[[-1, -25, -16, 3]]))
+        for items in ([0, 25], [-26, 1]):
+            with self.assertRaises(IndexError):
+                dataset.__getitems__(items)
+
+    def test_dataloader(self):
+        loader = DataLoader(MemmapDataset(self.path), batch_size=8, num_workers=2)
+        y = np.concatenate([tlx.convert_to_numpy(b[1]) for b in loader])
+        self.assertTrue(np.array_equal(y, self.y))
+
+
+class ShardedRecordDataset_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.path = tempfile.mkdtemp()
+        self.x = np.arange(45).astype(np.int64)
+        write_record_shards(TensorDataset(self.x), self.path, records_per_shard=10, num_processes=2)
+
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree(self.path)
+
+    def test_read_in_order(self):
+        dataset = ShardedRecordDataset(self.path, verify_crc=True)
+        self.assertEqual(len(dataset), 45)
+        self.assertEqual([int(x[0]) for x in dataset], list(range(45)))
+
+    def test_shuffle(self):
+        dataset = ShardedRecordDataset(self.path, shuffle_buffer=8, shuffle_shards=True, seed=1)
+        x = [int(x[0]) for x in dataset]
+        self.assertEqual(sorted(x), list(range(45)))
+        self.assertNotEqual(x, list(range(45)))
+
+    def test_split_between_workers(self):
+        dataset = ShardedRecordDataset(self.path, shuffle_shards=True)
+        loader = DataLoader(dataset, batch_size=4, num_workers=2)
+        x = np.concatenate([tlx.convert_to_numpy(b[0]) for b in loader])
+        self.assertEqual(sorted(x.tolist()), list(range(45)))
+
+
+class CountingDataset(Dataset):
+
+    def __init__(self, n):
+        self.n = n
+        self.calls = 0
+
+    def __getitem__(self, index):
+        self.calls += 1
+        return np.full((4, ), index, np.float32), {'label': np.asarray(index, np.int64)}
+
+    def __len__(self):
+        return self.n
+
+
+class CachedDataset_Test(CustomTestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_memory_cache(self):
+        base = CountingDataset(10)
+        dataset = CachedDataset(base, memory_budget=5 * 24)
+        for _ in range(2):
+            for i in range(3):
+                x, y = dataset[i]
+                self.assertEqual(y['label'], i)
+        self.assertEqual(base.calls, 3)
+        for i in range(10):
+            dataset[i]
+        stats = dataset.cache_stats()
+        self.assertEqual(stats['hits'], 6)
+        self.assertEqual(stats['misses'], 10)
+        self.assertEqual(stats['evictions'], 5)
+        self.assertEqual(stats['memory_bytes'], 5 * 24)
+
+    def test_memory_hit_read_only(self):
+        dataset = CachedDataset(CountingDataset(2))
+        for _ in range(2):
+            x, y = dataset[0]
+            with self.assertRaises(ValueError):
+                x += 1
+            y['label'] = -1
+        x, y = dataset[0]
+        self.assertTrue(np.array_equal(x, np.zeros_like(x)))
+        self.assertEqual(y['label'], 0)
+
+    def test_disk_cache(self):
+        base = CountingDataset(6)
+        dataset = CachedDataset(base, memory_budget=0, cache_dir=self.path, fingerprint='counting')
+        first = [dataset[i] for i in range(6)]
+        reloaded = CachedDataset(base, memory_budget=0, cache_dir=self.path, fingerprint='counting')
+        second = [reloaded[i] for i in range(6)]
+        self.assertEqual(base.calls, 6)
+        self.assertEqual(reloaded.cache_stats()['disk_hits'], 6)
+        for (x1, y1), (x2, y2) in zip(first, second):
+            self.assertTrue(np.array_equal(x1, x2))
+            self.assertEqual(y1['label'], y2['label'])
+
+    def test_shared_between_workers(self):
+        dataset = CachedDataset(CountingDataset(12), cache_dir=self.path)
+        for _ in range(2):
+            loader = DataLoader(dataset, batch_size=4, num_workers=2)
+            x = np.concatenate([tlx.convert_to_numpy(b[0])[:, 0] for b in loader])
+            self.assertTrue(np.array_equal(x, np.arange(12)))
+        stats = dataset.cache_stats()
+        self.assertEqual(stats['misses'], 12)
+        self.assertEqual(stats['disk_hits'], 12)
+
+
+class BucketBatchSampler_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lengths = np.random.default_rng(0).integers(1, 200, 2000)
+
+    def test_covers_every_index_once(self):
+        sampler = tlx.dataflow.BucketBatchSampler(self.lengths, batch_size=16, seed=0)
+        batches = list(sampler)
+        self.assertEqual(len(batches), len(sampler))
+        self.assertEqual(sorted(np.concatenate(batches).tolist()), list(range(len(self.lengths))))
+        self.assertTrue(all(len(batch) <= 16 for batch in batches))
+
+    def test_reduces_padding(self):
+        sampler = tlx.dataflow.BucketBatchSampler(self.lengths, batch_size=16, num_buckets=20, seed=0)
+        list(sampler)
+        random_batches = np.random.default_rng(0).permutation(len(self.lengths)).reshape(-1, 16)
+        padded = sum(len(batch) * self.lengths[batch].max() for batch in random_batches)
+        self.assertLess(sampler.padding_ratio, 1 - self.lengths.sum() / padded)
+
+    def test_max_tokens(self):
+        sampler = tlx.dataflow.BucketBatchSampler(self.lengths, max_tokens=1000, seed=0)
+        batches = list(sampler)
+        self.assertTrue(all(len(batch) * self.lengths[batch].max() <= 1000 for batch in batches))
+        self.assertEqual(sum(len(batch) for batch in batches), len(self.lengths))
+
+    def test_epochs_differ(self):
+        sampler = tlx.dataflow.BucketBatchSampler(self.lengths, batch_size=16, seed=0)
+        self.assertNotEqual(list(sampler), list(sampler))
+
+
+class Sampler_State_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = tlx.dataflow.TensorDataset(np.arange(103), np.arange(103))
+
+    def test_resume_samplers(self):
+        factories = [
+            lambda: tlx.dataflow.RandomSampler(self.dataset, seed=3),
+            lambda: tlx.dataflow.SequentialSampler(self.dataset),
+            lambda: tlx.dataflow.SubsetRandomSampler(list(range(0, 103, 2)), seed=2),
+            lambda: tlx.dataflow.DistributedSampler(self.dataset, num_replicas=3, rank=1, seed=5),
+        ]
+        for factory in factories:
+            expected = factory()
+            expected.set_epoch(1)
+            expected = list(expected)
+            sampler = factory()
+            sampler.set_epoch(1)
+            iterator = iter(sampler)
+            drawn = [next(iterator) for _ in range(7)]
+            resumed = factory()
+            resumed.load_state_dict(sampler.state_dict())
+            self.assertEqual(drawn + list(resumed), expected)
+            self.assertEqual(resumed.state_dict()['epoch'], 2)
+
+    def test_distributed_partition(self):
+        parts = [set(tlx.dataflow.DistributedSampler(self.dataset, 4, rank, seed=1)) for rank in range(4)]
+        self.assertEqual(set.union(*parts), set(range(103)))
+        self.assertEqual(len(tlx.dataflow.DistributedSampler(self.dataset, 4, 0)), 26)
+        self.assertEqual(len(tlx.dataflow.DistributedSampler(self.dataset, 4, 0, drop_last=True)), 25)
+
+    def test_resume_dataloader(self):
+        for num_workers in (0, 2):
+            loader = DataLoader(self.dataset, batch_size=10, sampler=RandomSampler(self.dataset, seed=7),
+                                num_workers=num_workers)
+            expected = [tlx.convert_to_numpy(x).tolist() for x, _ in loader]
+            loader.sampler.set_epoch(0)
+            iterator = iter(loader)
+            consumed = [tlx.convert_to_numpy(next(iterator)[0]).tolist() for _ in range(4)]
+            state = loader.state_dict()
+            del iterator
+            self.assertEqual(state['position'], 4)
+            resumed = DataLoader(self.dataset, batch_size=10, sampler=RandomSampler(self.dataset),
+                                 num_workers=num_workers)
+            resumed.load_state_dict(state)
+            self.assertEqual(consumed + [tlx.convert_to_numpy(x).tolist() for x, _ in resumed], expected)
+
+
+if __name__ == '__main__':
+
+    tlx.logging.set_verbosity(tlx.logging.DEBUG)
+
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+import tensorlayerx as tlx
+import numpy as np
+from tests.utils import CustomTestCase
+
+
+def weights_of(net):
+    return [np.array(tlx.convert_to_numpy(w)) for w in net.all_weights]
+
+
+class Checkpoint_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = tempfile.mkdtemp()
+        cls.net = tlx.nn.Sequential([tlx.nn.Linear(8, in_features=4), tlx.nn.Linear(2, in_features=8)])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path)
+
+    def test_save_weights(self):
+        expected = weights_of(self.net)
+        for format in ('npz', 'npz_dict'):
+            for async_save in (False, True):
+                file_path = os.path.join(self.path, 'model_{}_{}.npz'.format(format, async_save))
+                self.net.save_weights(file_path, format=format, async_save=async_save)
+                tlx.files.wait_for_saves()
+                net = tlx.nn.Sequential([tlx.nn.Linear(8, in_features=4), tlx.nn.Linear(2, in_features=8)])
+                net.load_weights(file_path, format=format)
+                for a, b in zip(weights_of(net), expected):
+                    np.testing.assert_array_equal(a, b)
+        self.assertFalse([f for f in os.listdir(self.path) if f.endswith('.tmp')])
+
+    def test_safetensors(self):
+        file_path = os.path.join(self.path, 'model.safetensors')
+        self.net.save_weights(file_path)
+        weights = tlx.files.load_safetensors(file_path)
+        self.assertTrue(all(isinstance(w, np.memmap) for w in weights.values()))
+        net = tlx.nn.Sequential([tlx.nn.Linear(8, in_features=4), tlx.nn.Linear(2, in_features=8)])
+        net.load_weights(file_path)
+        for a, b in zip(weights_of(net), weights_of(self.net)):
+            np.testing.assert_array_equal(a, b)
+        # the arrays are copy-on-write, writing to them does not modify the file
+        name = next(iter(weights))
+        expected = np.array(weights[name])
+        weights[name][...] = 0
+        np.testing.assert_array_equal(tlx.files.load_safetensors(file_path)[name], expected)
+
+    def test_manager_incremental(self):
+        manager = tlx.files.CheckpointManager(os.path.join(self.path, 'ckpt'), max_to_keep=2)
+        for step in range(4):
+            manager.save(self.net, step=step)
+        manager.wait()
+        self.assertEqual(manager.checkpoints, [2, 3])
+        # the weights did not change, every tensor was written once
+        self.assertEqual(len(os.listdir(os.path.join(self.path, 'ckpt', 'tensors'))), len(self.net.all_weights))
+        self.assertEqual(manager.write_stats['bytes_skipped'], 3 * manager.write_stats['bytes_written'])
+
+        net = tlx.nn.Sequential([tlx.nn.Linear(8, in_features=4), tlx.nn.Linear(2, in_features=8)])
+        self.assertEqual(manager.restore(net), 3)
+        for a, b in zip(weights_of(net), weights_of(self.net)):
+            np.testing.assert_array_equal(a, b)
+
+    def test_manager_save_does_not_wait(self):
+        directory = os.path.join(self.path, 'ckpt_pending')
+        manager = tlx.files.CheckpointManager(directory)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_write():
+            started.set()
+            release.wait()
+
+        # an unrelated slow write holds the shared writer thread
+        manager._writer.submit(slow_write)
+        started.wait()
+        steps = []
+        try:
+            saver = threading.Thread(target=lambda: steps.append(manager.save(self.net)))
+            saver.start()
+            saver.join(10)
+            self.assertFalse(saver.is_alive())
+            self.assertEqual(steps, [0])
+            self.assertEqual(manager.checkpoints, [])
+        finally:
+            release.set()
+        manager.wait()
+        self.assertEqual(manager.save(self.net), 1)
+        manager.wait()
+        self.assertEqual(manager.checkpoints, [0, 1])
+        # a new manager continues after the latest checkpoint in the directory
+        self.assertEqual(tlx.files.CheckpointManager(directory, async_save=False).save(self.net), 2)
+
+
+if __name__ == '__main__':
+
+    tlx.logging.set_verbosity(tlx.logging.DEBUG)
+
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+import numpy as np
+import tensorlayerx as tlx
+from tensorlayerx.nn.core.common import _segments
+
+from tests.utils import CustomTestCase
+
+
+def _blocks(num_blocks, p=0.):
+    return [
+        tlx.nn.Sequential([tlx.nn.Linear(out_features=16, in_features=16, act=tlx.ReLU),
+                           tlx.nn.Dropout(p=p)]) for _ in range(num_blocks)
+    ]
+
+
+class Layer_Checkpoint_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.x = tlx.convert_to_tensor(np.random.randn(8, 16).astype(np.float32))
+
+    def test_segments(self):
+        self.assertEqual([len(s) for s in _segments(list(range(10)), 4)], [2, 3, 2, 3])
+        self.assertEqual([len(s) for s in _segments(list(range(2)), 4)], [1, 1])
+        with self.assertRaises(ValueError):
+            tlx.nn.Sequential(_blocks(2), checkpoint_segments=0)
+
+    def test_forward(self):
+        blocks = _blocks(4)
+        plain = tlx.nn.Sequential(blocks)
+        segmented = tlx.nn.Sequential(blocks, checkpoint_segments=2)
+        wrapped = tlx.nn.Sequential([tlx.nn.Checkpoint(block) for block in blocks])
+        expected = tlx.convert_to_numpy(plain(self.x))
+        self.assertTrue(np.allclose(tlx.convert_to_numpy(segmented(self.x)), expected, atol=1e-6))
+        self.assertTrue(np.allclose(tlx.convert_to_numpy(wrapped(self.x)), expected, atol=1e-6))
+
+    @unittest.skipIf(tlx.BACKEND != 'torch', "the gradients are compared with torch autograd")
+    def test_recompute_gradients(self):
+        import torch
+        blocks = _blocks(4, p=0.5)
+        gradients = []
+        for net in (tlx.nn.Sequential(blocks), tlx.nn.Sequential(blocks, checkpoint_segments=3),
+                    tlx.nn.Sequential([tlx.nn.Checkpoint(block) for block in blocks])):
+            net.set_train()
+            net.zero_grad()
+            torch.manual_seed(0)
+            net(self.x).sum().backward()
+            gradients.append([weight.grad.clone() for weight in net.trainable_weights])
+        # dropout draws the same masks when the activations are recomputed
+        for grads in gradients[1:]:
+            for grad, expected in zip(grads, gradients[0]):
+                self.assertTrue(torch.allclose(grad, expected))
+
+    @unittest.skipIf(tlx.BACKEND != 'tensorflow', "the tensorflow recomputation replays the masks with stateless ops")
+    def test_recompute_tf_function(self):
+        import tensorflow as tf
+        dropout = tlx.nn.Checkpoint(tlx.nn.Dropout(p=0.5))
+        dropout.set_train()
+        x = tf.Variable(tf.ones((64, )))
+
+        def step():
+            with tf.GradientTape() as tape:
+                outputs = dropout(x)
+            return outputs, tape.gradient(outputs, x)
+
+        tf.random.set_seed(1)
+        expected = tf.random.uniform([4])
+        tf.random.set_seed(1)
+        for outputs, grads in (step(), tf.function(step)()):
+            # the gradient of the sum of the inputs times the mask is the mask
+            self.assertTrue(np.array_equal(outputs.numpy(), grads.numpy()))
+        # the global random state is left alone
+        self.assertTrue(np.array_equal(tf.random.uniform([4]).numpy(), expected.numpy()))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
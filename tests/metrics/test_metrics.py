@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+import tensorlayerx as tlx
+
+from tests.utils import CustomTestCase
+
+
+def exact_auc(scores, labels):
+    # the probability that a positive sample has a higher score than a negative one, ties counting half
+    pos, neg = scores[labels == 1], scores[labels == 0]
+    greater = (pos[:, None] > neg[None, :]).sum() + 0.5 * (pos[:, None] == neg[None, :]).sum()
+    return greater / (len(pos) * len(neg))
+
+
+class Metrics_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.RandomState(0)
+        cls.y = rng.randint(0, 2, 300)
+        cls.p = np.clip(cls.y * 0.3 + rng.rand(300) * 0.7, 0, 1)
+        cls.labels = rng.randint(0, 3, 300)
+        cls.scores = rng.rand(300, 3)
+
+    def test_auc_binary(self):
+        metric = tlx.metrics.Auc()
+        metric.update(tlx.convert_to_tensor(np.stack([1 - self.p, self.p], 1)), tlx.convert_to_tensor(self.y))
+        self.assertAlmostEqual(metric.result(), exact_auc(self.p, self.y), places=3)
+        metric.reset()
+        self.assertEqual(metric.result(), 0.0)
+
+    def test_auc_multi_class_and_merge(self):
+        expected = [exact_auc(self.scores[:, k], (self.labels == k).astype(int)) for k in range(3)]
+        metric = tlx.metrics.Auc(average=None)
+        metric.update(self.scores[:100], self.labels[:100])
+        other = tlx.metrics.Auc(average=None)
+        other.update(self.scores[100:], self.labels[100:])
+        result = metric.merge(other.state_dict()).result()
+        self.assertTrue(np.allclose(result, expected, atol=1e-3))
+        with self.assertRaises(ValueError):
+            metric.update(self.p, self.y)
+
+    def test_precision_recall_binary(self):
+        precision, recall = tlx.metrics.Precision(), tlx.metrics.Recall()
+        precision.update(self.p, self.y)
+        recall.update(self.p, self.y)
+        tp = np.sum((self.p >= 0.5) & (self.y == 1))
+        self.assertAlmostEqual(precision.result(), tp / np.sum(self.p >= 0.5))
+        self.assertAlmostEqual(recall.result(), tp / np.sum(self.y == 1))
+
+    def test_precision_recall_multi_class(self):
+        pred = np.argmax(self.scores, 1)
+        tp = np.array([np.sum((pred == k) & (self.labels == k)) for k in range(3)])
+        precision = tlx.metrics.Precision(average=None)
+        recall = tlx.metrics.Recall(average='macro')
+        for start in range(0, 300, 64):
+            precision.update(self.scores[start:start + 64], self.labels[start:start + 64])
+            recall.update(self.scores[start:start + 64], self.labels[start:start + 64])
+        self.assertTrue(np.allclose(precision.result(), tp / np.bincount(pred, minlength=3)))
+        self.assertAlmostEqual(recall.result(), np.mean(tp / np.bincount(self.labels, minlength=3)))
+        micro = tlx.metrics.Precision(average='micro').merge(precision)
+        self.assertAlmostEqual(micro.result(), np.mean(pred == self.labels))
+
+    def test_merge_empty(self):
+        # the metrics of shards which saw no data
+        auc = tlx.metrics.Auc().merge(tlx.metrics.Auc())
+        self.assertEqual(auc.result(), 0.0)
+        auc.update(np.stack([1 - self.p, self.p], 1), self.y)
+        self.assertAlmostEqual(auc.merge(tlx.metrics.Auc()).result(), exact_auc(self.p, self.y), places=3)
+        precision = tlx.metrics.Precision().merge(tlx.metrics.Precision())
+        precision.update(self.p, self.y)
+        self.assertAlmostEqual(
+            precision.result(), np.sum((self.p >= 0.5) & (self.y == 1)) / np.sum(self.p >= 0.5)
+        )
+
+    def test_multi_label(self):
+        labels = np.eye(3, dtype=np.int64)[self.labels]
+        labels[::3, 0] = 1
+        precision = tlx.metrics.Precision(average=None)
+        precision.update(self.scores, labels)
+        pred = self.scores >= 0.5
+        expected = np.sum(pred & (labels == 1), 0) / np.sum(pred, 0)
+        self.assertTrue(np.allclose(precision.result(), expected))
+        auc = tlx.metrics.Auc(average=None)
+        auc.update(self.scores, labels)
+        expected = [exact_auc(self.scores[:, k], labels[:, k]) for k in range(3)]
+        self.assertTrue(np.allclose(auc.result(), expected, atol=1e-3))
+
+
+class Text_Metrics_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.hypotheses = ["the cat is on the mat", "There is a cat on the mat .", "a dog ran", ""]
+        cls.references = [
+            ["the cat sat on the mat", "a cat is on the mat"], ["The cat is on the mat .", "there is a cat on the mat"],
+            ["the big dog ran away", "a dog is running"], ["nothing here", "empty"]
+        ]
+
+    def test_bleu(self):
+        # the scores of multi-bleu.perl
+        metric = tlx.metrics.Bleu()
+        metric.update(self.hypotheses[:2], self.references[:2])
+        metric.update(self.hypotheses[2:], self.references[2:])
+        self.assertAlmostEqual(metric.result(), 78.35, places=2)
+        self.assertTrue(np.allclose(metric.precisions(), [94.1, 92.9, 72.7, 75.0], atol=0.05))
+        metric = tlx.metrics.Bleu(lowercase=True)
+        metric.update(self.hypotheses, self.references)
+        self.assertAlmostEqual(metric.result(), 86.73, places=2)
+
+        merged = tlx.metrics.Bleu().merge(tlx.metrics.Bleu().merge(metric.state_dict()))
+        self.assertEqual(merged.lengths.tolist(), [17, 18])
+
+    def test_bleu_ids(self):
+        hypotheses = np.array([[3, 4, 5, 6, 0, 0], [7, 8, 9, 0, 0, 0]])
+        references = np.array([[3, 4, 5, 6, 7, 0], [7, 8, 9, 10, 0, 0]])
+        metric = tlx.metrics.Bleu(pad_id=0)
+        metric.update(hypotheses, references)
+        expected = tlx.metrics.Bleu()
+        expected.update(["3 4 5 6", "7 8 9"], ["3 4 5 6 7", "7 8 9 10"])
+        self.assertAlmostEqual(metric.result(), expected.result())
+        scores = tlx.metrics.sentence_bleu(hypotheses, references, pad_id=0)
+        self.assertEqual(scores.shape, (2, ))
+        self.assertTrue(np.all(scores > 0))
+
+    def test_chrf(self):
+        # the score of sacreBLEU
+        metric = tlx.metrics.ChrF()
+        metric.update(self.hypotheses, self.references)
+        self.assertAlmostEqual(metric.result(), 62.60735614456622, places=8)
+
+    def test_rouge_l(self):
+        metric = tlx.metrics.RougeL()
+        metric.update(["the cat is on the mat"], ["the cat sat on the mat"])
+        self.assertAlmostEqual(metric.result(), 100. * 5. / 6.)
+        metric.reset()
+        metric.update(self.hypotheses, self.references)
+        self.assertAlmostEqual(metric.result(), 55.11904761904762)
+
+    def test_empty_batch(self):
+        # an empty last or filtered batch does not change the scores
+        for metric in (tlx.metrics.Bleu(lowercase=True), tlx.metrics.RougeL(), tlx.metrics.ChrF()):
+            metric.update([], [])
+            self.assertEqual(metric.result(), 0.)
+            metric.update(self.hypotheses, self.references)
+            result = metric.result()
+            metric.update([], [])
+            self.assertEqual(metric.result(), result)
+        self.assertEqual(tlx.metrics.sentence_bleu([], []).shape, (0, ))
+
+
+if __name__ == '__main__':
+
+    tlx.logging.set_verbosity(tlx.logging.DEBUG)
+
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+import tensorlayerx as tlx
+from tensorlayerx.model.callbacks import _CallbackList
+
+from tests.utils import CustomTestCase
+
+
+class _Model(object):
+    # the part of Model used by the callbacks
+
+    def __init__(self):
+        self.stop_training = False
+        self.saved = []
+
+    def save_weights(self, file_path):
+        with open(file_path, 'w') as f:
+            f.write('weights')
+        self.saved.append(os.path.basename(file_path))
+
+
+class Model_Callbacks_Test(CustomTestCase):
+
+    def test_callback_list_hooks(self):
+
+        class EpochCallback(tlx.model.Callback):
+
+            def on_epoch_end(self, epoch, logs):
+                logs['seen'] = epoch
+
+        callbacks = _CallbackList([EpochCallback()], _Model())
+        self.assertFalse(callbacks.batch_hooks)
+        self.assertEqual(len(callbacks._on_epoch_end), 1)
+        self.assertEqual(callbacks._on_train_begin, [])
+        logs = {}
+        callbacks.on_epoch_end(3, logs)
+        self.assertEqual(logs['seen'], 3)
+        self.assertTrue(_CallbackList([tlx.model.ThroughputLogger()]).batch_hooks)
+        with self.assertRaises(TypeError):
+            _CallbackList([lambda epoch, logs: None])
+
+    def test_early_stopping(self):
+        model = _Model()
+        early_stopping = tlx.model.EarlyStopping(monitor='val_loss', patience=2)
+        callbacks = _CallbackList([early_stopping], model)
+        callbacks.on_train_begin({})
+        for epoch, val_loss in enumerate([1.0, 0.8, 0.9, None, 0.85, 0.7]):
+            logs = {'loss': 0.5} if val_loss is None else {'loss': 0.5, 'val_loss': val_loss}
+            callbacks.on_epoch_end(epoch, logs)
+            if model.stop_training:
+                break
+        # epochs without a validation value are not counted
+        self.assertEqual(early_stopping.stopped_epoch, 4)
+        self.assertEqual(early_stopping.best_epoch, 1)
+        self.assertEqual(early_stopping.best, 0.8)
+        self.assertEqual(tlx.model.EarlyStopping(monitor='val_acc')._monitor.mode, 'max')
+        with self.assertRaises(ValueError):
+            tlx.model.EarlyStopping(mode='up')
+
+    def test_model_checkpoint_top_k(self):
+        model = _Model()
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = tlx.model.ModelCheckpoint(
+                directory, monitor='val_acc', save_top_k=2, save_last=True, filename='epoch{epoch}.npz'
+            )
+            callbacks = _CallbackList([checkpoint], model)
+            for epoch, val_acc in enumerate([0.5, 0.7, 0.6, 0.4, 0.8]):
+                callbacks.on_epoch_end(epoch, {'val_acc': val_acc})
+            self.assertEqual(sorted(os.listdir(directory)), ['epoch2.npz', 'epoch5.npz', 'last.npz'])
+            self.assertEqual(checkpoint.best_model_path, os.path.join(directory, 'epoch5.npz'))
+            self.assertEqual([value for value, _ in checkpoint.best_k_models], [0.8, 0.7])
+            # the worse epochs are not written at all
+            self.assertNotIn('epoch4.npz', model.saved)
+
+    def test_learning_rate_scheduler(self):
+        scheduler = tlx.optimizers.lr.StepDecay(learning_rate=0.1, step_size=2)
+        callbacks = _CallbackList([tlx.model.LearningRateScheduler(scheduler)], _Model())
+        self.assertFalse(callbacks.batch_hooks)
+        for epoch in range(4):
+            callbacks.on_epoch_end(epoch, {})
+        self.assertAlmostEqual(float(scheduler()), 0.001, places=6)
+
+        scheduler = tlx.optimizers.lr.StepDecay(learning_rate=0.1, step_size=1)
+        callbacks = _CallbackList([tlx.model.LearningRateScheduler(scheduler, interval='batch')], _Model())
+        self.assertTrue(callbacks.batch_hooks)
+        callbacks.on_batch_end(0, {'size': 4})
+        self.assertAlmostEqual(float(scheduler()), 0.01, places=6)
+
+
+class _RecordingSGD(tlx.optimizers.SGD):
+    # counts the updates instead of applying them, the weights are only changed by the callbacks
+
+    steps = 0
+
+    def apply_gradients(self, grads_and_vars=None, closure=None):
+        self.steps += 1
+
+
+class Model_Train_Callbacks_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.RandomState(0)
+        X = rng.randn(32, 4).astype(np.float32)
+        y = rng.randint(0, 2, size=32).astype(np.int64)
+        cls.loader = tlx.dataflow.DataLoader(tlx.dataflow.TensorDataset(X, y), batch_size=8)
+
+    def setUp(self):
+        self.net = tlx.nn.Linear(2, in_features=4)
+        self.optimizer = _RecordingSGD(lr=0.1)
+        self.model = tlx.model.Model(
+            network=self.net, loss_fn=tlx.losses.softmax_cross_entropy_with_logits, optimizer=self.optimizer
+        )
+
+    def _fill_weights(self, value):
+        weights = [np.full(w.shape, value, np.float32) for w in self.net.all_weights]
+        tlx.files.assign_weights(weights, self.net)
+
+    def test_stop_in_batch(self):
+        outer = self
+
+        class StopAfterBatches(tlx.model.Callback):
+
+            def __init__(self):
+                self.batches = []
+                self.epochs = []
+
+            def on_batch_end(self, batch, logs):
+                self.batches.append(batch)
+                if batch == 2:
+                    self.model.stop_training = True
+
+            def on_epoch_end(self, epoch, logs):
+                self.epochs.append(epoch)
+                outer.assertIn('loss', logs)
+
+        callback = StopAfterBatches()
+        self.model.train(n_epoch=5, train_dataset=self.loader, print_freq=100, callbacks=[callback])
+        self.assertEqual(callback.batches, [0, 1, 2])
+        # the stopped epoch still ends, then the training does
+        self.assertEqual(callback.epochs, [0])
+        self.assertEqual(self.optimizer.steps, 3)
+
+    def test_early_stopping_and_checkpoint(self):
+        outer = self
+
+        class Score(tlx.model.Callback):
+
+            def on_epoch_end(self, epoch, logs):
+                logs['score'] = [0.5, 0.9, 0.7, 0.6, 0.8][epoch]
+
+        class FillWeights(tlx.model.Callback):
+
+            def on_epoch_end(self, epoch, logs):
+                outer._fill_weights(epoch + 1)
+
+        early_stopping = tlx.model.EarlyStopping(monitor='score', mode='max', patience=2, restore_best_weights=True)
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = tlx.model.ModelCheckpoint(directory, monitor='score', mode='max')
+            callbacks = [Score(), early_stopping, checkpoint, FillWeights()]
+            self._fill_weights(0)
+            self.model.train(n_epoch=5, train_dataset=self.loader, print_freq=100, callbacks=callbacks)
+            # only epoch-level callbacks, so no batch hook runs and every batch of the four epochs is trained
+            self.assertFalse(_CallbackList(callbacks).batch_hooks)
+            self.assertEqual(self.optimizer.steps, 4 * 4)
+            self.assertEqual(early_stopping.stopped_epoch, 3)
+            self.assertEqual(early_stopping.best_epoch, 1)
+            # the weights of the best epoch were filled at the end of the epoch before it
+            for w in self.net.all_weights:
+                self.assertTrue(np.all(tlx.convert_to_numpy(w) == 1))
+            self.assertEqual(os.listdir(directory), ['epoch002.npz'])
+            self._fill_weights(0)
+            self.model.load_weights(checkpoint.best_model_path)
+            for w in self.net.all_weights:
+                self.assertTrue(np.all(tlx.convert_to_numpy(w) == 1))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
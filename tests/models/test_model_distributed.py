@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+import tensorlayerx as tlx
+from tensorlayerx.dataflow import DataLoader, TensorDataset
+from tensorlayerx.utils import distributed
+
+from tests.utils import CustomTestCase
+
+
+def _worker(rank, out_dir):
+    weight = tlx.convert_to_tensor(np.full((3, ), rank, np.float32))
+    distributed.broadcast_weights([weight])
+    grads = [tlx.convert_to_tensor(np.full((2, 2), rank + 1, np.float32)), None]
+    grads = distributed.all_reduce_gradients(grads)
+    np.save(
+        os.path.join(out_dir, 'rank{}.npy'.format(rank)),
+        np.concatenate([tlx.convert_to_numpy(weight), tlx.convert_to_numpy(grads[0]).ravel()])
+    )
+
+
+class Distributed_Test(CustomTestCase):
+
+    def test_partition_dataset(self):
+        loader = DataLoader(TensorDataset(np.arange(10), np.arange(10)), batch_size=2, shuffle=True)
+        seen = []
+        for rank in range(3):
+            part = distributed.partition_dataset(
+                DataLoader(TensorDataset(np.arange(10), np.arange(10)), batch_size=2, shuffle=True), 3, rank
+            )
+            self.assertEqual(len(part), 2)
+            seen.extend(int(x) for X, _ in part for x in tlx.convert_to_numpy(X))
+        # the sampler pads the dataset to a multiple of the number of processes
+        self.assertEqual(set(seen), set(range(10)))
+        self.assertEqual(len(seen), 12)
+
+        batches = [(np.ones(2), np.ones(2))] * 5
+        self.assertEqual([len(distributed.partition_dataset(batches, 2, rank)) for rank in range(2)], [2, 2])
+        self.assertIs(distributed.partition_dataset(loader, 1, 0), loader)
+
+    @unittest.skipIf(tlx.BACKEND != 'torch', "spawn starts gloo process groups of PyTorch")
+    def test_spawn_collectives(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            distributed.spawn(_worker, nprocs=2, args=(out_dir, ))
+            for rank in range(2):
+                result = np.load(os.path.join(out_dir, 'rank{}.npy'.format(rank)))
+                # the weight of rank 0 and the mean of the gradients 1 and 2
+                self.assertEqual(result.tolist(), [0.0] * 3 + [1.5] * 4)
+
+
+if __name__ == '__main__':
+
+    tlx.logging.set_verbosity(tlx.logging.DEBUG)
+
+    unittest.main()
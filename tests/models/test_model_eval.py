@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+import tensorlayerx as tlx
+from tensorlayerx.dataflow import DataLoader, TensorDataset
+from tensorlayerx.nn import Linear, Module
+
+from tests.utils import CustomTestCase
+
+
+class MLP(Module):
+
+    def __init__(self):
+        super(MLP, self).__init__()
+        self.linear = Linear(out_features=3, in_features=4)
+
+    def forward(self, x):
+        return self.linear(x)
+
+
+class Model_Eval_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.RandomState(0)
+        cls.X = rng.randn(50, 4).astype(np.float32)
+        cls.y = rng.randint(0, 3, 50).astype(np.int64)
+        cls.net = MLP()
+        cls.loader = DataLoader(TensorDataset(cls.X, cls.y), batch_size=16)
+
+    def expected(self):
+        self.net.set_eval()
+        logits = tlx.convert_to_numpy(self.net(tlx.convert_to_tensor(self.X)))
+        shifted = logits - logits.max(axis=1, keepdims=True)
+        log_prob = shifted - np.log(np.exp(shifted).sum(axis=1, keepdims=True))
+        loss = -np.mean(log_prob[np.arange(len(self.y)), self.y])
+        acc = np.mean(np.argmax(logits, 1) == self.y)
+        return loss, acc
+
+    def test_eval_default_accuracy(self):
+        model = tlx.model.Model(network=self.net, loss_fn=tlx.losses.softmax_cross_entropy_with_logits)
+        result = model.eval(self.loader, sync_every=2)
+        loss, acc = self.expected()
+        self.assertAlmostEqual(result['loss'], loss, places=4)
+        self.assertAlmostEqual(result['metrics']['acc'], acc, places=5)
+        self.assertEqual(result['num_samples'], 50)
+        self.assertEqual(result['num_batches'], 4)
+        self.assertGreater(result['samples_per_sec'], 0)
+
+    def test_eval_metric_objects(self):
+        metrics = {'top1': tlx.metrics.Accuracy(), 'top2': tlx.metrics.Accuracy(topk=2)}
+        model = tlx.model.Model(
+            network=self.net, loss_fn=tlx.losses.softmax_cross_entropy_with_logits, metrics=metrics
+        )
+        result = model.eval(self.loader)
+        _, acc = self.expected()
+        self.assertAlmostEqual(result['metrics']['top1'], acc, places=5)
+        self.assertGreaterEqual(result['metrics']['top2'], result['metrics']['top1'])
+        # the metrics are reset, a second evaluation gives the same result
+        self.assertAlmostEqual(model.eval(self.loader)['metrics']['top1'], acc, places=5)
+
+
+if __name__ == '__main__':
+
+    tlx.logging.set_verbosity(tlx.logging.DEBUG)
+
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+import tensorlayerx as tlx
+
+from tests.utils import CustomTestCase
+
+
+class MLP(tlx.nn.Module):
+
+    def __init__(self):
+        super(MLP, self).__init__()
+        self.linear1 = tlx.nn.Linear(out_features=16, in_features=8, act=tlx.ReLU)
+        self.bn = tlx.nn.BatchNorm1d(num_features=16)
+        self.linear2 = tlx.nn.Linear(out_features=3, in_features=16)
+        self.dtypes = []
+
+    def forward(self, x):
+        x = self.linear1(x)
+        self.dtypes.append(str(x.dtype))
+        x = self.bn(x)
+        self.dtypes.append(str(x.dtype))
+        return self.linear2(x)
+
+
+@unittest.skipIf(tlx.BACKEND not in ('torch', 'paddle'), "mixed precision requires torch or paddle")
+class Model_Mixed_Precision_Test(CustomTestCase):
+
+    def test_loss_scaler(self):
+        scaler = tlx.model.DynamicLossScaler(init_scale=8., growth_interval=2)
+        grads = [tlx.convert_to_tensor(np.array([8., 16.], np.float32))]
+        self.assertTrue(scaler.unscale(grads))
+        self.assertEqual(tlx.convert_to_numpy(grads[0]).tolist(), [1., 2.])
+        scaler.update(True)
+        scaler.update(True)
+        self.assertEqual(scaler.scale, 16.)
+        self.assertFalse(scaler.unscale([tlx.convert_to_tensor(np.array([np.inf, 1.], np.float32))]))
+        scaler.update(False)
+        self.assertEqual(scaler.state_dict(), {'scale': 8., 'good_steps': 0, 'skipped_steps': 1})
+        with self.assertRaises(ValueError):
+            tlx.model.DynamicLossScaler(backoff_factor=2.)
+
+    def test_forward_policy(self):
+        net = MLP()
+        mixed_precision = tlx.model.MixedPrecision('bfloat16')
+        self.assertIsNone(mixed_precision.loss_scaler)
+        self.assertIsNotNone(tlx.model.MixedPrecision('float16').loss_scaler)
+        mixed_precision.attach(net)
+        forward = mixed_precision.forward(net, tlx.losses.softmax_cross_entropy_with_logits)
+        X = tlx.convert_to_tensor(np.random.randn(4, 8).astype(np.float32))
+        y = tlx.convert_to_tensor(np.array([0, 1, 2, 1], np.int64))
+        output, loss = forward(X, y)
+        mixed_precision.detach()
+        # the linear layer runs in bfloat16, the normalization, the outputs and the loss in float32
+        self.assertIn('bfloat16', net.dtypes[0])
+        self.assertIn('float32', net.dtypes[1])
+        self.assertIn('float32', str(output.dtype))
+        self.assertIn('float32', str(loss.dtype))
+        self.assertNotIn('forward', net.bn.__dict__)
+        with self.assertRaises(ValueError):
+            tlx.model.MixedPrecision('int8')
+
+
+if __name__ == '__main__':
+
+    unittest.main()
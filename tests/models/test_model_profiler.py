@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+import tensorlayerx as tlx
+from tensorlayerx.model.core import _make_train_step
+
+from tests.utils import CustomTestCase
+
+
+class MLP(tlx.nn.Module):
+
+    def __init__(self):
+        super(MLP, self).__init__()
+        self.linear1 = tlx.nn.Linear(out_features=16, in_features=8, act=tlx.ReLU)
+        self.linear2 = tlx.nn.Linear(out_features=3, in_features=16)
+
+    def forward(self, x):
+        return self.linear2(self.linear1(x))
+
+
+class _RecordingOptimizer(object):
+    # runs the phases of a training step without updating the weights
+
+    def gradient(self, loss, weights):
+        return [None] * len(weights)
+
+    def apply_gradients(self, grads_and_vars):
+        list(grads_and_vars)
+
+
+class Model_Profiler_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.RandomState(0)
+        cls.batches = [
+            (tlx.convert_to_tensor(rng.randn(batch_size, 8).astype(np.float32)),
+             tlx.convert_to_tensor(rng.randint(0, 3, batch_size).astype(np.int64))) for batch_size in (16, 16, 4)
+        ]
+
+    def test_profiler_steps(self):
+        net = MLP()
+        profiler = tlx.model.Profiler(module_timing=True)
+        profiler.attach(net)
+        for X, y in profiler.iterate(self.batches, epoch=1):
+            with profiler.phase('forward'):
+                net(X)
+            with profiler.phase('metric'):
+                pass
+        profiler.detach()
+        self.assertNotIn('forward', net.linear1.__dict__)
+
+        self.assertEqual([step['samples'] for step in profiler.steps], [16, 16, 4])
+        self.assertEqual([step['step'] for step in profiler.steps], [0, 1, 2])
+        for step in profiler.steps:
+            self.assertEqual(step['epoch'], 1)
+            self.assertGreaterEqual(step['time'], step['data'] + step['forward'] + step['metric'])
+        summary = profiler.summary()
+        self.assertEqual(summary['steps'], 3)
+        self.assertEqual(set(summary['modules']), {'linear1', 'linear2'})
+        self.assertEqual(summary['modules']['linear1']['calls'], 3)
+        self.assertIn('forward', summary['phases'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            profiler.export_jsonl(os.path.join(directory, 'profile.jsonl'))
+            with open(os.path.join(directory, 'profile.jsonl')) as f:
+                events = [json.loads(line) for line in f]
+            self.assertEqual([e['event'] for e in events], ['step'] * 3 + ['module'] * 2)
+            profiler.export_chrome_trace(os.path.join(directory, 'trace.json'))
+            with open(os.path.join(directory, 'trace.json')) as f:
+                trace = json.load(f)['traceEvents']
+            self.assertEqual(sum(e['name'] == 'step' for e in trace), 3)
+            self.assertEqual(sum(e['cat'] == 'module' for e in trace), 6)
+            self.assertTrue(all(e['ph'] == 'X' and e['dur'] >= 0 for e in trace))
+
+    def test_train_step_phases(self):
+        if tlx.BACKEND not in ('torch', 'paddle'):
+            return
+        profiler = tlx.model.Profiler(trace=False)
+        net = MLP()
+        step = _make_train_step(
+            net, tlx.losses.softmax_cross_entropy_with_logits, net.trainable_weights, _RecordingOptimizer(),
+            phase=profiler.phase
+        )
+        for X, y in profiler.iterate(self.batches):
+            step(X, y)
+        self.assertEqual(profiler.spans, [])
+        for record in profiler.steps:
+            for name in ('data', 'forward', 'backward', 'communication', 'optimizer'):
+                self.assertIn(name, record)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
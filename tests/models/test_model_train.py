@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+import tensorlayerx as tlx
+from tensorlayerx.model.core import _CompiledFunction, _concat_batch, _split_batch
+
+from tests.utils import CustomTestCase
+
+
+class Model_Train_Test(CustomTestCase):
+
+    def test_compiled_function_cache(self):
+        captured = []
+
+        def compile_fn(fn):
+            captured.append(fn)
+            return fn
+
+        step = _CompiledFunction(lambda x, y: x.sum() + y.sum(), compile_fn)
+        for batch_size in (16, 16, 16, 6, 16, 6):
+            out = step(np.ones((batch_size, 4), np.float32), np.ones(batch_size, np.int64))
+            self.assertEqual(out, batch_size * 5)
+        # one graph for the full batches and one for the last, smaller batch
+        self.assertEqual(step.num_graphs, 2)
+        self.assertEqual(len(captured), 2)
+        self.assertFalse(step.eager)
+
+    def test_compiled_function_fallback(self):
+
+        def compile_fn(fn):
+
+            def graph(*args):
+                raise RuntimeError("unsupported operation")
+
+            return graph
+
+        step = _CompiledFunction(lambda x: x * 2, compile_fn)
+        self.assertEqual(step(np.ones(3)).tolist(), [2, 2, 2])
+        self.assertTrue(step.eager)
+        self.assertEqual(step.num_graphs, 0)
+        self.assertEqual(step(np.ones(2)).tolist(), [2, 2])
+
+    def test_split_batch(self):
+        X = {'a': np.arange(10).reshape(10, 1), 'b': np.arange(10)}
+        parts = _split_batch(X, 4)
+        self.assertEqual([len(p['b']) for p in parts], [2, 3, 2, 3])
+        self.assertEqual(np.concatenate([p['b'] for p in parts]).tolist(), list(range(10)))
+        # a batch smaller than the number of micro-batches gives one micro-batch per sample
+        self.assertEqual(len(_split_batch((np.ones(3), np.zeros(3)), 8)), 3)
+        y = tlx.convert_to_tensor(np.arange(7))
+        self.assertEqual(tlx.convert_to_numpy(_concat_batch(_split_batch(y, 3))).tolist(), list(range(7)))
+
+    def test_accumulate_steps_exception(self):
+        with self.assertRaises(ValueError):
+            tlx.model.TrainOneStep(None, None, [], accumulate_steps=0)
+
+    @unittest.skipIf(tlx.BACKEND != 'torch', "the torch optimizers clip the gradients in gradient()")
+    def test_accumulate_steps_with_clipping(self):
+
+        class RecordingSGD(tlx.optimizers.SGD):
+
+            def apply_gradients(self, grads_and_vars=None, closure=None):
+                self.applied = [tlx.convert_to_numpy(grad).copy() for grad, _ in grads_and_vars]
+
+        rng = np.random.RandomState(0)
+        X = tlx.convert_to_tensor(rng.randn(32, 8).astype(np.float32))
+        y = tlx.convert_to_tensor(rng.randint(0, 3, size=32).astype(np.int64))
+        tlx.set_seed(0)
+        net = tlx.nn.Sequential([tlx.nn.Linear(16, in_features=8, act=tlx.ReLU), tlx.nn.Linear(3, in_features=16)])
+        net_with_loss = tlx.model.WithLoss(net, tlx.losses.softmax_cross_entropy_with_logits)
+        applied = []
+        for accumulate_steps in (1, 4):
+            optimizer = RecordingSGD(lr=0.1, grad_clip=tlx.ops.ClipGradByNorm(0.05))
+            tlx.model.TrainOneStep(net_with_loss, optimizer, net.trainable_weights, accumulate_steps)(X, y)
+            applied.append(optimizer.applied)
+            self.assertIsNotNone(optimizer.grad_clip)
+        # the gradient of the whole batch is clipped once, not the gradient of every micro-batch
+        self.assertAlmostEqual(np.sqrt(sum((grad**2).sum() for grad in applied[1])), 0.05, places=5)
+        for full, accumulated in zip(*applied):
+            self.assertTrue(np.allclose(full, accumulated, atol=1e-6))
+
+
+if __name__ == '__main__':
+
+    tlx.logging.set_verbosity(tlx.logging.DEBUG)
+
+    unittest.main()
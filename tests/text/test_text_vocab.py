@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import collections
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+
+import tensorlayerx as tlx
+from tests.utils import CustomTestCase
+
+
+class Text_CompactVocabulary_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.vocab = tlx.text.CompactVocabulary.from_counts(collections.Counter("the cat sat on the mat".split()))
+        cls.directory = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_ids(self):
+        vocab = self.vocab
+        self.assertEqual(vocab.pad_id, 0)
+        self.assertEqual(vocab.word_to_id('the'), 4)
+        self.assertEqual(vocab.word_to_id('dog'), vocab.unk_id)
+        self.assertEqual(vocab.id_to_word(4), 'the')
+        self.assertEqual(vocab.id_to_word(100), '<UNK>')
+        with self.assertRaises(ValueError):
+            tlx.text.CompactVocabulary(['a', 'b', 'a'])
+
+    def test_encode_decode(self):
+        vocab = self.vocab
+        ids, lengths = vocab.encode(["The cat sat.", "on the mat"])
+        self.assertEqual(ids.dtype, np.int32)
+        self.assertEqual(ids.tolist(), [[4, 5, 8, 3], [7, 4, 6, 0]])
+        self.assertEqual(lengths.tolist(), [4, 3])
+        self.assertEqual(vocab.decode(ids, lengths), ['the cat sat <UNK>', 'on the mat'])
+        self.assertEqual(vocab.decode(ids, join=False)[1], ['on', 'the', 'mat'])
+
+        ids, lengths = vocab.encode([['the', 'cat', 'sat', 'on'], ['mat']], max_length=3, padding='pre', truncating='pre')
+        self.assertEqual(ids.tolist(), [[5, 8, 7], [0, 0, 6]])
+        self.assertEqual(lengths.tolist(), [3, 1])
+
+        ids, lengths = vocab.encode(["the cat", ""], add_start_end=True)
+        self.assertEqual(ids.tolist(), [[1, 4, 5, 2], [1, 2, 0, 0]])
+        self.assertEqual(lengths.tolist(), [4, 2])
+
+    def test_pickle(self):
+        vocab = pickle.loads(pickle.dumps(self.vocab))
+        self.assertEqual(len(vocab), len(self.vocab))
+        self.assertEqual(vocab.word_to_id('mat'), self.vocab.word_to_id('mat'))
+        # one long word does not set the size of every word
+        words = ['w{}'.format(i) for i in range(1000)] + ['x' * 2000]
+        vocab = tlx.text.CompactVocabulary(words)
+        self.assertLess(len(pickle.dumps(vocab)), 20000)
+        self.assertEqual(pickle.loads(pickle.dumps(vocab)).id_to_word(1000), 'x' * 2000)
+        self.assertEqual(vocab.words[1000], 'x' * 2000)
+
+    def test_file(self):
+        vocab_file = os.path.join(self.directory, 'vocab.txt')
+        self.vocab.save(vocab_file)
+        vocab = tlx.text.CompactVocabulary.from_file(vocab_file)
+        self.assertEqual(vocab.words.tolist(), self.vocab.words.tolist())
+
+    def test_encode_corpus(self):
+        sentences = ["the cat sat on the mat", "", "the dog sat"] * 50
+        data_path = os.path.join(self.directory, 'corpus.txt')
+        with open(data_path, 'w') as f:
+            f.write('\n'.join(sentences))
+        for num_workers in (0, 2):
+            target_path = os.path.join(self.directory, 'corpus{}.ids'.format(num_workers))
+            ids, lengths = self.vocab.encode_corpus(data_path, target_path, num_workers=num_workers, chunk_size=64)
+            expected, expected_lengths = self.vocab.encode(sentences)
+            self.assertEqual(lengths.tolist(), expected_lengths.tolist())
+            self.assertEqual(ids.tolist(), expected[expected != self.vocab.pad_id].tolist())
+            self.assertTrue(os.path.exists(target_path + '.lengths'))
+
+
+class Text_VocabularyBuilder_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        words = ['w{}'.format(i) for i in rng.zipf(1.5, size=20000) if i < 5000]
+        cls.sentences = [' '.join(words[i:i + 10]) for i in range(0, len(words), 10)]
+        cls.counts = collections.Counter(words)
+        cls.data_path = os.path.join(cls.directory, 'corpus.txt')
+        with open(cls.data_path, 'w') as f:
+            f.write('\n'.join(cls.sentences) + '\n')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_exact(self):
+        builder = tlx.text.VocabularyBuilder().update_files(self.data_path, num_workers=2, chunk_size=4096)
+        self.assertEqual(builder.total, sum(self.counts.values()))
+        self.assertEqual(dict(builder.most_common()), dict(self.counts))
+
+        half = len(self.sentences) // 2
+        merged = tlx.text.VocabularyBuilder().update(self.sentences[:half])
+        merged.merge(tlx.text.VocabularyBuilder().update(self.sentences[half:]))
+        self.assertEqual(merged.most_common(), builder.most_common())
+
+    def test_approximate(self):
+        builder = tlx.text.VocabularyBuilder(approximate=True, width=4096, heavy_hitters=200)
+        builder.update_files(self.data_path, num_workers=0, chunk_size=4096)
+        top = builder.most_common(50)
+        self.assertEqual(len(top), 50)
+        for word, count in top:
+            self.assertGreaterEqual(count, self.counts[word])
+        expected = set(word for word, _ in self.counts.most_common(50))
+        self.assertGreaterEqual(len(expected & set(word for word, _ in top)), 45)
+
+    def test_save(self):
+        builder = tlx.text.VocabularyBuilder().update(self.sentences)
+        vocab_file = os.path.join(self.directory, 'vocab.txt')
+        builder.save(vocab_file, max_size=10)
+        with open(vocab_file) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], '<PAD> 0')
+        self.assertEqual(lines[1], '{} {}'.format(*self.counts.most_common(1)[0]))
+        self.assertEqual(len(lines), 11)
+        vocab = tlx.text.CompactVocabulary.from_file(vocab_file)
+        self.assertEqual(vocab.pad_id, 0)
+        self.assertEqual(len(builder.build(max_size=10)), 14)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+
+import tensorlayerx as tlx
+from tests.utils import CustomTestCase
+
+
+def _pairs(batches):
+    return sorted(map(tuple, np.concatenate([np.c_[np.asarray(b[0]), np.asarray(b[1])] for b in batches]).tolist()))
+
+
+class Text_Word2vecDataset_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = np.arange(20)
+        cls.pairs = sorted((i, j) for i in range(20) for j in range(i - 2, i + 3) if j != i and 0 <= j < 20)
+
+    def dataset(self, **kwargs):
+        options = dict(batch_size=7, window=2, subsample=None, dynamic_window=False, chunk_size=6, seed=1)
+        options.update(kwargs)
+        return tlx.text.Word2vecDataset(self.data, **options)
+
+    def test_skipgram(self):
+        batches = list(self.dataset())
+        self.assertEqual(batches[0][0].shape, (7, ))
+        self.assertEqual(batches[0][1].shape, (7, 1))
+        self.assertEqual(_pairs(batches), self.pairs)
+        self.assertEqual(len(list(self.dataset(drop_last=True))), len(self.pairs) // 7)
+
+    def test_sentences(self):
+        pairs = _pairs(self.dataset(lengths=[5, 15]))
+        self.assertEqual(pairs, [(i, j) for i, j in self.pairs if (i < 5) == (j < 5)])
+
+    def test_cbow(self):
+        inputs, labels = next(iter(self.dataset(mode='cbow', shuffle=False, pad_id=-1, batch_size=4)))
+        self.assertEqual(inputs.tolist(), [[1, 2, -1, -1], [0, 2, 3, -1], [0, 1, 3, 4], [1, 2, 4, 5]])
+        self.assertEqual(labels.tolist(), [[0], [1], [2], [3]])
+
+    def test_sampling(self):
+        dataset = self.dataset(dynamic_window=True, num_negatives=3, subsample=1e-3)
+        inputs, labels, negatives = next(iter(dataset))
+        self.assertEqual(negatives.shape, (len(labels), 3))
+        dataset.set_epoch(0)
+        self.assertEqual(_pairs(dataset), _pairs(self.dataset(dynamic_window=True, num_negatives=3, subsample=1e-3)))
+        self.assertLess(len(_pairs(dataset)), len(self.pairs))
+
+        counts = np.array([10., 5., 1., 0.])
+        samples = tlx.text.AliasTable(counts).sample(100000, rng=np.random.default_rng(0))
+        self.assertTrue(np.allclose(np.bincount(samples, minlength=4) / 100000, counts / counts.sum(), atol=0.01))
+
+    def test_workers(self):
+        loader = tlx.dataflow.DataLoader(self.dataset(chunk_size=4), batch_size=None, num_workers=2)
+        self.assertEqual(_pairs(loader), self.pairs)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
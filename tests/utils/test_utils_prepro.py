@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import functools
+import os
+import unittest
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import numpy as np
+
+from tensorlayerx.dataflow import DataLoader, Dataset
+from tensorlayerx.utils import prepro
+from tests.utils import CustomTestCase
+
+
+class _Sentences(Dataset):
+
+    def __init__(self, sequences):
+        self.sequences = sequences
+
+    def __getitem__(self, index):
+        return self.sequences[index], index
+
+    def __len__(self):
+        return len(self.sequences)
+
+
+class Prepro_Sequences_Test(CustomTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sequences = [[1, 2, 3, 4], [5, 6], [7, 8, 9], []]
+        cls.values, cls.offsets = prepro.sequences_to_ragged(cls.sequences)
+
+    def test_ragged(self):
+        self.assertEqual(self.values.tolist(), [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(self.offsets.tolist(), [0, 4, 6, 9, 9])
+        self.assertEqual([s.tolist() for s in prepro.ragged_to_sequences(self.values, self.offsets)], self.sequences)
+        values, offsets = prepro.ragged_truncate(self.values, self.offsets, 2, truncating='pre')
+        self.assertEqual(values.tolist(), [3, 4, 5, 6, 8, 9])
+        self.assertEqual(offsets.tolist(), [0, 2, 4, 6, 6])
+        values, offsets = prepro.ragged_add_start_end(self.values, self.offsets, start_id=10, end_id=11)
+        self.assertEqual(
+            [s.tolist() for s in prepro.ragged_to_sequences(values, offsets)],
+            [[10] + s + [11] for s in self.sequences]
+        )
+
+    def test_pad(self):
+        for padding in ('pre', 'post'):
+            for truncating in ('pre', 'post'):
+                padded = prepro.ragged_pad(self.values, self.offsets, 3, padding=padding, truncating=truncating)
+                for row, sequence in zip(padded.tolist(), self.sequences):
+                    sequence = sequence[-3:] if truncating == 'pre' else sequence[:3]
+                    filling = [0] * (3 - len(sequence))
+                    self.assertEqual(row, filling + sequence if padding == 'pre' else sequence + filling)
+                self.assertEqual(
+                    prepro.pad_sequences(self.sequences, 3, padding=padding, truncating=truncating), padded.tolist()
+                )
+                mask = prepro.ragged_mask(self.offsets, padding=padding)
+                values, offsets = prepro.ragged_from_padded(
+                    prepro.ragged_pad(self.values, self.offsets, padding=padding), padding=padding
+                )
+                self.assertEqual(mask.sum(axis=1).tolist(), [4, 2, 3, 0])
+                self.assertEqual(values.tolist(), self.values.tolist())
+                self.assertEqual(offsets.tolist(), self.offsets.tolist())
+        features = prepro.pad_sequences([np.ones((3, 2)), np.ones((1, 2))], dtype='float32')
+        self.assertEqual(np.asarray(features).shape, (2, 3, 2))
+        with self.assertRaises(ValueError):
+            prepro.ragged_pad(self.values, self.offsets, padding='middle')
+
+    def test_from_padded(self):
+        values, offsets = prepro.ragged_from_padded(np.array([[4, 3, 2, 2], [5, 3, 9, 4]]), end_id=2)
+        self.assertEqual(values.tolist(), [4, 3, 5, 3, 9, 4])
+        self.assertEqual(offsets.tolist(), [0, 2, 6])
+        self.assertEqual(
+            prepro.sequences_get_mask([[4, 0, 5, 3, 0, 0], [5, 3, 9, 4, 9, 0]]).tolist(),
+            [[1, 1, 1, 1, 0, 0], [1, 1, 1, 1, 1, 0]]
+        )
+
+    def test_pad_collate(self):
+        collate_fn = functools.partial(prepro.pad_collate, end_id=99)
+        loader = DataLoader(_Sentences(self.sequences), batch_size=2, collate_fn=collate_fn)
+        (inputs, lengths), indices = next(iter(loader))
+        self.assertEqual(inputs.tolist(), [[1, 2, 3, 4, 99], [5, 6, 99, 0, 0]])
+        self.assertEqual(lengths.tolist(), [5, 3])
+        self.assertEqual(indices.tolist(), [0, 1])
+        batch = prepro.pad_collate([{'x': np.array([1, 2])}, {'x': np.array([3])}], maxlen=1, return_lengths=False)
+        self.assertEqual(batch['x'].tolist(), [[2], [3]])
+
+
+if __name__ == '__main__':
+
+    unittest.main()